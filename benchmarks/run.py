@@ -0,0 +1,282 @@
+"""Benchmark fetching topics against recorded Reddit responses.
+
+Every scenario runs in a fresh subprocess, so that peak memory is its own,
+and reports its throughput, per-subreddit latency percentiles and peak
+memory. Startup time is measured on ``import`` and ``--help``. Results are
+written as JSON, and compared with an earlier run with ``--compare``::
+
+    python -m benchmarks.run --output build/benchmark.json
+    python -m benchmarks.run --compare build/baseline.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from praw import Reddit
+
+from reddit_topics_aggregator.pipeline import FLUSH, RENDERERS, normalize
+from reddit_topics_aggregator.rate_limiter import RateLimiter
+from reddit_topics_aggregator.reddit_client_builder import ThreadLocalReddit
+from reddit_topics_aggregator.topic_fetcher import TopicFetcher
+
+from .cassette import CassetteSession
+
+# Subreddit counts and listing limits every scenario combines
+SUBREDDIT_COUNTS = (1, 50, 500)
+LIMITS = {"default": 10, "large": 100}
+
+# Simulated round trip of a Reddit API request, in seconds
+DEFAULT_LATENCY = 0.02
+
+# Metrics where a higher value is the better one, the others are lower
+HIGHER_IS_BETTER = {"submissions_per_second"}
+
+
+def percentile(values, fraction):
+    """Return the value below which ``fraction`` of the values fall."""
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[
+        round(fraction * 100) - 1
+    ]
+
+
+def peak_rss_mb():
+    """Return the peak resident memory of this process, in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run_scenario(subreddits, limit, concurrency, latency):
+    """Fetch and render the topics of a scenario, returning its measurements."""
+    session = CassetteSession(latency, jitter=latency / 2)
+    # Far above anything the cassettes answer, so only latency paces runs
+    rate_limiter = RateLimiter(1_000_000)
+    reddit_client = ThreadLocalReddit(
+        lambda: rate_limiter.attach(
+            Reddit(
+                client_id="benchmark",
+                client_secret="benchmark",
+                username="benchmark",
+                password="benchmark",
+                user_agent="reddit-topics-aggregator benchmark",
+                requestor_kwargs={"session": session},
+            )
+        )
+    )
+    limits = {"hot": limit, "new": limit, "rising": 0, "top": limit}
+    fetcher = TopicFetcher(limits, rate_limiter)
+    names = [f"bench{index}" for index in range(subreddits)]
+    started = time.perf_counter()
+    latencies, counted = [], []
+    with open(os.devnull, "w") as output:
+        for chunk in RENDERERS["csv"](
+            _timed(
+                normalize(
+                    fetcher.stream_topics(reddit_client, names, concurrency)
+                ),
+                latencies,
+                counted,
+            )
+        ):
+            if isinstance(chunk, str):
+                output.write(chunk)
+    submissions = len(counted)
+    elapsed = time.perf_counter() - started
+    return {
+        "subreddits": subreddits,
+        "limit": limit,
+        "requests": session.requests,
+        "submissions": submissions,
+        "total_seconds": round(elapsed, 3),
+        "submissions_per_second": round(submissions / elapsed, 1),
+        "subreddit_p50_seconds": round(percentile(latencies, 0.5), 3),
+        "subreddit_p99_seconds": round(percentile(latencies, 0.99), 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def _timed(records, latencies, counted):
+    # Subreddits stream one after the other, so the latency of one is the
+    # time from the end of the previous one to its own end
+    subreddit, last = None, time.perf_counter()
+    for record in records:
+        if record is FLUSH:
+            yield record
+            continue
+        if record.subreddit != subreddit:
+            if subreddit is not None:
+                latencies.append(time.perf_counter() - last)
+                last = time.perf_counter()
+            subreddit = record.subreddit
+        counted.append(None)
+        yield record
+    latencies.append(time.perf_counter() - last)
+
+
+def measure_startup(repeat=5):
+    """Return the best time to import the package and to print ``--help``."""
+    commands = {
+        "import_seconds": [
+            sys.executable,
+            "-c",
+            "import reddit_topics_aggregator.cli",
+        ],
+        "help_seconds": [
+            sys.executable,
+            "-m",
+            "reddit_topics_aggregator",
+            "--help",
+        ],
+    }
+    timings = {}
+    for name, command in commands.items():
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            subprocess.run(command, check=True, capture_output=True)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = round(best, 3)
+    return timings
+
+
+def run_in_subprocess(subreddits, limit, concurrency, latency):
+    """Run one scenario in a fresh interpreter and return its measurements."""
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.run",
+            "--scenario",
+            f"{subreddits}:{limit}",
+            "--concurrency",
+            str(concurrency),
+            "--latency",
+            str(latency),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(completed.stdout)
+
+
+def git_commit():
+    """Return the commit benchmarked, or None outside of a git checkout."""
+    completed = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        check=False,
+        capture_output=True,
+        text=True,
+    )
+    return completed.stdout.strip() or None
+
+
+def run_suite(subreddit_counts, limits, concurrency, latency):
+    """Run every scenario and the startup measurements."""
+    scenarios = {}
+    for label, limit in limits.items():
+        for subreddits in subreddit_counts:
+            name = f"{subreddits}x{label}"
+            print(f"Running {name}...", file=sys.stderr)
+            scenarios[name] = run_in_subprocess(
+                subreddits, limit, concurrency, latency
+            )
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "concurrency": concurrency,
+        "latency": latency,
+        "startup": measure_startup(),
+        "scenarios": scenarios,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a line per metric that regressed past ``tolerance`` of the baseline."""
+    regressions = []
+    pairs = [("startup", results["startup"], baseline.get("startup", {}))] + [
+        (name, measured, baseline.get("scenarios", {}).get(name, {}))
+        for name, measured in results["scenarios"].items()
+    ]
+    for name, measured, before in pairs:
+        regressions.extend(
+            f"{name} {metric}: {before[metric]} -> {value} ({change:+.0%})"
+            for metric, value in measured.items()
+            if (change := _change(metric, value, before.get(metric)))
+            > tolerance
+        )
+    return regressions
+
+
+def _change(metric, value, previous):
+    # Relative change, positive when worse; counts are not compared
+    if not previous or not metric.endswith(("_seconds", "_per_second", "_mb")):
+        return 0.0
+    change = (value - previous) / previous
+    return -change if metric in HIGHER_IS_BETTER else change
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", type=Path, help="Write the results here")
+    parser.add_argument(
+        "--compare", type=Path, help="Results of an earlier run to compare with"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Relative change of a metric reported as a regression",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY)
+    parser.add_argument(
+        "--subreddits",
+        type=int,
+        nargs="+",
+        default=SUBREDDIT_COUNTS,
+        help="Subreddit counts to run scenarios for",
+    )
+    # Used by the suite to run one scenario in its own interpreter
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.scenario:
+        subreddits, limit = map(int, args.scenario.split(":"))
+        print(
+            json.dumps(
+                run_scenario(subreddits, limit, args.concurrency, args.latency)
+            )
+        )
+        return 0
+    results = run_suite(args.subreddits, LIMITS, args.concurrency, args.latency)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    if args.compare:
+        regressions = compare(
+            results, json.loads(args.compare.read_text()), args.tolerance
+        )
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
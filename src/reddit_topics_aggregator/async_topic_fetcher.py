@@ -0,0 +1,151 @@
+import asyncio
+
+from .pipeline import FLUSH
+from .topic_fetcher import (
+    REDDIT_INFO_SIZE,
+    REDDIT_PAGE_SIZE,
+    SubredditTopics,
+    TopicFetcher,
+)
+
+
+async def _build_client(build_client):
+    # asyncpraw opens its HTTP session on the running event loop
+    return build_client()
+
+
+async def _shutdown(reddit_client, tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await reddit_client.close()
+
+
+class AsyncTopicFetcher(TopicFetcher):
+    """Fetch the listings of subreddits with asyncpraw on a single event loop."""
+
+    async def _acquire_async(self, tokens=1):
+        if self.rate_limiter:
+            self.metrics.observe_wait(
+                await self.rate_limiter.acquire_async(tokens)
+            )
+
+    async def fetch_listing_async(self, subreddit, listing, limit):
+        """Fetch every submission of a single listing of an asyncpraw subreddit."""
+        name = subreddit.display_name
+        before = self.before(name, listing, limit)
+        if before is not None:
+            topics = await self._paid_pages_async(
+                getattr(subreddit, listing)(
+                    limit=limit, params={"before": before}
+                ),
+                limit,
+            )
+            if topics:
+                return list(self.unseen(name, listing, topics))
+            # Nothing comes back either if the checkpointed submission has
+            # been deleted, so fall back to fetching the listing as usual
+        topics = self.cached_listing(name, listing, limit)
+        if topics is None:
+            topics = await self._paid_pages_async(
+                getattr(subreddit, listing)(limit=limit), limit
+            )
+            self.store_listing(name, listing, limit, topics)
+        return list(self.unseen(name, listing, topics))
+
+    async def _paid_pages_async(self, topics, limit):
+        # Pay for every page right before asyncpraw requests it, like the
+        # sync engine, so a listing that runs out early costs no more
+        fetched = []
+        topics = aiter(topics)
+        for index in range(limit):
+            if index % REDDIT_PAGE_SIZE == 0:
+                await self._acquire_async()
+            try:
+                fetched.append(await anext(topics))
+            except StopAsyncIteration:
+                break
+        return fetched
+
+    async def fetch_title_async(self, subreddit):
+        """Fetch the title of an asyncpraw subreddit from its ``about`` page."""
+        metadata = self.cached_metadata(subreddit.display_name)
+        if metadata is None:
+            await self._acquire_async()
+            await subreddit.load()
+            metadata = self.store_metadata(subreddit)
+        return metadata["title"]
+
+    async def prefetch_metadata_async(self, reddit_client, names):
+        """Load the metadata of every subreddit in bulk, from the cache or ``/api/info``."""
+        missing = self.missing_metadata(names)
+        for start in range(0, len(missing), REDDIT_INFO_SIZE):
+            await self._acquire_async()
+            with self.timings.span("metadata"):
+                async for subreddit in reddit_client.info(
+                    subreddits=missing[start : start + REDDIT_INFO_SIZE]
+                ):
+                    self.store_metadata(subreddit)
+
+    async def fetch_subreddit_async(self, reddit_client, name):
+        """Fetch the title and all requested listings of a subreddit at once."""
+        subreddit = await reddit_client.subreddit(name)
+        listings = self.listings()
+        title, *results = await asyncio.gather(
+            self.fetch_title_async(subreddit),
+            *(
+                self.fetch_listing_async(subreddit, listing, limit)
+                for listing, limit in listings
+            ),
+        )
+        names = [listing for listing, _ in listings]
+        return SubredditTopics(
+            subreddit.display_name,
+            title,
+            dict(zip(names, results, strict=True)),
+        )
+
+    async def _fetch_bounded(self, semaphore, reddit_client, name):
+        async with semaphore:
+            with self.timings.span("subreddit", subreddit=name):
+                return await self.fetch_subreddit_async(reddit_client, name)
+
+    def fetch_topics_async(self, build_client, subreddits, concurrency=1):
+        """Yield a ``SubredditTopics`` for every subreddit, in the order given.
+
+        Every request runs on a single event loop, with up to ``concurrency``
+        subreddits in flight. ``build_client`` is called on that loop to
+        create the asyncpraw client, which is closed once iteration ends.
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            reddit_client = loop.run_until_complete(_build_client(build_client))
+            subreddits = list(subreddits)
+            loop.run_until_complete(
+                self.prefetch_metadata_async(reddit_client, subreddits)
+            )
+            semaphore = asyncio.Semaphore(concurrency)
+            tasks = [
+                loop.create_task(
+                    self._fetch_bounded(semaphore, reddit_client, name)
+                )
+                for name in subreddits
+            ]
+            try:
+                for task in tasks:
+                    yield loop.run_until_complete(task)
+            finally:
+                loop.run_until_complete(_shutdown(reddit_client, tasks))
+        finally:
+            loop.close()
+
+    def stream_topics_async(self, build_client, subreddits, concurrency=1):
+        """Yield a ``ListedSubmission`` for every submission, in the order given.
+
+        ``FLUSH`` is yielded after every subreddit.
+        """
+        for subreddit_topics in self.fetch_topics_async(
+            build_client, subreddits, concurrency
+        ):
+            yield from subreddit_topics.entries()
+            yield FLUSH
@@ -0,0 +1,92 @@
+import threading
+
+from .json_store import JsonStore
+
+# Listings sorted newest first, which can stop at the first submission seen
+CHRONOLOGICAL_LISTINGS = ("new",)
+
+
+def checkpoint_key(subreddit, listing):
+    """Return the key the checkpoint of a listing is stored under."""
+    return f"{subreddit.lower()}/{listing}"
+
+
+class CheckpointStore(JsonStore):
+    """Newest submission seen in every listing, saved between ``topics`` runs."""
+
+    def load(self):
+        """Return every stored checkpoint, keyed by ``checkpoint_key``."""
+        with self._locked():
+            return self._read()
+
+    def save(self, checkpoints):
+        """Store checkpoints, keeping those of listings not fetched this run."""
+        with self._locked():
+            self._write({**self._read(), **checkpoints})
+
+
+class ListingCheckpoints:
+    """Filter out the submissions a previous run has already seen.
+
+    A checkpoint holds the fullname and creation time of the newest
+    submission of a listing, and the ids of every submission fetched from
+    it. Chronological listings stop at the first submission that is not
+    newer than the checkpoint; the others skip the ids seen last time.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.previous = store.load()
+        self.current = {}
+        self._lock = threading.Lock()
+
+    def before(self, subreddit, listing):
+        """Return the fullname to request a chronological listing ``before``, or None."""
+        if listing not in CHRONOLOGICAL_LISTINGS:
+            return None
+        checkpoint = self.previous.get(checkpoint_key(subreddit, listing))
+        return checkpoint["fullname"] if checkpoint else None
+
+    def unseen(self, subreddit, listing, topics):
+        """Yield the submissions that are new since the last run, recording them."""
+        key = checkpoint_key(subreddit, listing)
+        previous = self.previous.get(key)
+        seen = set(previous["seen"]) if previous else set()
+        newest = previous
+        fetched = []
+        for topic in topics:
+            data = vars(topic)
+            if previous and self._is_known(listing, data, seen, previous):
+                break
+            fetched.append(data["id"])
+            newest = self._newest(newest, data)
+            if data["id"] not in seen:
+                yield topic
+        if newest is not None:
+            with self._lock:
+                self.current[key] = {**newest, "seen": fetched}
+
+    @staticmethod
+    def _newest(newest, data):
+        created_utc = data.get("created_utc") or 0
+        if newest is not None and created_utc <= newest["created_utc"]:
+            return newest
+        return {"fullname": f"t3_{data['id']}", "created_utc": created_utc}
+
+    @staticmethod
+    def _is_known(listing, data, seen, previous):
+        # Only a chronological listing is known to hold nothing new past here
+        return listing in CHRONOLOGICAL_LISTINGS and (
+            data["id"] in seen
+            or (data.get("created_utc") or 0) <= previous["created_utc"]
+        )
+
+    def save(self):
+        """Save the checkpoints of every listing fetched so far.
+
+        Saved checkpoints become the baseline of the next fetch, so a
+        long-running process only sees what is new since its last save.
+        """
+        with self._lock:
+            self.store.save(self.current)
+            self.previous.update(self.current)
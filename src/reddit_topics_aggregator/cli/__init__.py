@@ -1,16 +1,41 @@
+import importlib
+
 import click
 
-from .connect import connect as connect_command
-from .topics import topics as topics_command
 
+class LazyGroup(click.Group):
+    """A group importing the module of a command only once the command is used.
+
+    Commands pull in praw and the rest of the fetching stack, which ``--help``,
+    ``--version`` and usage errors of the group have no use for.
+    """
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Command name to the module, relative to this package, defining it
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx):
+        return sorted([*super().list_commands(ctx), *self.lazy_commands])
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name not in self.lazy_commands:
+            return super().get_command(ctx, cmd_name)
+        module = importlib.import_module(self.lazy_commands[cmd_name], __name__)
+        return getattr(module, cmd_name)
 
-@click.group()
+
+@click.group(
+    cls=LazyGroup,
+    lazy_commands={
+        "connect": ".connect",
+        "merge": ".merge",
+        "topics": ".topics",
+        "watch": ".watch",
+    },
+)
 @click.version_option(
     message="%(version)s", package_name="reddit-topics-aggregator"
 )
 def reddit_topics_aggregator():
     """Reddit Topics Aggregator is a tool used to aggregate hot, new, top, and rising topics from multiple Subreddits."""
-
-
-reddit_topics_aggregator.add_command(connect_command)
-reddit_topics_aggregator.add_command(topics_command)
@@ -2,7 +2,12 @@ import click
 
 from ..reddit_client_builder import RedditClientBuilder
 from .exception_handling import handle_cli_exception
-from .options import handle_missing_api_auth, reddit_api_auth
+from .options import (
+    handle_missing_api_auth,
+    reddit_api_auth,
+    timed_run,
+    timings_options,
+)
 
 
 @click.command(
@@ -11,15 +16,33 @@ from .options import handle_missing_api_auth, reddit_api_auth
     short_help="Retrieve info about the authenticated Reddit user.",
 )
 @reddit_api_auth
-def connect(client_id, client_secret, username, password, user_agent):
+@timings_options
+def connect(
+    client_id,
+    client_secret,
+    username,
+    password,
+    user_agent,
+    token_cache,
+    show_timings,
+    trace_file,
+):
     try:
         handle_missing_api_auth(client_id, client_secret, username, password)
-        reddit_client = RedditClientBuilder.build_reddit_client_from_args(
-            client_id, client_secret, username, password, user_agent
-        )
+        with timed_run(show_timings, trace_file) as timings:
+            reddit_client = timings.attach(
+                RedditClientBuilder.build_reddit_client_from_args(
+                    client_id,
+                    client_secret,
+                    username,
+                    password,
+                    user_agent,
+                    token_cache,
+                )
+            )
 
-        # Fetch and display the authenticated user's information
-        authenticated_user = reddit_client.user.me()
+            # Fetch and display the authenticated user's information
+            authenticated_user = reddit_client.user.me()
         click.echo(f"Authenticated as: {authenticated_user.name}")
         click.echo(f"User ID: {authenticated_user.id}")
         click.echo(
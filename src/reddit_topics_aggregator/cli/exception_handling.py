@@ -1,11 +1,12 @@
+import sys
+
 import click
-import praw.exceptions
 
 
 def handle_cli_exception(e):
     if isinstance(e, click.UsageError):
         raise e
-    if isinstance(e, praw.exceptions.PRAWException):
+    if is_praw_exception(e):
         handle_praw_exception(e)
     elif isinstance(e, ValueError):
         handle_value_error(e)
@@ -13,6 +14,14 @@ def handle_cli_exception(e):
         handle_general_exception(e)
 
 
+def is_praw_exception(e):
+    # praw is imported once a client is built, no error can come from it before
+    praw_exceptions = sys.modules.get("praw.exceptions")
+    return praw_exceptions is not None and isinstance(
+        e, praw_exceptions.PRAWException
+    )
+
+
 def handle_general_exception(e):
     click.echo(f"Error: {e}", err=True)
     raise click.ClickException(str(e)) from e
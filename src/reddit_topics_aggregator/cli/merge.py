@@ -0,0 +1,62 @@
+import click
+
+from ..deduplication import DEDUPE_MODES, DEDUPE_NONE
+from ..pipeline import RENDERERS, BufferedOutput, write_output
+from ..ranking import SORT_KEYS, SORT_SCORE, ranked
+from ..sharding import merge_shards
+from .exception_handling import handle_cli_exception
+from .topics import output_stream, refine, render
+
+
+@click.command(
+    name="merge",
+    help="Merge the 'topics --format jsonl' outputs of shards into one, keeping every submission of a subreddit listing once. Outputs are merged in the order given, '-' reading standard input.",
+    short_help="Merge the outputs of 'topics --shard' runs",
+)
+@click.argument("outputs", nargs=-1, required=True, type=click.File("r"))
+@click.option(
+    "--dedupe",
+    required=False,
+    default=DEDUPE_NONE,
+    show_default=True,
+    type=click.Choice(DEDUPE_MODES),
+    help="Also merge a submission listed in several listings, like 'topics --dedupe'",
+)
+@click.option(
+    "--global-top",
+    required=False,
+    default=None,
+    type=click.IntRange(min=1),
+    help="Only print the N highest ranking submissions across every output, highest first",
+)
+@click.option(
+    "--sort-by",
+    required=False,
+    default=None,
+    type=click.Choice(SORT_KEYS),
+    help="Print every submission, highest ranking first, by score, number of comments or velocity. Ranks by score with '--global-top' otherwise",
+)
+@click.option(
+    "--format",
+    "output_format",
+    required=False,
+    default="jsonl",
+    show_default=True,
+    type=click.Choice(list(RENDERERS)),
+)
+def merge(outputs, dedupe, global_top, sort_by, output_format):
+    try:
+        records = refine(
+            merge_shards((output, output.name) for output in outputs),
+            dedupe,
+            global_top,
+            sort_by or SORT_SCORE,
+        )
+        if sort_by and not global_top:
+            records = ranked(records, sort_by)
+        write_output(
+            render(records, output_format),
+            BufferedOutput(output_stream(output_format)),
+        )
+    except Exception as e:
+        handle_cli_exception(e)
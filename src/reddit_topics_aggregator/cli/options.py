@@ -1,5 +1,14 @@
+import os
+from contextlib import contextmanager
+
 import click
 
+from ..metrics import NO_METRICS, Metrics, MetricsServer
+from ..pipeline import RENDERERS
+from ..rate_limiter import DEFAULT_REQUESTS_PER_MINUTE
+from ..response_cache import DEFAULT_MAX_BYTES, DEFAULT_TTLS, ResponseCache
+from ..timings import NO_TIMINGS, Timings
+
 option_client_id = click.option(
     "--client-id",
     default=None,
@@ -35,6 +44,23 @@ option_user_agent = click.option(
     envvar="REDDIT_USER_AGENT",
     help="Custom user agent",
 )
+option_token_cache = click.option(
+    "--token-cache",
+    default=None,
+    required=False,
+    envvar="REDDIT_TOKEN_CACHE",
+    type=click.Path(dir_okay=False, writable=True),
+    help="File OAuth access tokens are saved to and reused from until they are about to expire",
+)
+
+option_credentials_file = click.option(
+    "--credentials-file",
+    default=None,
+    required=False,
+    envvar="REDDIT_CREDENTIALS_FILE",
+    type=click.Path(exists=True, dir_okay=False),
+    help="JSON file listing several credential sets, as objects of client_id, client_secret, username and password, to spread requests over so that their rate limits add up. Numbered variables, REDDIT_CLIENT_ID_1, REDDIT_CLIENT_SECRET_1, REDDIT_USERNAME_1, REDDIT_PASSWORD_1 and on, list them too",
+)
 
 
 def reddit_api_auth(function: callable):
@@ -45,6 +71,7 @@ def reddit_api_auth(function: callable):
             option_username,
             option_password,
             option_user_agent,
+            option_token_cache,
         ]
     ):
         function = option(function)
@@ -68,3 +95,250 @@ def handle_missing_api_auth(client_id, client_secret, username, password):
         raise click.UsageError(
             f"Missing required options: {', '.join(missing_options)}"
         )
+
+
+option_subreddit = click.option(
+    "--subreddit",
+    "-s",
+    required=True,
+    default=None,
+    multiple=True,
+    help='The name of the Subreddits to query. Must be specified without the "r/". e.g. programming or programminghumor',
+)
+
+option_top = click.option(
+    "--top",
+    required=False,
+    default=10,
+    show_default=True,
+    type=int,
+    help="Number of top submissions to retrieve from the subreddits",
+)
+
+option_new = click.option(
+    "--new",
+    required=False,
+    default=10,
+    show_default=True,
+    type=int,
+    help="Number of newest submissions to retrieve from the subreddits",
+)
+
+option_hot = click.option(
+    "--hot",
+    required=False,
+    default=10,
+    show_default=True,
+    type=int,
+    help="Number of hottest submissions to retrieve from the subreddits",
+)
+
+option_rising = click.option(
+    "--rising",
+    required=False,
+    default=10,
+    show_default=True,
+    type=int,
+    help="Number of submissions rising in popularity to retrieve from the subreddits",
+)
+
+option_concurrency = click.option(
+    "--concurrency",
+    required=False,
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Number of worker threads fetching subreddits and their listings in parallel",
+)
+
+option_requests_per_minute = click.option(
+    "--requests-per-minute",
+    required=False,
+    default=DEFAULT_REQUESTS_PER_MINUTE,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Rate limit budget shared by all workers sending requests to Reddit",
+)
+
+option_output_format = click.option(
+    "--format",
+    "output_format",
+    required=False,
+    default="text",
+    show_default=True,
+    type=click.Choice(list(RENDERERS)),
+    help="Print human readable blocks, or one machine readable record per submission as JSON lines, CSV or MessagePack",
+)
+
+
+def checkpoint_file_option(filename, envvar):
+    return click.option(
+        "--checkpoint-file",
+        default=lambda: os.path.join(
+            click.get_app_dir("reddit-topics-aggregator"), filename
+        ),
+        show_default=f"{filename} in the user's app directory",
+        required=False,
+        envvar=envvar,
+        type=click.Path(dir_okay=False, writable=True),
+        help="File the checkpoints of the submissions already seen are saved to",
+    )
+
+
+option_checkpoint_file = checkpoint_file_option(
+    "checkpoints.json", "REDDIT_TOPICS_AGGREGATOR_CHECKPOINTS"
+)
+# ``watch`` keeps its own cursors, so that a running watcher does not make
+# ``topics --since-last-run`` skip what it has already seen, or vice versa
+option_watch_checkpoint_file = checkpoint_file_option(
+    "watch-checkpoints.json", "REDDIT_TOPICS_AGGREGATOR_WATCH_CHECKPOINTS"
+)
+
+
+def subreddit_listing_options(function: callable):
+    for option in reversed(
+        [option_subreddit, option_top, option_new, option_hot, option_rising]
+    ):
+        function = option(function)
+    return function
+
+
+def parse_cache_ttls(ctx, param, values):
+    ttls = {}
+    for value in values:
+        listing, _, seconds = value.partition("=")
+        if listing not in DEFAULT_TTLS or not seconds.isdigit():
+            raise click.BadParameter(
+                f"'{value}' must look like LISTING=SECONDS with LISTING one of: {', '.join(DEFAULT_TTLS)}"
+            )
+        ttls[listing] = int(seconds)
+    return ttls
+
+
+option_cache_dir = click.option(
+    "--cache-dir",
+    default=None,
+    required=False,
+    envvar="REDDIT_TOPICS_AGGREGATOR_CACHE_DIR",
+    type=click.Path(file_okay=False, writable=True),
+    help="Directory of the on-disk response cache. Caching is disabled unless set",
+)
+option_no_cache = click.option(
+    "--no-cache",
+    is_flag=True,
+    default=False,
+    help="Always fetch from Reddit, even when a cache directory is set",
+)
+option_cache_ttl = click.option(
+    "--cache-ttl",
+    default=(),
+    required=False,
+    multiple=True,
+    callback=parse_cache_ttls,
+    metavar="LISTING=SECONDS",
+    help="Override how long a cached listing stays fresh. Defaults: "
+    + ", ".join(f"{key}={value}" for key, value in DEFAULT_TTLS.items()),
+)
+option_cache_max_size = click.option(
+    "--cache-max-size",
+    default=DEFAULT_MAX_BYTES // (1024 * 1024),
+    show_default=True,
+    required=False,
+    type=click.IntRange(min=1),
+    help="Size, in MiB, above which the least recently used responses are evicted",
+)
+
+
+def response_cache_options(function: callable):
+    for option in reversed(
+        [
+            option_cache_dir,
+            option_no_cache,
+            option_cache_ttl,
+            option_cache_max_size,
+        ]
+    ):
+        function = option(function)
+    return function
+
+
+def response_cache_from_options(cache_dir, no_cache, cache_ttl, cache_max_size):
+    if no_cache or not cache_dir:
+        return None
+    return ResponseCache(
+        cache_dir, ttls=cache_ttl, max_bytes=cache_max_size * 1024 * 1024
+    )
+
+
+option_timings = click.option(
+    "--timings",
+    "show_timings",
+    is_flag=True,
+    default=False,
+    help="Print how long authentication, about pages, listing pages, listings, subreddits and output took once done, with counts, totals and p50/p95/p99",
+)
+option_trace_file = click.option(
+    "--trace-file",
+    default=None,
+    required=False,
+    type=click.Path(dir_okay=False, writable=True),
+    help="Also write every timed span to this Chrome trace file, which trace viewers such as Perfetto load. Implies '--timings'",
+)
+
+
+def timings_options(function: callable):
+    for option in reversed([option_timings, option_trace_file]):
+        function = option(function)
+    return function
+
+
+@contextmanager
+def timed_run(show_timings, trace_file):
+    """Yield the timings to record into, reporting them when the run ends."""
+    if not (show_timings or trace_file):
+        yield NO_TIMINGS
+        return
+    timings = Timings()
+    try:
+        yield timings
+    finally:
+        # Also reported when the run fails, which is when they help most
+        click.echo(f"Timings:\n{timings.describe()}", err=True)
+        if trace_file:
+            timings.write_trace(trace_file)
+
+
+option_metrics_file = click.option(
+    "--metrics-file",
+    default=None,
+    required=False,
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write request, error, byte, cache and rate limit counters to this file in the OpenMetrics format once done, for a textfile collector to pick up",
+)
+option_metrics_port = click.option(
+    "--metrics-port",
+    default=None,
+    required=False,
+    type=click.IntRange(min=0, max=65535),
+    help="Serve request, error, byte, cache and rate limit counters on http://127.0.0.1:PORT/metrics in the OpenMetrics format while running",
+)
+
+
+@contextmanager
+def exported_metrics(metrics_file, metrics_port=None):
+    """Yield the metrics to count into, served while running and written once done."""
+    if metrics_file is None and metrics_port is None:
+        yield NO_METRICS
+        return
+    metrics = Metrics()
+    server = None
+    if metrics_port is not None:
+        server = MetricsServer(metrics, port=metrics_port).start()
+        click.echo(f"Serving metrics on {server.url}", err=True)
+    try:
+        yield metrics
+    finally:
+        if server:
+            server.stop()
+        if metrics_file:
+            metrics.write_textfile(metrics_file)
@@ -1,8 +1,57 @@
+from contextlib import nullcontext
+
 import click
 
-from ..reddit_client_builder import RedditClientBuilder
+from ..async_topic_fetcher import AsyncTopicFetcher
+from ..checkpoints import CheckpointStore, ListingCheckpoints
+from ..clustering import NearDuplicateClusterer
+from ..deduplication import (
+    DEDUPE_GLOBAL,
+    DEDUPE_MODES,
+    DEDUPE_NEAR,
+    DEDUPE_NONE,
+    TopicDeduplicator,
+)
+from ..pipeline import (
+    BINARY_FORMATS,
+    RENDERERS,
+    BufferedOutput,
+    normalize,
+    write_output,
+)
+from ..postprocessing import POSTPROCESSORS, PostProcessor, check_postprocessors
+from ..ranking import SORT_KEYS, SORT_SCORE, GlobalTop
+from ..rate_limiter import RateLimiter
+from ..records import SUBMISSION_FIELDS, project_fields
+from ..reddit_client_builder import (
+    RedditClientBuilder,
+    ThreadLocalReddit,
+    credential_sets,
+)
+from ..sharding import parse_shard, shard_subreddits
+from ..summarization import (
+    DEFAULT_SUMMARY_SIZE,
+    SUMMARY_RENDERERS,
+    TopicSummarizer,
+)
+from ..topic_fetcher import TopicFetcher
 from .exception_handling import handle_cli_exception
-from .options import handle_missing_api_auth, reddit_api_auth
+from .options import (
+    exported_metrics,
+    handle_missing_api_auth,
+    option_checkpoint_file,
+    option_concurrency,
+    option_credentials_file,
+    option_metrics_file,
+    option_output_format,
+    option_requests_per_minute,
+    reddit_api_auth,
+    response_cache_from_options,
+    response_cache_options,
+    subreddit_listing_options,
+    timed_run,
+    timings_options,
+)
 
 
 @click.command(
@@ -11,89 +60,379 @@ from .options import handle_missing_api_auth, reddit_api_auth
     short_help="Retrieve Subreddit topic submissions",
 )
 @reddit_api_auth
+@option_credentials_file
+@subreddit_listing_options
+@option_concurrency
 @click.option(
-    "--subreddit",
-    "-s",
-    required=True,
+    "--shard",
+    required=False,
     default=None,
-    multiple=True,
-    help='The name of the Subreddits to query. Must be specified without the "r/". e.g. programming or programminghumor',
+    callback=lambda ctx, param, value: parse_shard_option(value),
+    help="Only fetch the subreddits of shard i of N, written i/N, so that N runs on as many machines split the subreddits between them without coordinating. Subreddits are assigned by consistent hashing of their name, so going from N to N+1 shards only moves the subreddits of the new one. Combine the outputs with 'merge'",
 )
 @click.option(
-    "--top",
+    "--batch-size",
     required=False,
-    default=10,
+    default=1,
     show_default=True,
-    type=int,
-    help="Number of top submissions to retrieve from the subreddits",
+    type=click.IntRange(min=1),
+    help="Fetch up to this many subreddits per combined r/a+b+c listing request. Cuts the request count, but a subreddit may get fewer submissions than asked for when others dominate the combined listing",
+)
+@option_requests_per_minute
+@click.option(
+    "--rate-limit-report",
+    is_flag=True,
+    default=False,
+    help="Print the requests sent, time spent waiting and the rate limit budget Reddit reported once done",
 )
 @click.option(
-    "--new",
+    "--engine",
     required=False,
-    default=10,
+    default="sync",
     show_default=True,
-    type=int,
-    help="Number of newest submissions to retrieve from the subreddits",
+    type=click.Choice(["sync", "async"]),
+    help="Fetch with praw on worker threads (sync) or with asyncpraw on a single event loop (async)",
 )
 @click.option(
-    "--hot",
+    "--dedupe",
     required=False,
-    default=10,
+    default=DEDUPE_NONE,
     show_default=True,
-    type=int,
-    help="Number of hottest submissions to retrieve from the subreddits",
+    type=click.Choice(DEDUPE_MODES),
+    help="Print a submission once per subreddit, or once overall (global, which also merges crossposts), listing every listing it ranked in. near also merges submissions telling the same story under a similar title or link",
+)
+@click.option(
+    "--global-top",
+    required=False,
+    default=None,
+    type=click.IntRange(min=1),
+    help="Only print the N highest ranking submissions across every subreddit, highest first, once all are fetched. Memory stays bounded by N",
+)
+@click.option(
+    "--sort-by",
+    required=False,
+    default=SORT_SCORE,
+    show_default=True,
+    type=click.Choice(SORT_KEYS),
+    help="What '--global-top' ranks submissions by: score, number of comments, or velocity, the score gained per hour since posting",
+)
+@option_output_format
+@click.option(
+    "--fields",
+    required=False,
+    default=",".join(SUBMISSION_FIELDS),
+    show_default=True,
+    callback=lambda ctx, param, value: parse_fields(value),
+    help="Comma separated submission fields to keep, the others are printed empty. The id is always kept. Keeping fewer fields, such as leaving out selftext, saves memory when holding many submissions",
+)
+@click.option(
+    "--postprocess",
+    required=False,
+    default="",
+    callback=lambda ctx, param, value: parse_postprocessors(value),
+    help=f"Comma separated post-processors rewriting the title and selftext of every submission, in the order given, on worker processes: {', '.join(POSTPROCESSORS)}",
+)
+@click.option(
+    "--workers",
+    required=False,
+    default=None,
+    type=click.IntRange(min=1),
+    help="Number of worker processes running '--postprocess', one per CPU by default. With 1, submissions are processed by the fetching process",
+)
+@click.option(
+    "--summarize",
+    is_flag=True,
+    default=False,
+    help="Print the keywords and phrases ranking highest by TF-IDF in every subreddit and across them all, with the ids of the submissions behind them, instead of the submissions (install the `summarize` extra)",
 )
 @click.option(
-    "--rising",
+    "--summary-size",
     required=False,
-    default=10,
+    default=DEFAULT_SUMMARY_SIZE,
     show_default=True,
-    type=int,
-    help="Number of submissions rising in popularity to retrieve from the subreddits",
+    type=click.IntRange(min=1),
+    help="Number of topics listed per subreddit, and across them all, with '--summarize'",
+)
+@click.option(
+    "--since-last-run",
+    is_flag=True,
+    default=False,
+    help="Only print submissions that are new since the last run with this option, checkpointed per subreddit and listing",
 )
+@option_checkpoint_file
+@response_cache_options
+@timings_options
+@option_metrics_file
 def topics(
     client_id,
     client_secret,
     username,
     password,
     user_agent,
+    token_cache,
+    credentials_file,
     subreddit,
     top,
     new,
     hot,
     rising,
+    concurrency,
+    shard,
+    batch_size,
+    requests_per_minute,
+    engine,
+    dedupe,
+    global_top,
+    sort_by,
+    output_format,
+    fields,
+    postprocess,
+    workers,
+    summarize,
+    summary_size,
+    since_last_run,
+    checkpoint_file,
+    cache_dir,
+    no_cache,
+    cache_ttl,
+    cache_max_size,
+    rate_limit_report,
+    show_timings,
+    trace_file,
+    metrics_file,
 ):
     try:
-        handle_missing_api_auth(client_id, client_secret, username, password)
-        if all([hot < 1, new < 1, top < 1]):
-            raise click.UsageError(
-                "Must provide a positive value for one or more of: '--hot', '--new', '--rising', '--top'"
-            )
-        reddit_client = RedditClientBuilder.build_reddit_client_from_args(
-            client_id, client_secret, username, password, user_agent
+        auth = (
+            client_id,
+            client_secret,
+            username,
+            password,
+            user_agent,
+            token_cache,
         )
-        for sub in subreddit:
-            ## TODO Start refactor
-            topics = []
-            this_subreddit = reddit_client.subreddit(sub)
-            if hot > 0:
-                topics.extend(this_subreddit.hot(limit=hot))
-            if new > 0:
-                topics.extend(this_subreddit.new(limit=new))
-            if rising > 0:
-                topics.extend(this_subreddit.rising(limit=rising))
-            if top > 0:
-                topics.extend(this_subreddit.top(limit=top))
-            ## TODO End refactor
-
-            for topic in topics:
-                click.echo("=" * 50)
-                click.echo(
-                    f"Subreddit: r/{this_subreddit.display_name} ({this_subreddit.title})"
-                )
-                click.echo(f"Topic: {topic.title}")
-                click.echo(f"Topic URL: {topic.url}")
-                click.echo(f"Content: {topic.selftext}\n")
+        credentials = load_credentials(credentials_file, auth)
+        limits = {"hot": hot, "new": new, "rising": rising, "top": top}
+        validate_fetch_options(limits, engine, batch_size, credentials)
+        with (
+            timed_run(show_timings, trace_file) as timings,
+            exported_metrics(metrics_file) as metrics,
+            response_cache_from_options(
+                cache_dir, no_cache, cache_ttl, cache_max_size
+            )
+            or nullcontext() as cache,
+        ):
+            # Every credential set brings its own budget, paced on its own
+            rate_limiter = RateLimiter(
+                requests_per_minute * max(len(credentials), 1)
+            )
+            checkpoints = (
+                ListingCheckpoints(CheckpointStore(checkpoint_file))
+                if since_last_run
+                else None
+            )
+            fetcher = build_fetcher(
+                engine,
+                limits,
+                rate_limiter,
+                cache,
+                checkpoints,
+                timings,
+                metrics,
+            )
+            pool = build_client_pool(
+                credentials, auth, requests_per_minute, fetcher
+            )
+            entries = fetch_with_engine(
+                engine,
+                auth,
+                sharded(subreddit, shard),
+                concurrency,
+                batch_size,
+                fetcher,
+                pool,
+            )
+            records = refine(
+                PostProcessor(postprocess, workers).process(
+                    normalize(entries, fields)
+                ),
+                dedupe,
+                global_top,
+                sort_by,
+            )
+            write_output(
+                render(records, output_format, summarize and summary_size),
+                BufferedOutput(output_stream(output_format), timings=timings),
+            )
+            # Only once everything fetched has been written out
+            if checkpoints:
+                checkpoints.save()
+        if rate_limit_report:
+            report_rate_limits(rate_limiter, pool)
 
     except Exception as e:
         handle_cli_exception(e)
+
+
+def parse_fields(value):
+    try:
+        return project_fields(
+            [name.strip() for name in value.split(",") if name.strip()]
+        )
+    except ValueError as e:
+        raise click.BadParameter(str(e)) from e
+
+
+def parse_postprocessors(value):
+    try:
+        return check_postprocessors(
+            [name.strip() for name in value.split(",") if name.strip()]
+        )
+    except ValueError as e:
+        raise click.BadParameter(str(e)) from e
+
+
+def parse_shard_option(value):
+    if value is None:
+        return None
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e)) from e
+
+
+def sharded(subreddits, shard):
+    if shard is None:
+        return subreddits
+    return shard_subreddits(subreddits, *shard)
+
+
+def load_credentials(credentials_file, auth):
+    credentials = credential_sets(credentials_file)
+    if not credentials:
+        handle_missing_api_auth(*auth[:4])
+    return credentials
+
+
+def validate_fetch_options(limits, engine, batch_size, credentials=()):
+    if all([limits["hot"] < 1, limits["new"] < 1, limits["top"] < 1]):
+        raise click.UsageError(
+            "Must provide a positive value for one or more of: '--hot', '--new', '--rising', '--top'"
+        )
+    if batch_size > 1 and engine == "async":
+        raise click.UsageError(
+            "'--batch-size' is only supported by the sync engine"
+        )
+    if credentials and engine == "async":
+        raise click.UsageError(
+            "Several credential sets are only supported by the sync engine"
+        )
+
+
+def build_deduplicator(dedupe):
+    if dedupe == DEDUPE_NEAR:
+        return NearDuplicateClusterer()
+    return TopicDeduplicator(dedupe == DEDUPE_GLOBAL)
+
+
+def refine(records, dedupe, global_top, sort_by):
+    if dedupe != DEDUPE_NONE:
+        records = build_deduplicator(dedupe).deduplicate(records)
+    if global_top:
+        records = GlobalTop(global_top, sort_by).top(records)
+    return records
+
+
+def render(records, output_format, summary_size=None):
+    if not summary_size:
+        return RENDERERS[output_format](records)
+    if output_format not in SUMMARY_RENDERERS:
+        raise click.UsageError(
+            f"'--summarize' supports '--format' {' or '.join(SUMMARY_RENDERERS)}"
+        )
+    return SUMMARY_RENDERERS[output_format](
+        TopicSummarizer(summary_size).summarize(records)
+    )
+
+
+def output_stream(output_format):
+    if output_format in BINARY_FORMATS:
+        return click.get_binary_stream("stdout")
+    return click.get_text_stream("stdout")
+
+
+def build_fetcher(engine, *fetcher_args):
+    if engine == "async":
+        return AsyncTopicFetcher(*fetcher_args)
+    return TopicFetcher(*fetcher_args)
+
+
+def build_client_pool(credentials, auth, requests_per_minute, fetcher):
+    if not credentials:
+        return None
+    # Credential sets share the user agent, token cache and session of the options
+    return (
+        RedditClientBuilder.from_args(*auth)
+        .build_pool(
+            credentials,
+            requests_per_minute=requests_per_minute,
+            attach=lambda reddit_client: fetcher.metrics.attach(
+                fetcher.timings.attach(reddit_client)
+            ),
+            on_drop=lambda member: click.echo(
+                f"Dropped Reddit credentials {member.name}: {member.error}",
+                err=True,
+            ),
+        )
+        .check()
+    )
+
+
+def report_rate_limits(rate_limiter, pool=None):
+    click.echo(f"Rate limit: {rate_limiter.state().describe()}", err=True)
+    for member in pool.members if pool else ():
+        click.echo(
+            f"Rate limit of {member.name}: "
+            f"{member.rate_limiter.state().describe()}",
+            err=True,
+        )
+
+
+def fetch_with_engine(
+    engine, auth, subreddits, concurrency, batch_size, fetcher, pool=None
+):
+    # The rate limiter paces every worker on the headers of every response
+    rate_limiter = fetcher.rate_limiter
+    if engine == "async":
+        builder = RedditClientBuilder.from_args(*auth)
+        return fetcher.stream_topics_async(
+            lambda: rate_limiter.attach(builder.build_async()),
+            subreddits,
+            concurrency,
+        )
+    if pool is not None:
+        return fetch_with_client(
+            pool, subreddits, concurrency, batch_size, fetcher
+        )
+    # praw clients are not thread-safe, so every worker builds its own
+    reddit_client = ThreadLocalReddit(
+        lambda: fetcher.metrics.attach(
+            fetcher.timings.attach(
+                rate_limiter.attach(
+                    RedditClientBuilder.build_reddit_client_from_args(*auth)
+                )
+            )
+        )
+    )
+    return fetch_with_client(
+        reddit_client, subreddits, concurrency, batch_size, fetcher
+    )
+
+
+def fetch_with_client(
+    reddit_client, subreddits, concurrency, batch_size, fetcher
+):
+    if batch_size > 1:
+        return fetcher.stream_batches(
+            reddit_client, subreddits, batch_size, concurrency
+        )
+    return fetcher.stream_topics(reddit_client, subreddits, concurrency)
@@ -0,0 +1,151 @@
+import click
+
+from ..checkpoints import CheckpointStore, ListingCheckpoints
+from ..pipeline import (
+    BINARY_FORMATS,
+    RENDERERS,
+    BufferedOutput,
+    normalize,
+    write_output,
+)
+from ..rate_limiter import RateLimiter
+from ..reddit_client_builder import RedditClientBuilder, ThreadLocalReddit
+from ..topic_fetcher import TopicFetcher
+from ..watcher import DEFAULT_MAX_INTERVAL, DEFAULT_MIN_INTERVAL, Watcher
+from .exception_handling import handle_cli_exception
+from .options import (
+    exported_metrics,
+    handle_missing_api_auth,
+    option_concurrency,
+    option_metrics_file,
+    option_metrics_port,
+    option_output_format,
+    option_requests_per_minute,
+    option_watch_checkpoint_file,
+    reddit_api_auth,
+    subreddit_listing_options,
+)
+
+
+@click.command(
+    name="watch",
+    help="Keep polling Subreddits with a single client and write every new topic submission as it appears. Busy Subreddits are polled more often, quiet ones back off.",
+    short_help="Poll Subreddits for new topic submissions",
+)
+@reddit_api_auth
+@subreddit_listing_options
+@option_concurrency
+@option_requests_per_minute
+@option_output_format
+@option_watch_checkpoint_file
+@click.option(
+    "--min-interval",
+    required=False,
+    default=DEFAULT_MIN_INTERVAL,
+    show_default=True,
+    type=click.FloatRange(min=1),
+    help="Seconds between polls of a Subreddit that keeps changing",
+)
+@click.option(
+    "--max-interval",
+    required=False,
+    default=DEFAULT_MAX_INTERVAL,
+    show_default=True,
+    type=click.FloatRange(min=1),
+    help="Seconds between polls of a Subreddit that stays quiet",
+)
+@click.option(
+    "--output",
+    "-o",
+    required=False,
+    default="-",
+    show_default=True,
+    type=click.Path(dir_okay=False, allow_dash=True),
+    help="File new submissions are appended to, or - for standard output",
+)
+@click.option(
+    "--rounds",
+    required=False,
+    default=None,
+    type=click.IntRange(min=1),
+    help="Stop after this many polling rounds. Runs until interrupted by default",
+)
+@option_metrics_port
+@option_metrics_file
+def watch(
+    client_id,
+    client_secret,
+    username,
+    password,
+    user_agent,
+    token_cache,
+    subreddit,
+    top,
+    new,
+    hot,
+    rising,
+    concurrency,
+    requests_per_minute,
+    output_format,
+    checkpoint_file,
+    min_interval,
+    max_interval,
+    output,
+    rounds,
+    metrics_port,
+    metrics_file,
+):
+    try:
+        handle_missing_api_auth(client_id, client_secret, username, password)
+        if min_interval > max_interval:
+            raise click.UsageError(
+                "'--min-interval' must not be above '--max-interval'"
+            )
+        with exported_metrics(metrics_file, metrics_port) as metrics:
+            rate_limiter = RateLimiter(requests_per_minute)
+            fetcher = TopicFetcher(
+                {"hot": hot, "new": new, "rising": rising, "top": top},
+                rate_limiter,
+                checkpoints=ListingCheckpoints(
+                    CheckpointStore(checkpoint_file)
+                ),
+                metrics=metrics,
+            )
+            # praw clients are not thread-safe, so every worker builds its own
+            reddit_client = ThreadLocalReddit(
+                lambda: metrics.attach(
+                    rate_limiter.attach(
+                        RedditClientBuilder.build_reddit_client_from_args(
+                            client_id,
+                            client_secret,
+                            username,
+                            password,
+                            user_agent,
+                            token_cache,
+                        )
+                    )
+                )
+            )
+            watcher = Watcher(
+                fetcher,
+                reddit_client,
+                subreddit,
+                concurrency,
+                min_interval,
+                max_interval,
+                on_error=lambda e: click.echo(
+                    f"Reddit Client Error: {e}", err=True
+                ),
+            )
+            mode = "ab" if output_format in BINARY_FORMATS else "a"
+            with click.open_file(output, mode) as stream:
+                write_output(
+                    RENDERERS[output_format](normalize(watcher.stream(rounds))),
+                    BufferedOutput(stream),
+                )
+
+    except KeyboardInterrupt:
+        # Interrupting is the normal way to stop watching
+        click.echo("Stopped watching", err=True)
+    except Exception as e:
+        handle_cli_exception(e)
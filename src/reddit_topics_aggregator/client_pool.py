@@ -0,0 +1,136 @@
+import threading
+
+from .praw_internals import private_attribute
+from .rate_limiter import DEFAULT_REQUESTS_PER_MINUTE, RateLimiter
+from .reddit_client_builder import ThreadLocalReddit
+from .timings import request_span
+
+# Statuses of a token request refused for its credentials
+_REFUSED_STATUSES = (400, 401, 403)
+
+
+def is_refused_token(response):
+    """Return whether a token response refuses the credentials it was asked with."""
+    if response.status_code in _REFUSED_STATUSES:
+        return True
+    try:
+        # Reddit answers a wrong password with a 200 carrying an error
+        return "error" in response.json()
+    except ValueError:
+        return False
+
+
+def _unchanged(reddit_client):
+    return reddit_client
+
+
+class PooledClient:
+    """A credential set of a ``ClientPool``, with its clients and rate limiter."""
+
+    def __init__(self, builder, rate_limiter, attach=_unchanged):
+        self.builder = builder
+        self.rate_limiter = rate_limiter
+        self.healthy = True
+        self.error = None
+        # Times picked by the pool, which breaks ties between idle clients
+        self.selected = 0
+        self._attach = attach
+        self.client = ThreadLocalReddit(self._build)
+
+    @property
+    def name(self):
+        """Return the client id and username identifying the credential set."""
+        return f"{self.builder.client_id}/{self.builder.username}"
+
+    def _build(self):
+        reddit_client = self.rate_limiter.pace(
+            self.rate_limiter.attach(self.builder.build())
+        )
+        return self._attach(self._guard(reddit_client))
+
+    def _guard(self, reddit_client):
+        # Mark the credentials unhealthy as soon as Reddit refuses a token
+        requestor = private_attribute(reddit_client, "_core", "requestor")
+        request = private_attribute(requestor, "request")
+
+        def guarded_request(method, url, *args, **kwargs):
+            response = request(method, url, *args, **kwargs)
+            if request_span(method, url)[0] == "auth" and is_refused_token(
+                response
+            ):
+                self.healthy = False
+                self.error = f"token refused with status {response.status_code}"
+            return response
+
+        requestor.request = guarded_request
+        return reddit_client
+
+
+class ClientPool:
+    """Stand in for a praw client, spreading requests over several credential sets.
+
+    Every credential set gets its own clients, one per thread, and its own
+    rate limiter, paced on the budget Reddit reports for it. Subreddits, and
+    the listings fetched through them, go to the least loaded credentials:
+    those that could send the most requests right away. Credentials Reddit
+    refuses a token for are dropped, and reported to ``on_drop``, so that
+    the run carries on with the others.
+    """
+
+    def __init__(
+        self,
+        builders,
+        requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+        attach=_unchanged,
+        on_drop=None,
+    ):
+        self.members = [
+            PooledClient(builder, RateLimiter(requests_per_minute), attach)
+            for builder in builders
+        ]
+        self._on_drop = on_drop
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.members)
+
+    def check(self):
+        """Authenticate every credential set, dropping those Reddit refuses."""
+        # Imported here, praw is slow to import and only needed to connect
+        import prawcore.exceptions
+
+        for member in self.members:
+            try:
+                member.client.user.me()
+            except prawcore.exceptions.PrawcoreException:
+                # Only refused tokens drop credentials, not network failures
+                if member.healthy:
+                    raise
+        with self._lock:
+            self._drop_unhealthy()
+        return self
+
+    def select(self):
+        """Return the healthy credential set that could send the most requests right away."""
+        with self._lock:
+            self._drop_unhealthy()
+            member = max(
+                self.members,
+                key=lambda member: (
+                    member.rate_limiter.headroom(),
+                    -member.selected,
+                ),
+            )
+            member.selected += 1
+            return member
+
+    def _drop_unhealthy(self):
+        for member in [member for member in self.members if not member.healthy]:
+            self.members.remove(member)
+            if self._on_drop:
+                self._on_drop(member)
+        if not self.members:
+            raise ValueError("Reddit refused every credential set")
+
+    def __getattr__(self, name):
+        return getattr(self.select().client, name)
@@ -0,0 +1,195 @@
+import hashlib
+import random
+import re
+from urllib.parse import urlsplit
+
+from .deduplication import TopicDeduplicator
+from .pipeline import FLUSH
+
+# MinHash signatures are split in this many bands of this many rows, which
+# makes records around 50% similar likely to share a bucket
+DEFAULT_BANDS = 16
+DEFAULT_ROWS = 4
+
+# Estimated similarity above which records in a bucket are the same story
+DEFAULT_THRESHOLD = 0.5
+
+_MASK = (1 << 64) - 1
+
+# Records whose signatures are computed at once, bounding the memory used
+_SIGNATURE_CHUNK = 4096
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def normalized_url(url):
+    """Return the part of a link that identifies what it points to, or None."""
+    parts = urlsplit(url or "")
+    host = parts.netloc.lower().removeprefix("www.")
+    # Self posts link to their own comments, which no other post shares
+    if not host or host == "reddit.com" or host.endswith(".reddit.com"):
+        return None
+    return f"{host}{parts.path.rstrip('/')}"
+
+
+def shingles(record):
+    """Return the word pairs of a record's title, and its link, as a set."""
+    words = WORD_PATTERN.findall((record.title or "").lower())
+    found = {" ".join(words[i : i + 2]) for i in range(max(len(words) - 1, 1))}
+    url = normalized_url(record.url)
+    if url:
+        found.add(url)
+    found.discard("")
+    return found
+
+
+def shingle_hashes(record):
+    """Return a stable 64-bit hash of every shingle of a record."""
+    return [
+        int.from_bytes(
+            hashlib.blake2b(shingle.encode(), digest_size=8).digest()
+        )
+        for shingle in shingles(record)
+    ]
+
+
+class NearDuplicateClusterer:
+    """Group records telling the same story, in near-linear time.
+
+    Every record gets a MinHash signature of its title and link. Records
+    whose signatures agree on a whole band land in the same bucket, and are
+    merged when their signatures estimate them similar enough, so records
+    are only compared with the few sharing a bucket, never pairwise.
+    """
+
+    def __init__(
+        self,
+        threshold=DEFAULT_THRESHOLD,
+        bands=DEFAULT_BANDS,
+        rows=DEFAULT_ROWS,
+        seed=0,
+    ):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        generator = random.Random(seed)
+        # Multiply-shift hash functions, odd multipliers over 64 bits
+        self._hashes = [
+            (generator.getrandbits(64) | 1, generator.getrandbits(64))
+            for _ in range(bands * rows)
+        ]
+
+    def signature(self, record):
+        """Return the MinHash signature of a record, or None if it has no words."""
+        values = shingle_hashes(record)
+        if not values:
+            return None
+        return tuple(
+            min(((a * value + b) & _MASK) >> 32 for value in values)
+            for a, b in self._hashes
+        )
+
+    def signatures(self, records):
+        """Return the signature of every record, vectorized when numpy is installed."""
+        try:
+            import numpy
+        except ImportError:
+            return [self.signature(record) for record in records]
+        signatures = []
+        for start in range(0, len(records), _SIGNATURE_CHUNK):
+            signatures.extend(
+                self._signatures_with_numpy(
+                    numpy, records[start : start + _SIGNATURE_CHUNK]
+                )
+            )
+        return signatures
+
+    def _signatures_with_numpy(self, numpy, records):
+        hashes = [shingle_hashes(record) for record in records]
+        lengths = numpy.array([len(values) for values in hashes])
+        if not lengths.any():
+            return [None] * len(records)
+        values = numpy.fromiter(
+            (value for values in hashes for value in values),
+            dtype=numpy.uint64,
+            count=int(lengths.sum()),
+        )
+        a, b = (
+            numpy.array(column, dtype=numpy.uint64)
+            for column in zip(*self._hashes, strict=True)
+        )
+        # uint64 arithmetic wraps around, like the mask of ``signature``
+        hashed = (values[:, None] * a + b) >> numpy.uint64(32)
+        starts = numpy.concatenate(([0], numpy.cumsum(lengths)[:-1]))
+        minimums = numpy.minimum.reduceat(hashed, starts[lengths > 0], axis=0)
+        rows = iter(minimums.tolist())
+        return [tuple(next(rows)) if length else None for length in lengths]
+
+    def similarity(self, first, second):
+        """Estimate the Jaccard similarity of two records from their signatures."""
+        matches = sum(x == y for x, y in zip(first, second, strict=True))
+        return matches / len(first)
+
+    def bucket_keys(self, signature):
+        """Return the LSH bucket of every band of a signature."""
+        if signature is None:
+            return []
+        return [
+            (band, signature[band * self.rows : (band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    def clusters(self, records):
+        """Return the records grouped into clusters, in first-seen order."""
+        signatures = self.signatures(records)
+        sets = _DisjointSets(len(records))
+        buckets = {}
+        for index, signature in enumerate(signatures):
+            for key in self.bucket_keys(signature):
+                # Only compare with the first record seen in the bucket
+                first = buckets.setdefault(key, index)
+                if sets.find(first) != sets.find(index) and (
+                    self.similarity(signatures[first], signature)
+                    >= self.threshold
+                ):
+                    sets.union(first, index)
+        clusters = {}
+        for index, record in enumerate(records):
+            clusters.setdefault(sets.find(index), []).append(record)
+        return list(clusters.values())
+
+    def deduplicate(self, records):
+        """Yield one merged record per cluster, listing every appearance of its members.
+
+        Exact duplicates and crossposts are merged first. Any later
+        subreddit may still tell the same story, so nothing is yielded
+        until the stream ends.
+        """
+        merged = TopicDeduplicator(across_subreddits=True).merge(
+            record for record in records if record is not FLUSH
+        )
+        for first, *others in self.clusters(merged):
+            yield first.with_appearances(
+                *(
+                    appearance
+                    for other in others
+                    for appearance in other.appearances
+                )
+            )
+
+
+class _DisjointSets:
+    def __init__(self, size):
+        self.parents = list(range(size))
+
+    def find(self, index):
+        while self.parents[index] != index:
+            # Halve the path on the way up, so later finds stay short
+            self.parents[index] = self.parents[self.parents[index]]
+            index = self.parents[index]
+        return index
+
+    def union(self, first, second):
+        # The earlier record stays the root, and so the face of the cluster
+        first, second = sorted((self.find(first), self.find(second)))
+        self.parents[second] = first
@@ -0,0 +1,83 @@
+from .pipeline import FLUSH
+
+# Values accepted by ``topics --dedupe``
+DEDUPE_NONE = "none"
+DEDUPE_SUBREDDIT = "subreddit"
+DEDUPE_GLOBAL = "global"
+DEDUPE_NEAR = "near"
+DEDUPE_MODES = (DEDUPE_NONE, DEDUPE_SUBREDDIT, DEDUPE_GLOBAL, DEDUPE_NEAR)
+
+
+def record_key(record, across_subreddits=False):
+    """Return the id records are merged by.
+
+    Across subreddits, crossposts are merged with the submission they were
+    crossposted from.
+    """
+    if across_subreddits and record.crosspost_parent:
+        return record.crosspost_parent.removeprefix("t3_")
+    return record.id
+
+
+class TopicDeduplicator:
+    """Merge records by id as they stream in, in constant time per item."""
+
+    def __init__(self, across_subreddits=False):
+        self.across_subreddits = across_subreddits
+        self._merged = {}
+
+    def add(self, record):
+        """Record an appearance of a submission.
+
+        Returns:
+            The merged record so far and whether this was its first appearance.
+        """
+        key, is_new = self._add(record)
+        return self._merged[key], is_new
+
+    def _add(self, record):
+        key = record_key(record, self.across_subreddits)
+        if not self.across_subreddits:
+            key = (record.subreddit, key)
+        merged = self._merged.get(key)
+        is_new = merged is None
+        # Records are immutable, so every appearance replaces the merged one
+        self._merged[key] = (record if is_new else merged).with_appearances(
+            (record.subreddit, record.listing, record.rank)
+        )
+        return key, is_new
+
+    def merge(self, records):
+        """Return the new merged records, in first-seen order."""
+        keys = []
+        for record in records:
+            key, is_new = self._add(record)
+            if is_new:
+                keys.append(key)
+        return [self._merged[key] for key in keys]
+
+    def deduplicate(self, records):
+        """Yield merged records once every appearance they can have is in.
+
+        Per subreddit, a subreddit's records are yielded once all its
+        listings are in, and then forgotten. Across subreddits, a later
+        subreddit may still crosspost any record, so nothing is yielded
+        until the stream ends.
+        """
+        if self.across_subreddits:
+            yield from self.merge(
+                record for record in records if record is not FLUSH
+            )
+            return
+        group = []
+        for record in records:
+            if record is FLUSH:
+                continue
+            if group and record.subreddit != group[0].subreddit:
+                merged = self.merge(group)
+                self._merged.clear()
+                yield from merged
+                yield FLUSH
+                group = []
+            group.append(record)
+        yield from self.merge(group)
@@ -0,0 +1,444 @@
+import base64
+import binascii
+import json
+import random
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import click
+
+from .topic_fetcher import LISTINGS
+
+# Reddit stops paginating a listing after this many submissions
+MAX_LISTING_SIZE = 1000
+
+# Submissions per listing page when no limit is asked for, and at most
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+# Reddit allows every access token this many requests per window, in seconds
+DEFAULT_REQUESTS_PER_WINDOW = 1000
+RATE_LIMIT_WINDOW = 600
+
+# Submission ids are the listing's number times this, plus a sequence number
+_SEQUENCE_STRIDE = 10**9
+
+_TITLE_WORDS = """
+python rust release async database compiler kernel browser security patch
+performance benchmark library framework tutorial question project update
+open source memory thread server cloud linux windows editor testing
+"""
+TITLE_WORDS = _TITLE_WORDS.split()
+
+
+def to_base36(number):
+    """Return a number written the way Reddit writes ids."""
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    encoded = ""
+    while True:
+        number, digit = divmod(number, 36)
+        encoded = digits[digit] + encoded
+        if not number:
+            return encoded
+
+
+def listing_number(name, listing):
+    """Return the stable number the submission ids of a listing start from."""
+    return zlib.crc32(f"{name.lower()}/{listing}".encode()) % 10**6
+
+
+def basic_auth_user(headers):
+    """Return the user, or client id, of a basic ``Authorization`` header."""
+    encoded = headers.get("Authorization", "").removeprefix("Basic ")
+    try:
+        return base64.b64decode(encoded).decode().partition(":")[0]
+    except (binascii.Error, UnicodeDecodeError):
+        return None
+
+
+class FakeReddit:
+    """The state and the answers of a local stand-in for the Reddit API.
+
+    Every subreddit exists, with ``MAX_LISTING_SIZE`` synthetic submissions
+    per listing, numbered newest first so that ``after`` and ``before``
+    page through them like on Reddit. ``new`` listings grow by
+    ``posts_per_minute``. Every access token gets its own rate limit
+    window, reported in ``x-ratelimit-*`` headers and enforced with 429
+    responses. ``latency`` (plus up to ``jitter``) seconds are waited per
+    request, and ``error_rate`` of the requests fail with ``error_status``.
+    Token requests of the ``refused_client_ids`` are refused, like those of
+    revoked apps.
+    """
+
+    def __init__(
+        self,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        error_status=503,
+        requests_per_window=DEFAULT_REQUESTS_PER_WINDOW,
+        posts_per_minute=0.0,
+        seed=0,
+        refused_client_ids=(),
+        clock=time.time,
+        sleep=time.sleep,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests_per_window = requests_per_window
+        self.posts_per_minute = posts_per_minute
+        self.refused_client_ids = set(refused_client_ids)
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._seed = seed
+        self._clock = clock
+        self._sleep = sleep
+        self._started = clock()
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def respond(self, method, url, headers):
+        """Return the status, headers and JSON payload answering a request."""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.random() * self.jitter
+            failed = self._random.random() < self.error_rate
+        if delay:
+            self._sleep(delay)
+        parts = urlsplit(url)
+        path = parts.path.rstrip("/").removesuffix(".json")
+        params = dict(parse_qsl(parts.query))
+        if method == "POST" and path == "/api/v1/access_token":
+            return self._access_token(headers)
+        token = headers.get("Authorization", "").removeprefix("bearer ")
+        if token not in self._windows:
+            return 401, {}, {"message": "Unauthorized", "error": 401}
+        allowed, rate_limit_headers = self._spend(token)
+        if not allowed:
+            return 429, rate_limit_headers, {"message": "Too Many Requests"}
+        status, payload = self._answer(path, params, failed)
+        return status, rate_limit_headers, payload
+
+    def _answer(self, path, params, failed):
+        if failed:
+            with self._lock:
+                self.errors += 1
+            return self.error_status, {
+                "message": "Injected error",
+                "error": self.error_status,
+            }
+        payload = self._route(path, params)
+        if payload is None:
+            return 404, {"message": "Not Found"}
+        return 200, payload
+
+    def _access_token(self, headers):
+        if basic_auth_user(headers) in self.refused_client_ids:
+            return 401, {}, {"message": "Unauthorized", "error": 401}
+        with self._lock:
+            token = f"fake-token-{len(self._windows) + 1}"
+            self._windows[token] = [self._clock(), 0]
+        return (
+            200,
+            {},
+            {
+                "access_token": token,
+                "expires_in": 86400,
+                "scope": "*",
+                "token_type": "bearer",
+            },
+        )
+
+    def _spend(self, token):
+        with self._lock:
+            window = self._windows[token]
+            now = self._clock()
+            if now - window[0] >= RATE_LIMIT_WINDOW:
+                window[:] = [now, 0]
+            window[1] += 1
+            used = window[1]
+            reset = RATE_LIMIT_WINDOW - (now - window[0])
+        # Requests over the limit are refused, and not reported as used
+        remaining = self.requests_per_window - used
+        return remaining >= 0, {
+            "x-ratelimit-used": str(min(used, self.requests_per_window)),
+            "x-ratelimit-remaining": f"{max(remaining, 0):.1f}",
+            "x-ratelimit-reset": str(int(reset)),
+        }
+
+    def _route(self, path, params):
+        if path == "/api/v1/me":
+            return self._me()
+        if path == "/api/info":
+            names = params.get("sr_name", "").split(",")
+            return self._listing([self._about(name) for name in names])
+        parts = path.strip("/").split("/")
+        if len(parts) == 3 and parts[0] == "r":
+            return self._subreddit_route(parts[1], parts[2], params)
+        return None
+
+    def _subreddit_route(self, names, endpoint, params):
+        if endpoint == "about":
+            return self._about(names)
+        if endpoint in LISTINGS:
+            return self._listing_page(names.split("+"), endpoint, params)
+        return None
+
+    @staticmethod
+    def _me():
+        return {
+            "name": "fake_user",
+            "id": "fake1",
+            "link_karma": 1,
+            "comment_karma": 1,
+            "created_utc": 1577836800.0,
+        }
+
+    @staticmethod
+    def _about(name):
+        return {
+            "kind": "t5",
+            "data": {
+                "id": to_base36(listing_number(name, "about")),
+                "name": f"t5_{to_base36(listing_number(name, 'about'))}",
+                "display_name": name,
+                "display_name_prefixed": f"r/{name}",
+                "title": f"{name} title",
+                "public_description": f"The fake r/{name}",
+                "subscribers": listing_number(name, "subscribers"),
+                "over18": False,
+                "subreddit_type": "public",
+                "url": f"/r/{name}/",
+                "created_utc": 1262304000.0,
+            },
+        }
+
+    def _head(self, listing):
+        # Sequence number of the next submission of a listing, which only
+        # grows for the chronological one
+        if listing != "new":
+            return MAX_LISTING_SIZE
+        elapsed = self._clock() - self._started
+        return MAX_LISTING_SIZE + int(elapsed * self.posts_per_minute / 60)
+
+    def _listing_page(self, names, listing, params):
+        head = self._head(listing)
+        limit = min(int(params.get("limit", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        start, end = 0, limit
+        if params.get("after") or params.get("before"):
+            position = self._position(
+                names, listing, head, params.get("after") or params["before"]
+            )
+            if position is None:
+                return self._listing([])
+            start, end = (
+                (position + 1, position + 1 + limit)
+                if params.get("after")
+                else (max(position - limit, 0), position)
+            )
+        end = min(end, MAX_LISTING_SIZE)
+        children = [
+            self._submission(names, listing, head, position)
+            for position in range(start, end)
+        ]
+        return self._listing(
+            children, after=end < MAX_LISTING_SIZE, before=start > 0
+        )
+
+    def _position(self, names, listing, head, fullname):
+        number = int(fullname.removeprefix("t3_"), 36)
+        scope, sequence = divmod(number, _SEQUENCE_STRIDE)
+        for index, name in enumerate(names):
+            if listing_number(name, listing) == scope:
+                return (head - 1 - sequence) * len(names) + index
+        return None
+
+    def _submission(self, names, listing, head, position):
+        # Subreddits of a combined listing take turns
+        name = names[position % len(names)]
+        sequence = head - 1 - position // len(names)
+        submission_id = to_base36(
+            listing_number(name, listing) * _SEQUENCE_STRIDE + sequence
+        )
+        words = random.Random(f"{self._seed}/{submission_id}").sample(
+            TITLE_WORDS, 5
+        )
+        interval = 60 / self.posts_per_minute if self.posts_per_minute else 60
+        created_utc = self._started - (head - 1 - sequence) * interval
+        return {
+            "kind": "t3",
+            "data": {
+                "id": submission_id,
+                "name": f"t3_{submission_id}",
+                "title": " ".join(words).capitalize(),
+                "selftext": f"Fake submission about {' and '.join(words[:2])}",
+                "url": f"https://example.com/{name}/{submission_id}",
+                "permalink": f"/r/{name}/comments/{submission_id}/fake/",
+                "subreddit": name,
+                "subreddit_name_prefixed": f"r/{name}",
+                "author": "fake_user",
+                "score": max(MAX_LISTING_SIZE - position, 0) * 7,
+                "num_comments": (sequence * 13) % 500,
+                "upvote_ratio": 0.9,
+                "created_utc": created_utc,
+                "is_self": False,
+                "over_18": False,
+                "stickied": False,
+            },
+        }
+
+    @staticmethod
+    def _listing(children, after=False, before=False):
+        return {
+            "kind": "Listing",
+            "data": {
+                "after": children[-1]["data"]["name"]
+                if after and children
+                else None,
+                "before": children[0]["data"]["name"]
+                if before and children
+                else None,
+                "dist": len(children),
+                "children": children,
+            },
+        }
+
+
+class _FakeRedditHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._respond("GET")
+
+    def do_POST(self):
+        # The form of a token request is read, and ignored
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._respond("POST")
+
+    def _respond(self, method):
+        status, headers, payload = self.server.fake.respond(
+            method, self.path, self.headers
+        )
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class FakeRedditServer(ThreadingHTTPServer):
+    """Serve a ``FakeReddit`` over HTTP, one thread per connection.
+
+    Point a client at ``url`` with ``RedditClientBuilder.set_base_url``, or
+    the ``REDDIT_BASE_URL`` environment variable.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, fake=None, host="127.0.0.1", port=0, verbose=False):
+        super().__init__((host, port), _FakeRedditHandler)
+        self.fake = fake or FakeReddit()
+        self.verbose = verbose
+        self._thread = None
+
+    @property
+    def url(self):
+        """Return the base URL the server answers on."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve on a background thread until ``stop`` is called."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the socket."""
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+    def handle_error(self, request, client_address):
+        # Clients timing out on injected latency hang up before the response
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def __exit__(self, *args):
+        if self._thread:
+            self.stop()
+        else:
+            super().__exit__(*args)
+
+
+@click.command(
+    help="Serve a local stand-in for the Reddit API, for load testing. Point clients at it with REDDIT_BASE_URL.",
+)
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", default=8080, show_default=True, type=int)
+@click.option(
+    "--latency",
+    default=0.0,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help="Seconds waited before answering every request",
+)
+@click.option(
+    "--jitter",
+    default=0.0,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help="Up to this many more seconds waited, at random",
+)
+@click.option(
+    "--error-rate",
+    default=0.0,
+    show_default=True,
+    type=click.FloatRange(min=0, max=1),
+    help="Share of the requests answered with '--error-status'",
+)
+@click.option("--error-status", default=503, show_default=True, type=int)
+@click.option(
+    "--requests-per-window",
+    default=DEFAULT_REQUESTS_PER_WINDOW,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help=f"Requests allowed per access token every {RATE_LIMIT_WINDOW} seconds",
+)
+@click.option(
+    "--posts-per-minute",
+    default=0.0,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help="Submissions added to every 'new' listing per minute",
+)
+@click.option("--seed", default=0, show_default=True, type=int)
+@click.option(
+    "--refused-client-id",
+    "refused_client_ids",
+    multiple=True,
+    help="Refuse the token requests of this client id, like a revoked app's",
+)
+@click.option("--verbose", is_flag=True, default=False)
+def main(host, port, verbose, **options):
+    with FakeRedditServer(FakeReddit(**options), host, port, verbose) as server:
+        click.echo(f"Fake Reddit API listening on {server.url}")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import socket
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+# Connections kept open to each host, shared by every client of the session
+DEFAULT_POOL_SIZE = 32
+
+# Seconds to wait for a connection to Reddit, and then for its response
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 16.0
+
+# Seconds a pooled connection may sit idle before TCP checks it is still up
+DEFAULT_KEEP_ALIVE = 60
+
+_shared_sessions = {}
+_shared_sessions_lock = threading.Lock()
+
+
+def keep_alive_socket_options(idle):
+    """Return socket options probing idle connections every ``idle`` seconds."""
+    options = [
+        *HTTPConnection.default_socket_options,
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+    # Only Linux, and recent macOS, let the probing interval be tuned
+    for name in ("TCP_KEEPIDLE", "TCP_KEEPINTVL"):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), idle))
+    return options
+
+
+class PooledSession(requests.Session):
+    """A requests session sized to be shared by every client of a process.
+
+    Worker threads draw from one pool of connections, blocking for a free
+    one rather than opening connections the pool would then discard, so
+    every connection, and its TLS handshake, is reused. Requests time out
+    on ``connect_timeout`` and ``read_timeout``, whatever praw asks for.
+    Connections are closed after every response when ``keep_alive`` is None.
+    """
+
+    def __init__(
+        self,
+        pool_size=DEFAULT_POOL_SIZE,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT,
+        keep_alive=DEFAULT_KEEP_ALIVE,
+        gzip=True,
+    ):
+        super().__init__()
+        self.timeout = (connect_timeout, read_timeout)
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True
+        )
+        if keep_alive is None:
+            self.headers["Connection"] = "close"
+        else:
+            adapter.init_poolmanager(
+                pool_size,
+                pool_size,
+                block=True,
+                socket_options=keep_alive_socket_options(keep_alive),
+            )
+        if not gzip:
+            self.headers["Accept-Encoding"] = "identity"
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, *args, timeout=None, **kwargs):
+        return super().request(
+            method, url, *args, timeout=self.timeout, **kwargs
+        )
+
+
+def shared_session(user_agent, **options):
+    """Return the session of this process created with ``options``, creating it on first use.
+
+    Clients sending another user agent get another session, prawcore setting
+    the user agent on the session itself.
+    """
+    key = (user_agent, *sorted(options.items()))
+    with _shared_sessions_lock:
+        session = _shared_sessions.get(key)
+        if session is None:
+            session = _shared_sessions[key] = PooledSession(**options)
+        return session
@@ -0,0 +1,47 @@
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl
+    fcntl = None
+
+
+class JsonStore:
+    """JSON object saved to a local file, shared between CLI runs.
+
+    Reads and writes hold an exclusive lock on a companion ``.lock`` file, so
+    concurrent processes never see a partially written store.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self):
+        try:
+            with open(self.path) as store:
+                return json.load(store)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write(self, data):
+        temporary = f"{self.path}.tmp"
+        descriptor = os.open(
+            temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600
+        )
+        with os.fdopen(descriptor, "w") as store:
+            json.dump(data, store)
+        os.replace(temporary, self.path)
@@ -0,0 +1,325 @@
+import math
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .praw_internals import private_attribute
+from .timings import request_span
+
+# Prefix of the name of every exported metric
+NAMESPACE = "reddit_topics"
+
+# Upper bounds, in seconds, of the buckets of request durations
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def format_value(value):
+    """Return a sample value the way OpenMetrics writes numbers."""
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(labels):
+    """Return the ``{name="value",...}`` part of a sample, escaped."""
+    if not labels:
+        return ""
+    escaped = (
+        (
+            name,
+            str(value)
+            .replace("\\", "\\\\")
+            .replace('"', '\\"')
+            .replace("\n", "\\n"),
+        )
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, description, lock):
+        self.name = f"{NAMESPACE}_{name}"
+        self.description = description
+        self._lock = lock
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(sorted(labels.items()))
+
+    def render(self):
+        """Yield the lines of the metric family, in OpenMetrics text format."""
+        yield f"# TYPE {self.name} {self.type}"
+        yield f"# HELP {self.name} {self.description}"
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in values.items():
+            yield from self._samples(labels, value)
+
+
+class Counter(_Metric):
+    """A count that only goes up, such as requests sent."""
+
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        """Add ``amount`` to the count of these labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Return the count of these labels."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self, labels, value):
+        yield f"{self.name}_total{format_labels(labels)} {format_value(value)}"
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, such as the rate limit budget left."""
+
+    type = "gauge"
+
+    def set(self, value, **labels):
+        """Set the value of these labels."""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels):
+        """Return the value of these labels, or None if never set."""
+        with self._lock:
+            return self._values.get(self._key(labels))
+
+    def _samples(self, labels, value):
+        yield f"{self.name}{format_labels(labels)} {format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Observations, such as request durations, counted in cumulative buckets."""
+
+    type = "histogram"
+
+    def __init__(self, name, description, lock, buckets=DURATION_BUCKETS):
+        super().__init__(name, description, lock)
+        self.buckets = (*buckets, math.inf)
+
+    def observe(self, value, **labels):
+        """Count an observation in every bucket it falls in."""
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0))
+            counts = [
+                count + (value <= bound)
+                for count, bound in zip(counts, self.buckets, strict=True)
+            ]
+            self._values[key] = (counts, total + value)
+
+    def _samples(self, labels, value):
+        counts, total = value
+        for bound, count in zip(self.buckets, counts, strict=True):
+            bucket_labels = (*labels, ("le", format_value(bound)))
+            yield f"{self.name}_bucket{format_labels(bucket_labels)} {count}"
+        yield f"{self.name}_count{format_labels(labels)} {counts[-1]}"
+        yield f"{self.name}_sum{format_labels(labels)} {format_value(total)}"
+
+
+class Metrics:
+    """Counters of the requests, errors, bytes, cache lookups and rate limit of a run.
+
+    Requests are counted once ``attach``-ed to a praw client, by the
+    endpoint they fetch, as named by ``timings.request_span``. Metrics are
+    exported in the OpenMetrics text format, to a file or over HTTP.
+    ``NO_METRICS`` stands in when no metrics are wanted.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.requests = Counter(
+            "requests", "Requests sent to Reddit.", self._lock
+        )
+        self.errors = Counter(
+            "request_errors",
+            "Requests answered with an error status, or with none at all.",
+            self._lock,
+        )
+        self.bytes = Counter(
+            "response_bytes", "Bytes of response bodies received.", self._lock
+        )
+        self.durations = Histogram(
+            "request_duration_seconds",
+            "Time from sending a request to receiving its response.",
+            self._lock,
+        )
+        self.cache_hits = Counter(
+            "cache_hits", "Lookups served from the response cache.", self._lock
+        )
+        self.cache_misses = Counter(
+            "cache_misses",
+            "Lookups the response cache could not serve.",
+            self._lock,
+        )
+        self.rate_limit_remaining = Gauge(
+            "rate_limit_remaining",
+            "Requests Reddit last reported left in the rate limit window.",
+            self._lock,
+        )
+        self.rate_limit_reset = Gauge(
+            "rate_limit_reset_seconds",
+            "Seconds Reddit last reported until the rate limit window resets.",
+            self._lock,
+        )
+        self.rate_limit_wait = Counter(
+            "rate_limit_wait_seconds",
+            "Time workers spent waiting on the shared rate limiter.",
+            self._lock,
+        )
+
+    def families(self):
+        """Return every metric family, in the order exported."""
+        return [
+            self.requests,
+            self.errors,
+            self.bytes,
+            self.durations,
+            self.cache_hits,
+            self.cache_misses,
+            self.rate_limit_remaining,
+            self.rate_limit_reset,
+            self.rate_limit_wait,
+        ]
+
+    def observe_response(self, endpoint, response, duration):
+        """Count a response, or a request that got none when it is None."""
+        self.requests.inc(endpoint=endpoint)
+        self.durations.observe(duration, endpoint=endpoint)
+        if response is None:
+            self.errors.inc(endpoint=endpoint, status="none")
+            return
+        self.bytes.inc(len(response.content), endpoint=endpoint)
+        if response.status_code >= 400:
+            self.errors.inc(endpoint=endpoint, status=response.status_code)
+        headers = response.headers
+        if "x-ratelimit-remaining" in headers:
+            self.rate_limit_remaining.set(
+                float(headers["x-ratelimit-remaining"])
+            )
+            self.rate_limit_reset.set(float(headers["x-ratelimit-reset"]))
+
+    def observe_cache(self, kind, hit, count=1):
+        """Count lookups of the response cache."""
+        if count:
+            (self.cache_hits if hit else self.cache_misses).inc(
+                count, kind=kind
+            )
+
+    def observe_wait(self, seconds):
+        """Count the time spent waiting on the rate limiter."""
+        self.rate_limit_wait.inc(seconds)
+
+    def attach(self, reddit_client):
+        """Count every HTTP request of a praw client, and its response."""
+        requestor = private_attribute(reddit_client, "_core", "requestor")
+        request = private_attribute(requestor, "request")
+
+        def counted_request(method, url, *args, **kwargs):
+            endpoint = request_span(method, url)[0].replace(" ", "_")
+            start = self._clock()
+            response = None
+            try:
+                response = request(method, url, *args, **kwargs)
+                return response
+            finally:
+                self.observe_response(endpoint, response, self._clock() - start)
+
+        requestor.request = counted_request
+        return reddit_client
+
+    def render(self):
+        """Return every metric in the OpenMetrics text format."""
+        lines = [line for family in self.families() for line in family.render()]
+        return "\n".join([*lines, "# EOF"]) + "\n"
+
+    def write_textfile(self, path):
+        """Write every metric to ``path``, replacing it in one step.
+
+        A collector reading the file, such as the node exporter's textfile
+        collector, never sees it half written.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile(
+            "w", dir=directory, suffix=".tmp", delete=False
+        ) as file:
+            file.write(self.render())
+        os.replace(file.name, path)
+
+
+class _NoMetrics:
+    def observe_cache(self, kind, hit, count=1):
+        pass
+
+    def observe_wait(self, seconds):
+        pass
+
+    def attach(self, reddit_client):
+        return reddit_client
+
+
+# Stands in for ``Metrics`` when nothing is to be counted
+NO_METRICS = _NoMetrics()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes are too frequent to be worth logging
+        pass
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """Serve ``/metrics`` on a background thread, for long-running commands."""
+
+    daemon_threads = True
+
+    def __init__(self, metrics, host="127.0.0.1", port=0):
+        super().__init__((host, port), _MetricsHandler)
+        self.metrics = metrics
+        self._thread = None
+
+    @property
+    def url(self):
+        """Return the URL metrics are served on."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self):
+        """Serve on a background thread until ``stop`` is called."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the socket."""
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
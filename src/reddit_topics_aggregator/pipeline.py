@@ -0,0 +1,200 @@
+"""Streaming ``topics`` pipeline: fetch, normalize, render and write.
+
+Every stage is a generator, so the first records are written while later
+pages are still being downloaded. The fetch stage yields ``FLUSH`` whenever
+it is about to wait on the network, which is when buffered output is
+pushed to the terminal.
+"""
+
+import csv
+import io
+import json
+
+from .records import SUBMISSION_FIELDS, TopicRecord, submission_fields
+from .timings import NO_TIMINGS
+
+# Marker passed down the pipeline when buffered output should be written out
+FLUSH = object()
+
+# Buffered output is written out once it grows beyond this many characters
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+# Fields of every machine readable record, in column order
+OUTPUT_FIELDS = (
+    "id",
+    "subreddit",
+    "subreddit_title",
+    "listing",
+    "rank",
+    "score",
+    "num_comments",
+    "created_utc",
+    "url",
+    "permalink",
+    "title",
+    "selftext",
+    "crosspost_parent",
+    "appearances",
+)
+
+
+def normalize(entries, fields=SUBMISSION_FIELDS):
+    """Turn fetched ``ListedSubmission`` entries into ``TopicRecord`` objects.
+
+    Only the submission ``fields`` are kept, the others are left None, and
+    no reference to the fetched submission is held past its record.
+    """
+    for entry in entries:
+        if entry is FLUSH:
+            yield FLUSH
+            continue
+        yield TopicRecord(
+            entry.subreddit,
+            entry.subreddit_title,
+            entry.listing,
+            entry.rank,
+            **submission_fields(entry.submission, fields),
+        )
+
+
+def format_appearances(record):
+    """Describe where a deduplicated record appeared, e.g. ``hot #1, top #3``."""
+    return ", ".join(
+        f"{listing} #{rank}"
+        if subreddit == record.subreddit
+        else f"{listing} #{rank} (r/{subreddit})"
+        for subreddit, listing, rank in record.appearances
+    )
+
+
+def render_text(records):
+    """Render every record as the human readable ``=====`` block."""
+    for record in records:
+        if record is FLUSH:
+            yield FLUSH
+            continue
+        listings = ""
+        if record.appearances:
+            listings = f"Listings: {format_appearances(record)}\n"
+        yield (
+            f"{'=' * 50}\n"
+            f"Subreddit: r/{record.subreddit} ({record.subreddit_title})\n"
+            f"Topic: {record.title}\n"
+            f"Topic URL: {record.url}\n"
+            f"{listings}"
+            f"Content: {record.selftext}\n\n"
+        )
+
+
+def output_row(record):
+    """Return the ``OUTPUT_FIELDS`` of a record as a serializable dict."""
+    row = {name: getattr(record, name) for name in OUTPUT_FIELDS}
+    row["appearances"] = [
+        {"subreddit": subreddit, "listing": listing, "rank": rank}
+        for subreddit, listing, rank in record.appearances
+    ]
+    return row
+
+
+def render_jsonl(records):
+    """Render every record as one line of JSON."""
+    for record in records:
+        if record is FLUSH:
+            yield FLUSH
+            continue
+        yield json.dumps(output_row(record), ensure_ascii=False) + "\n"
+
+
+def render_csv(records):
+    """Render a header, then every record as one CSV row."""
+    line = io.StringIO()
+    writer = csv.writer(line)
+
+    def render_row(values):
+        writer.writerow(values)
+        text = line.getvalue()
+        line.seek(0)
+        line.truncate()
+        return text
+
+    yield render_row(OUTPUT_FIELDS)
+    for record in records:
+        if record is FLUSH:
+            yield FLUSH
+            continue
+        row = output_row(record)
+        row["appearances"] = format_appearances(record)
+        yield render_row(row.values())
+
+
+def render_msgpack(records):
+    """Render every record as a MessagePack map, one after the other."""
+    try:
+        import msgpack
+    except ImportError as e:
+        raise ValueError(
+            "The msgpack format requires msgpack, install it with: "
+            "pip install reddit-topics-aggregator[msgpack]"
+        ) from e
+
+    packer = msgpack.Packer()
+    for record in records:
+        if record is FLUSH:
+            yield FLUSH
+            continue
+        yield packer.pack(output_row(record))
+
+
+# Renderers of ``topics --format``
+RENDERERS = {
+    "text": render_text,
+    "jsonl": render_jsonl,
+    "csv": render_csv,
+    "msgpack": render_msgpack,
+}
+
+# Formats that are written as bytes rather than text
+BINARY_FORMATS = ("msgpack",)
+
+
+class BufferedOutput:
+    """Collect rendered chunks and write them to ``stream`` in large writes.
+
+    Chunks are either all text or all bytes, matching the stream. Every
+    write to the stream is timed into ``timings``.
+    """
+
+    def __init__(self, stream, buffer_size=DEFAULT_BUFFER_SIZE, timings=None):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.timings = timings or NO_TIMINGS
+        self._chunks = []
+        self._size = 0
+
+    def write(self, chunk):
+        """Buffer a chunk, writing the buffer out once it is full."""
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write out everything buffered so far in a single write."""
+        with self.timings.span("output"):
+            if self._chunks:
+                self.stream.write(self._chunks[0][:0].join(self._chunks))
+                self._chunks.clear()
+                self._size = 0
+            self.stream.flush()
+
+
+def write_output(chunks, output):
+    """Write every rendered chunk to a ``BufferedOutput``, flushing on ``FLUSH``."""
+    try:
+        for chunk in chunks:
+            if chunk is FLUSH:
+                output.flush()
+            else:
+                output.write(chunk)
+    finally:
+        output.flush()
@@ -0,0 +1,179 @@
+import html
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from itertools import groupby, islice
+
+from .pipeline import FLUSH
+
+# Text fields of a record the post-processors rewrite
+TEXT_FIELDS = ("title", "selftext")
+
+# Records sent to a worker process at once, big enough to be worth the trip
+DEFAULT_BATCH_SIZE = 256
+
+_MARKDOWN_PATTERNS = (
+    # Fenced code block delimiters, the code itself is kept
+    (re.compile(r"^\s*(```|~~~).*$", re.MULTILINE), ""),
+    # Images and links keep their text, reference definitions go
+    (re.compile(r"!?\[([^\]]*)\]\([^)]*\)"), r"\1"),
+    (re.compile(r"^\s*\[[^\]]+\]:\s*\S+.*$", re.MULTILINE), ""),
+    # Headings, quotes and list markers at the start of a line
+    (re.compile(r"^\s{0,3}(#{1,6}|>+|[-*+]|\d+[.)])\s+", re.MULTILINE), ""),
+    # Emphasis, strike-through and inline code markers, and spoilers
+    (re.compile(r"(\*\*|__|~~|\*|`)(?=\S)(.+?)(?<=\S)\1"), r"\2"),
+    (re.compile(r"(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)"), r"\1"),
+    (re.compile(r">!(.+?)!<"), r"\1"),
+)
+
+_HTML_TAG = re.compile(r"<[^>]*>")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def strip_markdown(text):
+    """Return the text of Reddit flavored markdown, without its markup."""
+    # Reddit escapes &, < and > in the markdown it returns
+    text = html.unescape(text)
+    for pattern, replacement in _MARKDOWN_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def strip_html(text):
+    """Return the text of HTML, without its tags and with entities decoded."""
+    return html.unescape(_HTML_TAG.sub(" ", text))
+
+
+def normalize_whitespace(text):
+    """Return the text with every run of whitespace turned into a single space."""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+# Post-processors of ``topics --postprocess``, run in the order given
+POSTPROCESSORS = {
+    "strip_markdown": strip_markdown,
+    "strip_html": strip_html,
+    "normalize_whitespace": normalize_whitespace,
+}
+
+
+def check_postprocessors(names):
+    """Return the names of post-processors, in order.
+
+    Raises:
+        ValueError: if a name is not one of ``POSTPROCESSORS``.
+    """
+    unknown = [name for name in names if name not in POSTPROCESSORS]
+    if unknown:
+        raise ValueError(
+            f"Unknown post-processors: {', '.join(unknown)},"
+            f" must be some of: {', '.join(POSTPROCESSORS)}"
+        )
+    return tuple(names)
+
+
+def process_texts(names, texts):
+    """Run the named post-processors over the text fields of a batch of records.
+
+    Runs in the worker processes, which only get the names of the
+    post-processors and tuples of text, the cheapest things to pickle.
+    """
+    processors = [POSTPROCESSORS[name] for name in names]
+    processed = []
+    for fields in texts:
+        values = []
+        for value in fields:
+            if value is not None:
+                for processor in processors:
+                    value = processor(value)
+            values.append(value)
+        processed.append(tuple(values))
+    return processed
+
+
+class PostProcessor:
+    """Rewrite the text of records as they stream by, on worker processes.
+
+    Records are sent to ``workers`` processes, one per CPU by default, in
+    batches of ``batch_size``, as tuples of their text fields, so that CPU
+    heavy text work runs on every core while threads keep fetching. Records
+    come out in the order they came in. With a single worker, records are
+    processed in the calling process.
+    """
+
+    def __init__(self, names, workers=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.names = check_postprocessors(names)
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+
+    def process(self, records):
+        """Yield every record with its text post-processed, ``FLUSH`` where it came."""
+        if not self.names:
+            return records
+        if self.workers == 1:
+            return self._process_inline(records)
+        return self._process_in_pool(records)
+
+    def _process_inline(self, records):
+        for record in records:
+            if record is FLUSH:
+                yield FLUSH
+                continue
+            yield from _replaced_texts(
+                [record], process_texts(self.names, [_texts(record)])
+            )
+
+    def _process_in_pool(self, records):
+        # Workers are spawned rather than forked, fetching threads may be
+        # holding locks a forked child would inherit
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(self.workers, mp_context=context) as executor:
+            # Batches in flight, and FLUSH markers, in the order they came
+            pending = deque()
+            for batch in self._batches(records):
+                pending.append(
+                    FLUSH if batch is FLUSH else self._submit(executor, batch)
+                )
+                # Only keep enough batches in flight to keep every worker busy
+                yield from _collect(pending, 2 * self.workers)
+            yield from _collect(pending, 0)
+
+    def _batches(self, records):
+        # FLUSH markers end the batch before them, so that they come out in place
+        for is_flush, group in groupby(records, lambda record: record is FLUSH):
+            if is_flush:
+                yield from group
+                continue
+            while batch := list(islice(group, self.batch_size)):
+                yield batch
+
+    def _submit(self, executor, batch):
+        texts = [_texts(record) for record in batch]
+        return batch, executor.submit(process_texts, self.names, texts)
+
+
+def _texts(record):
+    return tuple(getattr(record, name) for name in TEXT_FIELDS)
+
+
+def _replaced_texts(batch, processed):
+    for record, values in zip(batch, processed, strict=True):
+        yield replace(record, **dict(zip(TEXT_FIELDS, values, strict=True)))
+
+
+def _collect(pending, in_flight):
+    """Yield the results at the head of ``pending`` that are done, or over ``in_flight``."""
+    while pending:
+        head = pending[0]
+        if head is FLUSH:
+            pending.popleft()
+            yield FLUSH
+            continue
+        batch, future = head
+        if len(pending) <= in_flight and not future.done():
+            return
+        pending.popleft()
+        yield from _replaced_texts(batch, future.result())
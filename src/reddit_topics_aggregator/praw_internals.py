@@ -0,0 +1,42 @@
+from importlib.metadata import PackageNotFoundError, version
+
+# Major versions whose private attributes the rate limiter and the token
+# store rely on, kept in step with the bounds in pyproject.toml
+SUPPORTED_CORE_VERSIONS = {"prawcore": 4, "asyncprawcore": 4}
+
+
+def unsupported(detail):
+    """Return the error raised when praw internals are not what is expected."""
+    supported = ", ".join(
+        f"{package} {major}.x"
+        for package, major in SUPPORTED_CORE_VERSIONS.items()
+    )
+    return ValueError(
+        f"Unsupported praw version ({detail}), this version of "
+        f"reddit-topics-aggregator requires {supported}"
+    )
+
+
+def private_attribute(obj, *names):
+    """Follow a chain of private praw attributes, failing clearly if one moved."""
+    for name in names:
+        try:
+            obj = getattr(obj, name)
+        except AttributeError as e:
+            raise unsupported(
+                f"{type(obj).__name__} has no attribute {name!r}"
+            ) from e
+    return obj
+
+
+def check_core_version(obj):
+    """Raise ValueError unless ``obj`` comes from a supported prawcore."""
+    package = type(obj).__module__.partition(".")[0]
+    try:
+        installed = version(package)
+    except PackageNotFoundError:
+        installed = None
+    major = SUPPORTED_CORE_VERSIONS.get(package)
+    if installed is None or major != int(installed.split(".")[0]):
+        raise unsupported(f"{package} {installed or 'unknown'}")
+    return obj
@@ -0,0 +1,63 @@
+import heapq
+import time
+
+from .pipeline import FLUSH
+
+# Values accepted by ``topics --sort-by``
+SORT_SCORE = "score"
+SORT_COMMENTS = "comments"
+SORT_VELOCITY = "velocity"
+SORT_KEYS = (SORT_SCORE, SORT_COMMENTS, SORT_VELOCITY)
+
+# Submissions younger than this are ranked as if they were this old, so
+# that a brand new post with a single vote does not top the velocity ranking
+MIN_VELOCITY_AGE = 15 * 60
+
+
+def sort_key(sort_by, now):
+    """Return the function ranking a record by ``sort_by``, higher first."""
+    if sort_by == SORT_SCORE:
+        return lambda record: record.score or 0
+    if sort_by == SORT_COMMENTS:
+        return lambda record: record.num_comments or 0
+    if sort_by == SORT_VELOCITY:
+
+        def velocity(record):
+            created_utc = record.created_utc or now
+            age = max(now - created_utc, MIN_VELOCITY_AGE)
+            # Score gained per hour since the submission was posted
+            return (record.score or 0) * 3600 / age
+
+        return velocity
+    raise ValueError(f"Unknown sort key: {sort_by}")
+
+
+def ranked(records, sort_by=SORT_SCORE, clock=time.time):
+    """Return every record, highest ranking first, ties in the order they came."""
+    return sorted(
+        (record for record in records if record is not FLUSH),
+        key=sort_key(sort_by, clock()),
+        reverse=True,
+    )
+
+
+class GlobalTop:
+    """Keep the highest ranking records of a stream in a fixed-size heap.
+
+    Memory stays proportional to ``size`` however many records stream
+    through. Records ranking the same keep the order they came in.
+    """
+
+    def __init__(self, size, sort_by=SORT_SCORE, clock=time.time):
+        self.size = size
+        self.sort_by = sort_by
+        self._clock = clock
+
+    def top(self, records):
+        """Yield the ``size`` highest ranking records, highest first, once the stream ends."""
+        # nlargest only ever holds ``size`` records, in a heap
+        yield from heapq.nlargest(
+            self.size,
+            (record for record in records if record is not FLUSH),
+            key=sort_key(self.sort_by, self._clock()),
+        )
@@ -0,0 +1,196 @@
+import asyncio
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+from .praw_internals import private_attribute
+from .timings import request_span
+
+# Reddit allows OAuth clients 100 queries per minute, averaged over time
+DEFAULT_REQUESTS_PER_MINUTE = 100
+
+# Requests that may go out back to back before pacing kicks in
+DEFAULT_BURST = 10
+
+
+@dataclass(frozen=True)
+class RateLimitState:
+    """Snapshot of the rate limiter, and of the budget Reddit last reported."""
+
+    requests: int
+    waited: float
+    rate: float
+    tokens: float
+    remaining: float = None
+    lowest_remaining: float = None
+    used: int = None
+    reset_in: float = None
+
+    def describe(self):
+        """Return a one-line, human readable summary of the state."""
+        summary = (
+            f"{self.requests} requests, {self.waited:.1f}s spent waiting,"
+            f" paced at {self.rate * 60:.0f} requests per minute"
+        )
+        if self.remaining is None:
+            return summary
+        return (
+            f"{summary}, Reddit reports {self.remaining:.0f} remaining"
+            f" (lowest {self.lowest_remaining:.0f}) and {self.used} used,"
+            f" resetting in {self.reset_in:.0f}s"
+        )
+
+
+class RateLimiter:
+    """Request scheduler shared by every worker that sends requests to Reddit.
+
+    Requests are paid for from a token bucket refilled at an even pace. Once
+    Reddit reports its rate limit headers, the pace is adjusted so that the
+    remaining budget is spread evenly until the window resets, instead of
+    being spent in a burst that praw then has to sleep off.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+        burst=DEFAULT_BURST,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        if requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive")
+        self.max_rate = self.rate = requests_per_minute / 60.0
+        self.capacity = float(burst or requests_per_minute)
+        self.tokens = self.capacity
+        self.requests = 0
+        self.waited = 0.0
+        self.remaining = None
+        self.lowest_remaining = None
+        self.used = None
+        self.reset_at = None
+        self._blocked_until = None
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        elapsed = now - self._updated
+        self._updated = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        return now
+
+    def _reserve(self, tokens):
+        """Take tokens from the bucket and return how long to wait for them."""
+        with self._lock:
+            now = self._refill()
+            self.tokens -= tokens
+            self.requests += tokens
+            wait = max(0.0, -self.tokens / self.rate)
+            if self._blocked_until is not None:
+                wait = max(wait, self._blocked_until - now)
+            self.waited += wait
+            return wait
+
+    def acquire(self, tokens=1):
+        """Block until the bucket can pay for ``tokens`` requests."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens=1):
+        """Wait, without blocking the event loop, until ``tokens`` are paid for."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def observe(self, headers):
+        """Adjust the pace to the ``x-ratelimit-*`` headers of a response."""
+        if "x-ratelimit-remaining" not in headers:
+            return
+        remaining = float(headers["x-ratelimit-remaining"])
+        reset_in = float(headers["x-ratelimit-reset"])
+        with self._lock:
+            now = self._refill()
+            self.remaining = remaining
+            self.used = int(headers["x-ratelimit-used"])
+            self.reset_at = now + reset_in
+            if (
+                self.lowest_remaining is None
+                or remaining < self.lowest_remaining
+            ):
+                self.lowest_remaining = remaining
+            if remaining < 1:
+                # Nothing left in this window, hold every request until it resets
+                self._blocked_until = self.reset_at
+                self.tokens = min(self.tokens, 0.0)
+                return
+            self._blocked_until = None
+            self.rate = min(self.max_rate, remaining / max(reset_in, 1.0))
+            self.tokens = min(self.tokens, remaining)
+
+    def attach(self, reddit_client):
+        """Observe the rate limit headers of every response of a praw or asyncpraw client."""
+        core_rate_limiter = private_attribute(
+            reddit_client, "_core", "_rate_limiter"
+        )
+        update = private_attribute(core_rate_limiter, "update")
+
+        def update_and_observe(*, response_headers):
+            update(response_headers=response_headers)
+            self.observe(response_headers)
+
+        core_rate_limiter.update = update_and_observe
+        return reddit_client
+
+    def pace(self, reddit_client):
+        """Pay for every request of a praw client right before it is sent.
+
+        Token requests are left out, Reddit not counting them against the
+        rate limit.
+        """
+        requestor = private_attribute(reddit_client, "_core", "requestor")
+        request = private_attribute(requestor, "request")
+
+        def paced_request(method, url, *args, **kwargs):
+            if request_span(method, url)[0] != "auth":
+                self.acquire()
+            return request(method, url, *args, **kwargs)
+
+        requestor.request = paced_request
+        return reddit_client
+
+    def headroom(self):
+        """Return how many requests could be sent right away, negative once behind.
+
+        The bucket is capped by the budget Reddit last reported remaining,
+        and is empty, without end, while holding requests until a reset.
+        """
+        with self._lock:
+            now = self._refill()
+            if self._blocked_until is not None and now < self._blocked_until:
+                return -math.inf
+            if self.remaining is None:
+                return self.tokens
+            return min(self.tokens, self.remaining)
+
+    def state(self):
+        """Return a snapshot of the limiter and of Reddit's reported budget."""
+        with self._lock:
+            now = self._refill()
+            return RateLimitState(
+                requests=self.requests,
+                waited=self.waited,
+                rate=self.rate,
+                tokens=self.tokens,
+                remaining=self.remaining,
+                lowest_remaining=self.lowest_remaining,
+                used=self.used,
+                reset_in=None
+                if self.reset_at is None
+                else max(0.0, self.reset_at - now),
+            )
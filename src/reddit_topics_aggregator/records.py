@@ -0,0 +1,110 @@
+from dataclasses import dataclass, replace
+
+# Submission attributes kept once a submission has been fetched
+SUBMISSION_FIELDS = (
+    "id",
+    "title",
+    "url",
+    "selftext",
+    "score",
+    "num_comments",
+    "created_utc",
+    "permalink",
+    "crosspost_parent",
+)
+
+
+def submission_fields(submission, fields=SUBMISSION_FIELDS):
+    """Return the kept fields of a submission as a JSON serializable dict."""
+    # Read the instance dict so praw does not lazily fetch missing fields
+    data = vars(submission)
+    return {name: data.get(name) for name in fields}
+
+
+def project_fields(names):
+    """Return the ``SUBMISSION_FIELDS`` to keep of ``names``, always with the id.
+
+    Raises:
+        ValueError: if a name is not one of ``SUBMISSION_FIELDS``.
+    """
+    unknown = set(names) - set(SUBMISSION_FIELDS)
+    if unknown:
+        raise ValueError(
+            f"Unknown submission fields: {', '.join(sorted(unknown))},"
+            f" must be some of: {', '.join(SUBMISSION_FIELDS)}"
+        )
+    # Records are told apart, and merged, by their id
+    return tuple(
+        name for name in SUBMISSION_FIELDS if name == "id" or name in names
+    )
+
+
+# Subreddit attributes kept once a subreddit's ``about`` page has been fetched
+SUBREDDIT_FIELDS = (
+    "display_name",
+    "title",
+    "subscribers",
+    "over18",
+    "created_utc",
+)
+
+
+def subreddit_fields(subreddit):
+    """Return the kept fields of a fetched subreddit as a JSON serializable dict."""
+    data = vars(subreddit)
+    return {name: data.get(name) for name in SUBREDDIT_FIELDS}
+
+
+def submission_subreddit(submission):
+    """Return the display name of the subreddit a submission was posted to."""
+    # praw keeps the subreddit as a ``Subreddit`` whose str is its display name
+    return str(vars(submission).get("subreddit"))
+
+
+@dataclass(frozen=True, slots=True)
+class TopicRecord:
+    """A submission normalized for rendering, with where it was listed.
+
+    Records are immutable and slotted, and only hold the fields projected
+    out of a submission, so that the praw object, its raw JSON and its
+    reference to the client can be released as soon as it is normalized.
+    """
+
+    subreddit: str
+    subreddit_title: str
+    listing: str
+    rank: int
+    id: str = None
+    title: str = None
+    url: str = None
+    selftext: str = None
+    score: int = None
+    num_comments: int = None
+    created_utc: float = None
+    permalink: str = None
+    crosspost_parent: str = None
+    # ``(subreddit, listing, rank)`` of every appearance, once deduplicated
+    appearances: tuple = ()
+
+    def with_appearances(self, *appearances):
+        """Return a copy of the record with more ``(subreddit, listing, rank)`` appearances."""
+        return replace(self, appearances=self.appearances + appearances)
+
+    @property
+    def listings(self):
+        """Return the listings the submission appeared in, in the order seen."""
+        return [listing for _, listing, _ in self.appearances]
+
+    @property
+    def ranks(self):
+        """Return the 1-based rank of the submission in every listing of its subreddit."""
+        return {
+            listing: rank
+            for subreddit, listing, rank in self.appearances
+            if subreddit == self.subreddit
+        }
+
+    @property
+    def subreddits(self):
+        """Return every subreddit the submission, or a crosspost of it, appeared in."""
+        return list(dict.fromkeys(name for name, _, _ in self.appearances))
@@ -1,8 +1,65 @@
+import copy
+import itertools
+import json
 import os
-
-from praw import Reddit
+import threading
 
 from .package_metadata import __title__, __version__
+from .token_store import TokenStore, script_authorizer, token_key
+
+# Fields of a credential set, in credentials files and numbered variables
+CREDENTIAL_FIELDS = ("client_id", "client_secret", "username", "password")
+
+
+def checked_credentials(credentials, source):
+    """Return a credential set, raising ValueError if any field is missing."""
+    # Anything but an object of the fields misses every one of them
+    fields = credentials if isinstance(credentials, dict) else {}
+    missing = [field for field in CREDENTIAL_FIELDS if not fields.get(field)]
+    if missing:
+        raise ValueError(f"{source} is missing: {', '.join(missing)}")
+    return {field: str(credentials[field]) for field in CREDENTIAL_FIELDS}
+
+
+def load_credentials(path):
+    """Return the credential sets listed in a JSON file."""
+    try:
+        with open(os.path.expanduser(path)) as file:
+            listed = json.load(file)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"Cannot read credentials file {path}: {e}") from e
+    if not isinstance(listed, list) or not listed:
+        raise ValueError(
+            f"Credentials file {path} must hold a list of credential sets"
+        )
+    return [
+        checked_credentials(credentials, f"Credential set {number} of {path}")
+        for number, credentials in enumerate(listed, start=1)
+    ]
+
+
+def credentials_from_env(environ=os.environ):
+    """Return the credential sets of numbered variables, ``REDDIT_CLIENT_ID_1`` and on."""
+    sets = []
+    for number in itertools.count(1):
+        credentials = {
+            field: environ.get(f"REDDIT_{field.upper()}_{number}")
+            for field in CREDENTIAL_FIELDS
+        }
+        if not any(credentials.values()):
+            return sets
+        sets.append(
+            checked_credentials(
+                credentials, f"Credential set {number} of the environment"
+            )
+        )
+
+
+def credential_sets(credentials_file=None):
+    """Return the credential sets of a file, else of the environment, if any."""
+    if credentials_file:
+        return load_credentials(credentials_file)
+    return credentials_from_env()
 
 
 class RedditClientBuilder:
@@ -15,6 +72,19 @@ class RedditClientBuilder:
         self.client_secret = os.getenv("REDDIT_CLIENT_SECRET")
         self.username = os.getenv("REDDIT_USERNAME")
         self.password = os.getenv("REDDIT_PASSWORD")
+        self.token_cache = os.getenv("REDDIT_TOKEN_CACHE")
+        self.base_url = os.getenv("REDDIT_BASE_URL")
+        self.session = None
+        # Options of the shared HTTP session, unset ones keep their default
+        self.session_options = {}
+        if os.getenv("REDDIT_HTTP_POOL_SIZE"):
+            self.session_options["pool_size"] = int(
+                os.getenv("REDDIT_HTTP_POOL_SIZE")
+            )
+        if os.getenv("REDDIT_HTTP_TIMEOUT"):
+            self.session_options["read_timeout"] = float(
+                os.getenv("REDDIT_HTTP_TIMEOUT")
+            )
 
     def set_client_id(self, client_id):
         """Set client ID from method argument or environment variable."""
@@ -41,9 +111,67 @@ class RedditClientBuilder:
         self.user_agent = user_agent
         return self
 
-    def build(self):
-        """Build the praw.Reddit instance. Raise exception if any required argument is missing."""
-        # Raise exception if required fields are not set
+    def set_token_cache(self, token_cache):
+        """Set the file access tokens are reused from between runs."""
+        self.token_cache = token_cache
+        return self
+
+    def set_base_url(self, base_url):
+        """Send every request to another server than Reddit, such as a fake one."""
+        self.base_url = base_url
+        return self
+
+    def set_session(self, session):
+        """Send requests through this session instead of the shared one."""
+        self.session = session
+        return self
+
+    def set_session_options(self, **options):
+        """Set the pool size, timeouts, keep-alive or gzip of the shared session."""
+        self.session_options.update(options)
+        return self
+
+    def for_credentials(self, credentials):
+        """Return a copy of this builder authenticating with another credential set."""
+        builder = copy.copy(self)
+        builder.session_options = dict(self.session_options)
+        return (
+            builder.set_client_id(credentials["client_id"])
+            .set_client_secret(credentials["client_secret"])
+            .set_username(credentials["username"])
+            .set_password(credentials["password"])
+        )
+
+    def build_pool(self, credentials, **pool_options):
+        """Build a ``ClientPool`` of a client per credential set, sharing everything else of this builder."""
+        # Imported here, the pool module builds on this one
+        from .client_pool import ClientPool
+
+        return ClientPool(
+            [self.for_credentials(entry) for entry in credentials],
+            **pool_options,
+        )
+
+    def http_session(self):
+        """Return the session set, or the one shared by every client of the process."""
+        # Imported here, requests is slow to import and only needed to connect
+        from .http_session import shared_session
+
+        return self.session or shared_session(
+            self.user_agent, **self.session_options
+        )
+
+    def attach_token_cache(self, reddit_client):
+        """Reuse a cached access token, if a token cache is set, and save new ones."""
+        if self.token_cache:
+            TokenStore(self.token_cache).attach(
+                script_authorizer(reddit_client),
+                token_key(self.client_id, self.username, self.base_url),
+            )
+        return reddit_client
+
+    def validate(self):
+        """Raise exception if any required argument is missing."""
         missing_fields = []
         if not self.client_id:
             missing_fields.append("client_id")
@@ -58,24 +186,61 @@ class RedditClientBuilder:
             raise ValueError(
                 f"Missing required fields: {', '.join(missing_fields)}"
             )
+        return self
+
+    def client_kwargs(self):
+        """Return the keyword arguments shared by the sync and async clients."""
+        kwargs = {
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "username": self.username,
+            "password": self.password,
+            "user_agent": self.user_agent,
+        }
+        if self.base_url:
+            # OAuth requests, and token requests, both go to the override
+            base_url = self.base_url.rstrip("/")
+            kwargs.update(oauth_url=base_url, reddit_url=base_url)
+        return kwargs
+
+    def build(self):
+        """Build the praw.Reddit instance. Raise exception if any required argument is missing."""
+        # Imported here, praw is slow to import and only needed to connect
+        from praw import Reddit
 
         # Create and return the Reddit client
-        return Reddit(
-            client_id=self.client_id,
-            client_secret=self.client_secret,
-            username=self.username,
-            password=self.password,
-            user_agent=self.user_agent,
+        return self.attach_token_cache(
+            Reddit(
+                **self.validate().client_kwargs(),
+                requestor_kwargs={"session": self.http_session()},
+            )
+        )
+
+    def build_async(self):
+        """Build an asyncpraw.Reddit instance. Must be called from a running event loop."""
+        try:
+            from asyncpraw import Reddit as AsyncReddit
+        except ImportError as e:
+            raise ValueError(
+                "The async engine requires asyncpraw, install it with: "
+                "pip install reddit-topics-aggregator[async]"
+            ) from e
+
+        return self.attach_token_cache(
+            AsyncReddit(**self.validate().client_kwargs())
         )
 
     @staticmethod
-    def build_reddit_client_from_args(
+    def from_args(
         client_id=None,
         client_secret=None,
         username=None,
         password=None,
         user_agent=None,
+        token_cache=None,
+        base_url=None,
     ):
+        """Create a builder, overriding the environment with any given argument."""
         builder = RedditClientBuilder()
 
         if client_id:
@@ -88,7 +253,54 @@ class RedditClientBuilder:
             builder.set_password(password)
         if user_agent:
             builder.set_user_agent(user_agent)
+        if token_cache:
+            builder.set_token_cache(token_cache)
+        if base_url:
+            builder.set_base_url(base_url)
+        return builder
+
+    @staticmethod
+    def build_reddit_client_from_args(
+        client_id=None,
+        client_secret=None,
+        username=None,
+        password=None,
+        user_agent=None,
+        token_cache=None,
+    ):
+        builder = RedditClientBuilder.from_args(
+            client_id,
+            client_secret,
+            username,
+            password,
+            user_agent,
+            token_cache,
+        )
 
-            # Build the Reddit client
+        # Build the Reddit client
         reddit_client = builder.build()
         return reddit_client
+
+
+class ThreadLocalReddit:
+    """Stand in for a praw client, giving every thread its own instance.
+
+    The authorizer of a praw client is not thread-safe, so worker threads
+    must not share a client. Their clients still share one pool of
+    connections, through the HTTP session of the builder. Attributes are
+    looked up on the client of the calling thread, built on first use.
+    """
+
+    def __init__(self, build_client):
+        self.build_client = build_client
+        self._local = threading.local()
+
+    def client(self):
+        """Return the client of the calling thread, building it on first use."""
+        reddit_client = getattr(self._local, "reddit_client", None)
+        if reddit_client is None:
+            reddit_client = self._local.reddit_client = self.build_client()
+        return reddit_client
+
+    def __getattr__(self, name):
+        return getattr(self.client(), name)
@@ -0,0 +1,200 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+
+from .records import SUBMISSION_FIELDS
+
+# Seconds a cached response stays fresh, per listing. ``top`` barely changes
+# while ``new`` and ``rising`` churn within minutes, and subreddit metadata
+# (``about``) hardly ever does.
+DEFAULT_TTLS = {
+    "hot": 300,
+    "new": 60,
+    "rising": 120,
+    "top": 3600,
+    "about": 7 * 86400,
+}
+
+# SQLite allows at most 999 parameters per statement
+MAX_QUERY_PARAMETERS = 900
+
+# Least recently used responses are evicted above this total size
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+CACHE_FILENAME = "responses.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    subreddit TEXT NOT NULL,
+    listing TEXT NOT NULL,
+    item_limit INTEGER NOT NULL,
+    time_filter TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    used_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (subreddit, listing, item_limit, time_filter)
+)
+"""
+
+
+class CachedSubmission(SimpleNamespace):
+    """A submission restored from the cache, with the kept fields only."""
+
+    def __init__(self, **fields):
+        super().__init__(**{**dict.fromkeys(SUBMISSION_FIELDS), **fields})
+
+
+class ResponseCache:
+    """SQLite backed cache of Reddit responses, shared between processes.
+
+    Responses are keyed by ``(subreddit, listing, limit, time filter)`` and
+    expire after the TTL of their listing. Once the cache grows beyond
+    ``max_bytes``, the least recently used responses are evicted.
+    """
+
+    def __init__(
+        self,
+        cache_dir,
+        ttls=None,
+        max_bytes=DEFAULT_MAX_BYTES,
+        clock=time.time,
+    ):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, CACHE_FILENAME)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Autocommit mode, transactions are opened explicitly where needed
+        self._connection = sqlite3.connect(
+            self.path,
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        # WAL lets readers in other processes proceed while one process writes
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(SCHEMA)
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, subreddit, listing, limit=0, time_filter=""):
+        """Return the cached response, or None when missing or expired."""
+        key = (subreddit.lower(), listing, limit, time_filter)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT fetched_at, body FROM responses WHERE subreddit = ?"
+                " AND listing = ? AND item_limit = ? AND time_filter = ?",
+                key,
+            ).fetchone()
+            if row is None:
+                return None
+            fetched_at, body = row
+            now = self._clock()
+            if now - fetched_at > self.ttls.get(listing, 0):
+                return None
+            self._connection.execute(
+                "UPDATE responses SET used_at = ? WHERE subreddit = ?"
+                " AND listing = ? AND item_limit = ? AND time_filter = ?",
+                (now, *key),
+            )
+        return json.loads(body)
+
+    def get_many(self, subreddits, listing, limit=0, time_filter=""):
+        """Return the fresh cached responses of many subreddits, keyed by lower case name."""
+        names = list(dict.fromkeys(name.lower() for name in subreddits))
+        responses = {}
+        now = self._clock()
+        with self._lock:
+            for start in range(0, len(names), MAX_QUERY_PARAMETERS):
+                chunk = names[start : start + MAX_QUERY_PARAMETERS]
+                rows = self._connection.execute(
+                    "SELECT subreddit, fetched_at, body FROM responses"
+                    f" WHERE subreddit IN ({', '.join('?' * len(chunk))})"
+                    " AND listing = ? AND item_limit = ? AND time_filter = ?",
+                    (*chunk, listing, limit, time_filter),
+                ).fetchall()
+                fresh = [
+                    (name, body)
+                    for name, fetched_at, body in rows
+                    if now - fetched_at <= self.ttls.get(listing, 0)
+                ]
+                self._connection.executemany(
+                    "UPDATE responses SET used_at = ? WHERE subreddit = ?"
+                    " AND listing = ? AND item_limit = ? AND time_filter = ?",
+                    [
+                        (now, name, listing, limit, time_filter)
+                        for name, _ in fresh
+                    ],
+                )
+                responses.update(
+                    (name, json.loads(body)) for name, body in fresh
+                )
+        return responses
+
+    def put(self, subreddit, listing, limit, response, time_filter=""):
+        """Save a JSON serializable response and evict the least recently used."""
+        body = json.dumps(response, separators=(",", ":"))
+        now = self._clock()
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO responses VALUES"
+                    " (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        subreddit.lower(),
+                        listing,
+                        limit,
+                        time_filter,
+                        now,
+                        now,
+                        len(body),
+                        body,
+                    ),
+                )
+                self._evict()
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def _evict(self):
+        (total,) = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self._connection.execute(
+            "SELECT rowid, size FROM responses ORDER BY used_at"
+        ).fetchall()
+        evicted = []
+        for rowid, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((rowid,))
+            total -= size
+        self._connection.executemany(
+            "DELETE FROM responses WHERE rowid = ?", evicted
+        )
+
+    def size(self):
+        """Return the total size, in bytes, of the cached responses."""
+        with self._lock:
+            (total,) = self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return total
@@ -0,0 +1,94 @@
+import hashlib
+import json
+
+from .records import TopicRecord
+
+_JUMP_MULTIPLIER = 2862933555777941757
+_UINT64 = (1 << 64) - 1
+
+
+def jump_hash(key, buckets):
+    """Return the bucket, out of ``buckets``, of a 64-bit key.
+
+    This is Lamping and Veach's jump consistent hash: going from n to n + 1
+    buckets only moves the keys that land in the new bucket, 1 / (n + 1) of
+    them, and needs no table shared between the processes hashing.
+    """
+    bucket, next_bucket = -1, 0
+    while next_bucket < buckets:
+        bucket = next_bucket
+        key = (key * _JUMP_MULTIPLIER + 1) & _UINT64
+        next_bucket = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_key(subreddit):
+    """Return the 64-bit key a subreddit is hashed by, the same on every machine."""
+    digest = hashlib.blake2b(subreddit.lower().encode(), digest_size=8)
+    return int.from_bytes(digest.digest(), "big")
+
+
+def parse_shard(value):
+    """Return the 1-based index and the count of a shard written ``i/N``.
+
+    Raises:
+        ValueError: if the shard is not two integers with 1 <= i <= N.
+    """
+    index, _, count = value.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"{value!r} is not a shard such as 1/4") from None
+    if not 1 <= index <= count:
+        raise ValueError(
+            f"Shard {value} must be between 1/{count} and {count}/{count}"
+        )
+    return index, count
+
+
+def shard_subreddits(subreddits, index, count):
+    """Return the subreddits assigned to the 1-based shard ``index`` of ``count``, in order."""
+    return [
+        name
+        for name in subreddits
+        if jump_hash(shard_key(name), count) == index - 1
+    ]
+
+
+def record_from_row(row):
+    """Return the ``TopicRecord`` a row of ``topics --format jsonl`` was rendered from."""
+    fields = {name: row.get(name) for name in TopicRecord.__dataclass_fields__}
+    fields["appearances"] = tuple(
+        (appearance["subreddit"], appearance["listing"], appearance["rank"])
+        for appearance in row.get("appearances") or ()
+    )
+    return TopicRecord(**fields)
+
+
+def read_records(lines, source):
+    """Yield the records of the JSON lines of a shard output."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = record_from_row(json.loads(line))
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(
+                f"Line {number} of {source} is not a topics record: {e}"
+            ) from e
+        yield record
+
+
+def merge_shards(shards):
+    """Yield the records of every ``(lines, source)`` shard output, once each.
+
+    A submission listed twice in the same listing of the same subreddit, by
+    overlapping shards or runs, is only kept the first time.
+    """
+    seen = set()
+    for lines, source in shards:
+        for record in read_records(lines, source):
+            key = (record.subreddit.lower(), record.listing, record.id)
+            if key not in seen:
+                seen.add(key)
+                yield record
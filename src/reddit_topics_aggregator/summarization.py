@@ -0,0 +1,216 @@
+import json
+import re
+from itertools import pairwise
+from typing import NamedTuple
+
+from .pipeline import FLUSH
+
+# Topics listed per subreddit, and across subreddits, by default
+DEFAULT_SUMMARY_SIZE = 10
+
+# Submission ids kept as the evidence of every topic
+SUPPORTING_SUBMISSIONS = 5
+
+# Scope of the topics ranked across every subreddit fetched
+ALL_SUBREDDITS = "all"
+
+# Words too common to say anything about a topic. Shorter words are
+# dropped anyway
+_STOP_WORDS = """
+about after again all also and any are because been before being between
+both but can could did does doing down during each few for from further get
+got had has have having her here hers him his how into its just more most
+nor not now off once only other our ours out over own same she should some
+such than that the their theirs them then there these they this those
+through too under until very was were what when where which while who whom
+why will with would you your yours amp http https www com reddit removed
+deleted
+"""
+STOP_WORDS = frozenset(_STOP_WORDS.split())
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#'-]*[a-z0-9+#]|[a-z]")
+
+
+class SummaryTopic(NamedTuple):
+    """A keyword or phrase ranked within a subreddit, or across all of them."""
+
+    scope: str
+    rank: int
+    topic: str
+    score: float
+    submissions: tuple
+
+
+def terms(text):
+    """Return the words and two-word phrases of a text that may name a topic."""
+    # Dropped words are kept as None so that phrases do not span them
+    words = [
+        word
+        if len(word) > 2 and word not in STOP_WORDS and not word.isdigit()
+        else None
+        for word in TOKEN_PATTERN.findall(text.lower())
+    ]
+    phrases = [
+        f"{first} {second}"
+        for first, second in pairwise(words)
+        if first and second
+    ]
+    return [word for word in words if word] + phrases
+
+
+def _import_numerics():
+    try:
+        import numpy
+        from scipy import sparse
+    except ImportError as e:
+        raise ValueError(
+            "Summarizing requires numpy and scipy, install them with: "
+            "pip install reddit-topics-aggregator[summarize]"
+        ) from e
+    return numpy, sparse
+
+
+class TopicSummarizer:
+    """Rank the keywords and phrases of submissions by TF-IDF.
+
+    Every submission is a document made of its title and text. Term weights
+    are computed over a sparse document-term matrix, and summed per
+    subreddit and across all of them, so that the work stays in vectorized
+    numpy and scipy operations however many submissions there are.
+    """
+
+    def __init__(self, size=DEFAULT_SUMMARY_SIZE, min_submissions=2):
+        self.size = size
+        self.min_submissions = min_submissions
+
+    def summarize(self, records):
+        """Yield the top topics of every subreddit, then those across all of them."""
+        numpy, sparse = _import_numerics()
+        ids, subreddits, lengths, document_terms = self._documents(records)
+        if not ids:
+            return
+        # Mapping terms to columns and back stays in C loops
+        columns = dict.fromkeys(document_terms)
+        terms_by_column = list(columns)
+        columns.update(zip(terms_by_column, range(len(columns)), strict=True))
+        counts = sparse.csr_matrix(
+            (
+                numpy.ones(len(document_terms)),
+                (
+                    numpy.repeat(numpy.arange(len(ids)), lengths),
+                    numpy.fromiter(
+                        map(columns.__getitem__, document_terms),
+                        dtype=numpy.int64,
+                        count=len(document_terms),
+                    ),
+                ),
+            ),
+            shape=(len(ids), len(columns)),
+        )
+        weights = self._weights(numpy, sparse, counts)
+        names = list(dict.fromkeys(subreddits))
+        positions = {name: index for index, name in enumerate(names)}
+        scope_of = numpy.fromiter(
+            map(positions.__getitem__, subreddits), dtype=numpy.int64
+        )
+        # One row per subreddit summing the weights of its submissions, and
+        # a last one summing them all
+        membership = sparse.csr_matrix(
+            (numpy.ones(len(ids)), (scope_of, numpy.arange(len(ids)))),
+            shape=(len(names), len(ids)),
+        )
+        totals = sparse.vstack(
+            [membership @ weights, sparse.csr_matrix(weights.sum(axis=0))]
+        ).tocsr()
+        weights = weights.tocsc()
+        for index, name in enumerate([*names, ALL_SUBREDDITS]):
+            # Every submission belongs to the last scope
+            in_scope = scope_of == index if index < len(names) else None
+            for rank, (column, score) in enumerate(
+                self._top_columns(numpy, totals.getrow(index)), start=1
+            ):
+                yield SummaryTopic(
+                    name,
+                    rank,
+                    terms_by_column[column],
+                    round(score, 4),
+                    self._supporting(numpy, weights, column, in_scope, ids),
+                )
+
+    @staticmethod
+    def _documents(records):
+        ids, subreddits, lengths, document_terms = [], [], [], []
+        seen = set()
+        for record in records:
+            if record is FLUSH or (record.subreddit, record.id) in seen:
+                continue
+            # A submission listed more than once only counts once
+            seen.add((record.subreddit, record.id))
+            found = terms(f"{record.title or ''}\n{record.selftext or ''}")
+            document_terms.extend(found)
+            lengths.append(len(found))
+            ids.append(record.id)
+            subreddits.append(record.subreddit)
+        return ids, subreddits, lengths, document_terms
+
+    def _weights(self, numpy, sparse, matrix):
+        # Duplicate entries of the same term were summed into counts
+        matrix.data = 1 + numpy.log(matrix.data)
+        counts = numpy.bincount(matrix.indices, minlength=matrix.shape[1])
+        idf = numpy.log((1 + matrix.shape[0]) / (1 + counts)) + 1
+        # Terms found in a single submission are not a topic
+        idf[counts < self.min_submissions] = 0
+        weights = matrix @ sparse.diags(idf)
+        norms = numpy.sqrt(numpy.asarray(weights.multiply(weights).sum(axis=1)))
+        norms[norms == 0] = 1
+        weights = sparse.csr_matrix(sparse.diags(1 / norms.ravel()) @ weights)
+        weights.eliminate_zeros()
+        return weights
+
+    def _top_columns(self, numpy, totals):
+        order = numpy.argsort(-totals.data, kind="stable")[: self.size]
+        return [
+            (int(totals.indices[position]), float(totals.data[position]))
+            for position in order
+        ]
+
+    @staticmethod
+    def _supporting(numpy, columns, column, in_scope, ids):
+        start, end = columns.indptr[column], columns.indptr[column + 1]
+        rows = columns.indices[start:end]
+        data = columns.data[start:end]
+        if in_scope is not None:
+            rows, data = rows[in_scope[rows]], data[in_scope[rows]]
+        strongest = rows[numpy.argsort(-data, kind="stable")]
+        return tuple(ids[row] for row in strongest[:SUPPORTING_SUBMISSIONS])
+
+
+def render_summary_text(topics):
+    """Render the ranked topics of every scope as human readable blocks."""
+    scope = None
+    for topic in topics:
+        if topic.scope != scope:
+            scope = topic.scope
+            heading = (
+                "All subreddits" if scope == ALL_SUBREDDITS else f"r/{scope}"
+            )
+            yield f"{'=' * 50}\nTopics: {heading}\n"
+        yield (
+            f"{topic.rank:>3}. {topic.topic} ({topic.score:.2f})"
+            f" - {', '.join(topic.submissions)}\n"
+        )
+
+
+def render_summary_jsonl(topics):
+    """Render every ranked topic as one line of JSON."""
+    for topic in topics:
+        row = topic._asdict()
+        row["submissions"] = list(topic.submissions)
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+# Renderers of ``topics --summarize``, by ``--format``
+SUMMARY_RENDERERS = {
+    "text": render_summary_text,
+    "jsonl": render_summary_jsonl,
+}
@@ -0,0 +1,213 @@
+import json
+import math
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import NamedTuple
+from urllib.parse import parse_qs, urlsplit
+
+from .praw_internals import private_attribute
+
+# Percentiles of the span durations reported per span name
+PERCENTILES = (50, 95, 99)
+
+# Listings a request path may end with, as ``/r/{subreddit}/{listing}``
+_LISTING_PATHS = ("hot", "new", "rising", "top")
+
+
+class SpanSummary(NamedTuple):
+    """Count, total and percentiles of the durations of spans sharing a name."""
+
+    name: str
+    count: int
+    total: float
+    p50: float
+    p95: float
+    p99: float
+
+
+def percentile(durations, percent):
+    """Return the nearest-rank percentile of sorted durations."""
+    rank = math.ceil(percent / 100 * len(durations))
+    return durations[max(rank, 1) - 1]
+
+
+def request_span(method, url):
+    """Return the span name and arguments of a request sent to Reddit."""
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/")
+    segments = path.lstrip("/").split("/")
+    if segments[-1] == "access_token":
+        return "auth", {}
+    if segments[-1] == "about" or path.endswith("/api/info"):
+        return "about", {"path": path}
+    if segments[0] == "r" and segments[-1] in _LISTING_PATHS:
+        query = parse_qs(parts.query)
+        return "listing page", {
+            "subreddit": segments[1],
+            "listing": segments[-1],
+            "after": query.get("after", [None])[0],
+        }
+    return "request", {"method": method, "path": path}
+
+
+class Timings:
+    """Spans of the phases of a run, summarized and exported once it is done.
+
+    Spans are recorded around every request sent to Reddit, once attached to
+    a client, and around the phases that call ``span`` or ``iterate``, from
+    any thread. ``NO_TIMINGS`` stands in when timings are not wanted, at
+    close to no cost.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._started = clock()
+        self._spans = []
+        self._lock = threading.Lock()
+
+    def record(self, name, start, end, **args):
+        """Record a span that ran from ``start`` to ``end``, in clock seconds."""
+        span = (name, start, end - start, threading.get_ident(), args)
+        with self._lock:
+            self._spans.append(span)
+
+    def span(self, name, **args):
+        """Return a context manager recording a span for the time it is entered."""
+        return _Span(self, name, args)
+
+    def iterate(self, name, iterable, **args):
+        """Yield from ``iterable``, recording the time spent producing its items.
+
+        Time the consumer spends between items is left out, so that a
+        lazily fetched listing is not charged for rendering its submissions.
+        """
+        iterator = iter(iterable)
+        first, busy = None, 0.0
+        try:
+            while True:
+                start = self._clock()
+                first = start if first is None else first
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    busy += self._clock() - start
+                yield item
+        finally:
+            if first is not None:
+                self.record(name, first, first + busy, **args)
+
+    def attach(self, reddit_client):
+        """Record a span around every HTTP request of a praw client."""
+        requestor = private_attribute(reddit_client, "_core", "requestor")
+        request = private_attribute(requestor, "request")
+
+        def timed_request(method, url, *args, **kwargs):
+            name, span_args = request_span(method, url)
+            with self.span(name, **span_args):
+                return request(method, url, *args, **kwargs)
+
+        requestor.request = timed_request
+        return reddit_client
+
+    def summary(self):
+        """Return a ``SpanSummary`` per span name, in the order first recorded."""
+        with self._lock:
+            spans = list(self._spans)
+        durations = {}
+        for name, _, duration, _, _ in spans:
+            durations.setdefault(name, []).append(duration)
+        return [
+            SpanSummary(
+                name,
+                len(values),
+                sum(values),
+                *(
+                    percentile(sorted(values), percent)
+                    for percent in PERCENTILES
+                ),
+            )
+            for name, values in durations.items()
+        ]
+
+    def describe(self):
+        """Return the summary as a human readable table."""
+        lines = [
+            f"{'span':<16}{'count':>8}{'total':>10}"
+            + "".join(f"{f'p{percent}':>10}" for percent in PERCENTILES)
+        ]
+        for summary in self.summary():
+            lines.append(
+                f"{summary.name:<16}{summary.count:>8}{summary.total:>9.3f}s"
+                + "".join(f"{value:>9.3f}s" for value in summary[3:])
+            )
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """Return the spans as a Chrome trace, which trace viewers load."""
+        with self._lock:
+            spans = list(self._spans)
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": name,
+                    "ph": "X",
+                    # Trace times are in microseconds since the run started
+                    "ts": round((start - self._started) * 1e6),
+                    "dur": round(duration * 1e6),
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {
+                        key: value
+                        for key, value in args.items()
+                        if value is not None
+                    },
+                }
+                for name, start, duration, tid, args in spans
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def write_trace(self, path):
+        """Write the spans to a Chrome trace file."""
+        with open(path, "w") as file:
+            json.dump(self.chrome_trace(), file)
+
+
+class _Span:
+    __slots__ = ("args", "name", "start", "timings")
+
+    def __init__(self, timings, name, args):
+        self.timings = timings
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = self.timings._clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.record(
+            self.name, self.start, self.timings._clock(), **self.args
+        )
+
+
+class _NoTimings:
+    _span = nullcontext()
+
+    def span(self, name, **args):
+        return self._span
+
+    def iterate(self, name, iterable, **args):
+        return iterable
+
+    def attach(self, reddit_client):
+        return reddit_client
+
+
+# Stands in for ``Timings`` when nothing is to be recorded
+NO_TIMINGS = _NoTimings()
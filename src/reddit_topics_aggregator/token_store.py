@@ -0,0 +1,105 @@
+import hashlib
+import inspect
+import time
+
+from .json_store import JsonStore
+from .praw_internals import check_core_version, private_attribute
+
+# Tokens are refreshed this many seconds before Reddit expires them
+DEFAULT_REFRESH_MARGIN = 300
+
+
+def token_key(client_id, username, base_url=None):
+    """Return the key a token is stored under, without exposing credentials."""
+    identity = f"{client_id}\0{username}"
+    # Tokens of another server than Reddit are never sent to Reddit
+    if base_url:
+        identity += f"\0{base_url}"
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def script_authorizer(reddit_client):
+    """Return the prawcore authorizer of a praw or asyncpraw script client."""
+    # Tokens are restored through private attributes of this authorizer
+    return check_core_version(
+        private_attribute(reddit_client, "_authorized_core", "_authorizer")
+    )
+
+
+class TokenStore(JsonStore):
+    """OAuth access tokens saved to a local file, shared between CLI runs."""
+
+    def __init__(
+        self, path, refresh_margin=DEFAULT_REFRESH_MARGIN, clock=time.time
+    ):
+        super().__init__(path)
+        self.refresh_margin = refresh_margin
+        self._clock = clock
+
+    def load(self, key):
+        """Return the stored token, or None if missing or close to expiring."""
+        with self._locked():
+            token = self._read().get(key)
+        if token and token["expires_at"] - self.refresh_margin > self._clock():
+            return token
+        return None
+
+    def save(self, key, access_token, expires_at, scopes):
+        """Store a token and drop every token that has already expired."""
+        now = self._clock()
+        with self._locked():
+            tokens = {
+                stored_key: token
+                for stored_key, token in self._read().items()
+                if token["expires_at"] > now
+            }
+            tokens[key] = {
+                "access_token": access_token,
+                "expires_at": expires_at,
+                "scopes": sorted(scopes or []),
+            }
+            self._write(tokens)
+
+    def restore(self, authorizer, key):
+        """Hand a stored token to a prawcore authorizer. Return whether one was found."""
+        token = self.load(key)
+        if token is None:
+            return False
+        remaining = token["expires_at"] - self.refresh_margin - self._clock()
+        authorizer.access_token = token["access_token"]
+        authorizer.scopes = set(token["scopes"])
+        # prawcore tracks expiry on the monotonic clock
+        authorizer._expiration_timestamp_ns = time.monotonic_ns() + int(
+            remaining * 1e9
+        )
+        return True
+
+    def _save_from(self, authorizer, key):
+        expiration = private_attribute(authorizer, "_expiration_timestamp_ns")
+        remaining = (expiration - time.monotonic_ns()) / 1e9
+        self.save(
+            key,
+            authorizer.access_token,
+            self._clock() + remaining,
+            authorizer.scopes,
+        )
+
+    def attach(self, authorizer, key):
+        """Reuse a stored token and save every token the authorizer refreshes."""
+        self.restore(authorizer, key)
+        refresh = authorizer.refresh
+
+        if inspect.iscoroutinefunction(refresh):
+
+            async def refresh_and_save():
+                await refresh()
+                self._save_from(authorizer, key)
+
+        else:
+
+            def refresh_and_save():
+                refresh()
+                self._save_from(authorizer, key)
+
+        authorizer.refresh = refresh_and_save
+        return authorizer
@@ -0,0 +1,479 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from queue import Empty, SimpleQueue
+from typing import NamedTuple
+
+from .metrics import NO_METRICS
+from .pipeline import FLUSH
+from .records import (
+    submission_fields,
+    submission_subreddit,
+    subreddit_fields,
+)
+from .response_cache import CachedSubmission
+from .timings import NO_TIMINGS
+
+# Listings are fetched, and printed, in this order for every subreddit
+LISTINGS = ("hot", "new", "rising", "top")
+
+# Reddit returns at most this many submissions per listing request
+REDDIT_PAGE_SIZE = 100
+
+# Reddit looks up at most this many subreddits per ``/api/info`` request
+REDDIT_INFO_SIZE = 100
+
+# praw requests the top submissions of all time unless told otherwise
+DEFAULT_TIME_FILTERS = {"top": "all"}
+
+
+class ListedSubmission(NamedTuple):
+    """A fetched submission, with the subreddit and listing it was found in."""
+
+    subreddit: str
+    subreddit_title: str
+    listing: str
+    rank: int
+    submission: object
+
+
+@dataclass
+class SubredditTopics:
+    """Submissions fetched from the listings of a single subreddit."""
+
+    display_name: str
+    title: str
+    # Submissions of every fetched listing, in rank order, keyed by listing
+    listings: dict = field(default_factory=dict)
+
+    def entries(self):
+        """Yield a ``ListedSubmission`` for every submission, in display order."""
+        for listing, topics in self.listings.items():
+            for rank, topic in enumerate(topics, start=1):
+                yield ListedSubmission(
+                    self.display_name, self.title, listing, rank, topic
+                )
+
+
+def requests_for_limit(limit):
+    """Return the number of API requests needed to page through ``limit`` items."""
+    return max(1, -(-limit // REDDIT_PAGE_SIZE))
+
+
+def active_listings(limits):
+    """Yield ``(listing, limit)`` pairs, in display order, that should be fetched."""
+    for listing in LISTINGS:
+        limit = limits.get(listing, 0)
+        if limit > 0:
+            yield listing, limit
+
+
+class TopicFetcher:
+    """Fetch the listings of subreddits, optionally in parallel.
+
+    Every request is paid for through the shared ``rate_limiter``, and served
+    from ``cache`` instead of Reddit when a fresh copy is available. With
+    ``checkpoints``, only submissions new since the last run are returned.
+    Metadata, subreddits and listings are timed into ``timings``, and
+    cache lookups and rate limiter waits are counted into ``metrics``.
+    """
+
+    def __init__(
+        self,
+        limits,
+        rate_limiter=None,
+        cache=None,
+        checkpoints=None,
+        timings=None,
+        metrics=None,
+    ):
+        self.limits = limits
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.checkpoints = checkpoints
+        self.timings = timings or NO_TIMINGS
+        self.metrics = metrics or NO_METRICS
+        # Subreddit metadata by lower case name, loaded in bulk per run
+        self.metadata = {}
+
+    def listings(self):
+        """Return the ``(listing, limit)`` pairs to fetch for every subreddit."""
+        return list(active_listings(self.limits))
+
+    def _acquire(self, tokens=1):
+        if self.rate_limiter:
+            self.metrics.observe_wait(self.rate_limiter.acquire(tokens))
+
+    def cached_listing(self, name, listing, limit):
+        """Return the cached submissions of a listing, or None on a miss."""
+        if not self.cache:
+            return None
+        cached = self.cache.get(
+            name, listing, limit, DEFAULT_TIME_FILTERS.get(listing, "")
+        )
+        self.metrics.observe_cache(listing, cached is not None)
+        if cached is None:
+            return None
+        return [CachedSubmission(**data) for data in cached]
+
+    def store_listing(self, name, listing, limit, topics):
+        """Save the submissions of a listing to the cache, if enabled."""
+        if self.cache:
+            self.cache.put(
+                name,
+                listing,
+                limit,
+                [submission_fields(topic) for topic in topics],
+                DEFAULT_TIME_FILTERS.get(listing, ""),
+            )
+
+    def cached_metadata(self, name):
+        """Return the metadata of a subreddit loaded this run or cached, or None."""
+        metadata = self.metadata.get(name.lower())
+        if metadata is None and self.cache:
+            metadata = self.cache.get(name, "about")
+            self.metrics.observe_cache("about", isinstance(metadata, dict))
+            # Older caches hold the bare title
+            if not isinstance(metadata, dict):
+                return None
+            self.metadata[name.lower()] = metadata
+        return metadata
+
+    def store_metadata(self, subreddit):
+        """Keep the metadata of a fetched subreddit and save it to the cache."""
+        metadata = subreddit_fields(subreddit)
+        self.metadata[subreddit.display_name.lower()] = metadata
+        if self.cache:
+            self.cache.put(subreddit.display_name, "about", 0, metadata)
+        return metadata
+
+    def missing_metadata(self, names):
+        """Load cached metadata in bulk and return the names still missing."""
+        missing = [
+            name
+            for name in dict.fromkeys(names)
+            if name.lower() not in self.metadata
+        ]
+        if self.cache and missing:
+            for name, metadata in self.cache.get_many(missing, "about").items():
+                if isinstance(metadata, dict):
+                    self.metadata[name] = metadata
+            looked_up = len(missing)
+            missing = [
+                name for name in missing if name.lower() not in self.metadata
+            ]
+            self.metrics.observe_cache("about", True, looked_up - len(missing))
+            self.metrics.observe_cache("about", False, len(missing))
+        return missing
+
+    def prefetch_metadata(self, reddit_client, names):
+        """Load the metadata of every subreddit before fetching any listing.
+
+        Metadata is read from the cache in one query, and whatever is missing
+        is looked up through ``/api/info``, one request per 100 subreddits,
+        instead of one ``about`` request per subreddit.
+        """
+        missing = self.missing_metadata(names)
+        for start in range(0, len(missing), REDDIT_INFO_SIZE):
+            self._acquire()
+            with self.timings.span("metadata"):
+                for subreddit in reddit_client.info(
+                    subreddits=missing[start : start + REDDIT_INFO_SIZE]
+                ):
+                    self.store_metadata(subreddit)
+
+    def unseen(self, name, listing, topics):
+        """Return the submissions not seen by the last run, when checkpointed."""
+        if self.checkpoints is None:
+            return topics
+        return self.checkpoints.unseen(name, listing, topics)
+
+    def before(self, name, listing, limit):
+        """Return the cursor of a listing to only request newer submissions, or None."""
+        # Reddit pages ``before`` a cursor backwards, so only use it when a
+        # single page holds the whole listing
+        if self.checkpoints is None or limit > REDDIT_PAGE_SIZE:
+            return None
+        return self.checkpoints.before(name, listing)
+
+    def iter_listing(self, subreddit, listing, limit):
+        """Yield the submissions of a listing as Reddit returns them, page by page."""
+        name = subreddit.display_name
+        before = self.before(name, listing, limit)
+        if before is None:
+            topics = self._iter_cached_listing(subreddit, listing, limit)
+        else:
+            topics = self._iter_listing_before(
+                subreddit, listing, limit, before
+            )
+        yield from self.timings.iterate(
+            "listing",
+            self.unseen(name, listing, topics),
+            subreddit=name,
+            listing=listing,
+        )
+
+    def _iter_listing_before(self, subreddit, listing, limit, before):
+        # Responses relative to a cursor are not worth caching
+        topics = self._paid_pages(
+            getattr(subreddit, listing)(limit=limit, params={"before": before}),
+            limit,
+        )
+        first = next(topics, None)
+        if first is None:
+            # Reddit also answers nothing when the checkpointed submission
+            # has been deleted, so fetch the listing as usual and let the
+            # checkpoint filter stop at the submissions already seen
+            yield from self._iter_cached_listing(subreddit, listing, limit)
+            return
+        yield first
+        yield from topics
+
+    def _iter_cached_listing(self, subreddit, listing, limit):
+        name = subreddit.display_name
+        topics = self.cached_listing(name, listing, limit)
+        if topics is not None:
+            yield from topics
+            return
+        # Only hold on to the submissions when they are going to be cached,
+        # and then only to the fields the cache keeps
+        fetched = [] if self.cache else None
+        for topic in self._paid_pages(
+            getattr(subreddit, listing)(limit=limit), limit
+        ):
+            if fetched is not None:
+                fetched.append(CachedSubmission(**submission_fields(topic)))
+            yield topic
+        if fetched is not None:
+            self.store_listing(name, listing, limit, fetched)
+
+    def _paid_pages(self, topics, limit):
+        # Pay for every page right before praw lazily requests it, so that a
+        # listing abandoned early does not spend the budget of its later pages
+        topics = iter(topics)
+        for index in range(limit):
+            if index % REDDIT_PAGE_SIZE == 0:
+                self._acquire()
+            try:
+                yield next(topics)
+            except StopIteration:
+                return
+
+    def fetch_title(self, subreddit):
+        """Fetch the title of a subreddit, which lazily requests its ``about`` page."""
+        metadata = self.cached_metadata(subreddit.display_name)
+        if metadata is None:
+            self._acquire()
+            # Reading an attribute of a lazy subreddit fetches its about page
+            subreddit.title  # noqa: B018
+            metadata = self.store_metadata(subreddit)
+        return metadata["title"]
+
+    def stream_subreddit(self, reddit_client, name):
+        """Yield a ``ListedSubmission`` for every submission of a subreddit.
+
+        ``FLUSH`` is yielded after every page, right before the next request.
+        """
+        subreddit = reddit_client.subreddit(name)
+        title = self.fetch_title(subreddit)
+        for listing, limit in self.listings():
+            topics = self.iter_listing(subreddit, listing, limit)
+            for rank, topic in enumerate(topics, start=1):
+                yield ListedSubmission(
+                    subreddit.display_name, title, listing, rank, topic
+                )
+                if rank % REDDIT_PAGE_SIZE == 0:
+                    yield FLUSH
+            yield FLUSH
+
+    def stream_topics(self, reddit_client, subreddits, concurrency=1):
+        """Yield a ``ListedSubmission`` for every submission, as soon as it arrives.
+
+        Submissions come out in the order given, with ``FLUSH`` yielded
+        whenever the stream is about to wait on Reddit. With a
+        ``concurrency`` above 1, subreddits and their listings are fetched in
+        parallel by a bounded pool of worker threads, which should be given
+        a ``ThreadLocalReddit`` as praw clients are not thread-safe.
+        """
+        subreddits = list(subreddits)
+        self.prefetch_metadata(reddit_client, subreddits)
+        if concurrency > 1:
+            for entries in self._windowed(
+                reddit_client,
+                subreddits,
+                concurrency,
+                self._submit_streams,
+                self._drain_streams,
+            ):
+                yield from entries
+            return
+        for name in subreddits:
+            yield from self.timings.iterate(
+                "subreddit",
+                self.stream_subreddit(reddit_client, name),
+                subreddit=name,
+            )
+
+    def fetch_batch(self, reddit_client, names):
+        """Fetch a group of subreddits through combined ``r/a+b+c`` listings.
+
+        Every listing is requested once for the whole group, asking for the
+        limit times the number of subreddits, and split back out by the
+        subreddit each submission was posted to. A subreddit gets at most its
+        limit, but may get fewer when others dominate the combined listing.
+        """
+        combined = reddit_client.subreddit("+".join(names))
+        self.prefetch_metadata(reddit_client, names)
+        listings = {name: {} for name in names}
+        for listing, limit in self.listings():
+            for name, topics in self._split_listing(
+                combined, names, listing, limit
+            ).items():
+                listings[name][listing] = list(
+                    self.unseen(name, listing, topics)
+                )
+        return [
+            SubredditTopics(
+                name, self._batch_title(reddit_client, name), listings[name]
+            )
+            for name in names
+        ]
+
+    def _batch_title(self, reddit_client, name):
+        metadata = self.metadata.get(name.lower())
+        if metadata is None:
+            # The bulk lookup leaves out some subreddits, such as private ones
+            return self.fetch_title(reddit_client.subreddit(name))
+        return metadata["title"]
+
+    def _split_listing(self, combined, names, listing, limit):
+        # Split listings are cached per subreddit, so that they are shared
+        # with runs that do not batch
+        cached = {
+            name: self.cached_listing(name, listing, limit) for name in names
+        }
+        if None not in cached.values():
+            return cached
+        split = {name.lower(): [] for name in names}
+        limit_all = limit * len(names)
+        self._acquire(requests_for_limit(limit_all))
+        for topic in getattr(combined, listing)(limit=limit_all):
+            topics = split.get(submission_subreddit(topic).lower())
+            if topics is not None and len(topics) < limit:
+                topics.append(topic)
+        for name in names:
+            self.store_listing(name, listing, limit, split[name.lower()])
+        return {name: split[name.lower()] for name in names}
+
+    def stream_batches(
+        self, reddit_client, subreddits, batch_size, concurrency=1
+    ):
+        """Yield a ``ListedSubmission`` for every submission, fetching subreddits in batches.
+
+        ``FLUSH`` is yielded after every subreddit.
+        """
+        subreddits = list(subreddits)
+        batches = [
+            subreddits[start : start + batch_size]
+            for start in range(0, len(subreddits), batch_size)
+        ]
+        for batch in self._windowed(
+            reddit_client,
+            batches,
+            concurrency,
+            lambda executor, client, names: executor.submit(
+                self.fetch_batch, client, names
+            ),
+            lambda future: future.result(),
+        ):
+            for topics in batch:
+                yield from topics.entries()
+                yield FLUSH
+
+    def _pump_listing(self, reddit_client, name, listing, limit, queue):
+        try:
+            # Resolved on the worker, so that a client per thread is used
+            subreddit = reddit_client.subreddit(name)
+            for topic in self.iter_listing(subreddit, listing, limit):
+                queue.put(topic)
+        except BaseException as e:  # noqa: BLE001
+            # Raised again by the consumer, in the thread iterating the stream
+            queue.put(_ListingFailed(e))
+            return
+        queue.put(_LISTING_DONE)
+
+    def _submit_streams(self, executor, reddit_client, name):
+        title = executor.submit(
+            lambda: self.fetch_title(reddit_client.subreddit(name))
+        )
+        listings = {}
+        for listing, limit in self.listings():
+            listings[listing] = SimpleQueue()
+            executor.submit(
+                self._pump_listing,
+                reddit_client,
+                name,
+                listing,
+                limit,
+                listings[listing],
+            )
+        return name, title, listings
+
+    def _drain_streams(self, submitted):
+        name, title, listings = submitted
+        # Timed as the wait for its entries, once the previous ones are out
+        return self.timings.iterate(
+            "subreddit",
+            self._drain_listings(name, title, listings),
+            subreddit=name,
+        )
+
+    @staticmethod
+    def _drain_listings(name, title, listings):
+        if not title.done():
+            yield FLUSH
+        title = title.result()
+        for listing, queue in listings.items():
+            rank = 0
+            for topic in _drain_queue(queue):
+                if topic is FLUSH:
+                    yield FLUSH
+                    continue
+                rank += 1
+                yield ListedSubmission(name, title, listing, rank, topic)
+
+    @staticmethod
+    def _windowed(reddit_client, subreddits, concurrency, submit, collect):
+        # Only keep a window of subreddits in flight so that memory stays
+        # bounded while the results are still yielded in the order given.
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = deque()
+            for name in subreddits:
+                pending.append(submit(executor, reddit_client, name))
+                if len(pending) >= concurrency:
+                    yield collect(pending.popleft())
+            while pending:
+                yield collect(pending.popleft())
+
+
+class _ListingFailed(NamedTuple):
+    error: BaseException
+
+
+# Put on a listing queue once its worker has fetched every submission
+_LISTING_DONE = object()
+
+
+def _drain_queue(queue):
+    """Yield the submissions a worker puts on a queue, ``FLUSH`` before waiting."""
+    while True:
+        try:
+            topic = queue.get_nowait()
+        except Empty:
+            yield FLUSH
+            topic = queue.get()
+        if topic is _LISTING_DONE:
+            return
+        if isinstance(topic, _ListingFailed):
+            raise topic.error
+        yield topic
@@ -0,0 +1,118 @@
+import time
+
+from .pipeline import FLUSH
+
+# A subreddit is polled at most this often, and at least this often, in seconds
+DEFAULT_MIN_INTERVAL = 60
+DEFAULT_MAX_INTERVAL = 30 * 60
+
+# Factor the interval shrinks by when a poll finds something new, and grows
+# by when it does not
+DEFAULT_BACKOFF = 2.0
+
+
+def poll_errors():
+    """Return the errors that skip a polling round instead of stopping the watcher."""
+    # Imported here, praw is slow to import and only needed once polling
+    import praw.exceptions
+    import prawcore.exceptions
+
+    return (
+        praw.exceptions.PRAWException,
+        prawcore.exceptions.PrawcoreException,
+    )
+
+
+class AdaptiveInterval:
+    """Polling interval of a subreddit, shorter the more often it changes."""
+
+    def __init__(
+        self,
+        min_interval=DEFAULT_MIN_INTERVAL,
+        max_interval=DEFAULT_MAX_INTERVAL,
+        backoff=DEFAULT_BACKOFF,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.seconds = min_interval
+
+    def update(self, new_items):
+        """Adapt to the number of new submissions of a poll and return the interval."""
+        if new_items:
+            self.seconds = max(self.min_interval, self.seconds / self.backoff)
+        else:
+            self.seconds = min(self.max_interval, self.seconds * self.backoff)
+        return self.seconds
+
+
+class Watcher:
+    """Poll subreddits with a single client, each on its own adaptive schedule.
+
+    The fetcher must have checkpoints, so that every poll only yields what is
+    new since the previous one. They are saved once a round has been
+    consumed, so a restarted watcher carries on where it stopped.
+    """
+
+    def __init__(
+        self,
+        fetcher,
+        reddit_client,
+        subreddits,
+        concurrency=1,
+        min_interval=DEFAULT_MIN_INTERVAL,
+        max_interval=DEFAULT_MAX_INTERVAL,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        on_error=None,
+    ):
+        self.fetcher = fetcher
+        self.reddit_client = reddit_client
+        self.subreddits = list(dict.fromkeys(subreddits))
+        self.concurrency = concurrency
+        self.intervals = {
+            name: AdaptiveInterval(min_interval, max_interval)
+            for name in self.subreddits
+        }
+        self.due = {name: clock() for name in self.subreddits}
+        self._clock = clock
+        self._sleep = sleep
+        self._on_error = on_error
+
+    def wait(self):
+        """Sleep until the next subreddit is due and return every due subreddit."""
+        delay = min(self.due.values()) - self._clock()
+        if delay > 0:
+            self._sleep(delay)
+        now = self._clock()
+        return [name for name in self.subreddits if self.due[name] <= now]
+
+    def poll(self, names, counts):
+        """Yield what is new in some subreddits, counting it per subreddit."""
+        for entry in self.fetcher.stream_topics(
+            self.reddit_client, names, self.concurrency
+        ):
+            if entry is not FLUSH:
+                counts[entry.subreddit.lower()] += 1
+            yield entry
+
+    def stream(self, rounds=None):
+        """Yield new ``ListedSubmission`` entries forever, ``FLUSH`` after every round."""
+        completed = 0
+        while rounds is None or completed < rounds:
+            names = self.wait()
+            counts = dict.fromkeys((name.lower() for name in names), 0)
+            try:
+                yield from self.poll(names, counts)
+            except poll_errors() as e:
+                if self._on_error:
+                    self._on_error(e)
+            yield FLUSH
+            # Resumed once the round has been written out
+            self.fetcher.checkpoints.save()
+            now = self._clock()
+            for name in names:
+                self.due[name] = now + self.intervals[name].update(
+                    counts[name.lower()]
+                )
+            completed += 1
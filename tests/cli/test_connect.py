@@ -3,6 +3,8 @@ from unittest.mock import MagicMock, patch
 
 import praw.exceptions
 
+from reddit_topics_aggregator.fake_reddit import FakeReddit, FakeRedditServer
+
 
 def test_cli_connect(cli: FunctionType):
     result = cli(["connect"])
@@ -73,7 +75,7 @@ def test_connect_command_with_cli_options(mock_builder, cli: FunctionType):
 
     # Ensure that the builder was called with the correct parameters
     mock_builder.build_reddit_client_from_args.assert_called_once_with(
-        "test_id", "test_secret", "test_user", "test_password", None
+        "test_id", "test_secret", "test_user", "test_password", None, None
     )
 
 
@@ -114,7 +116,12 @@ def test_connect_command_with_env_vars(mock_builder, cli: FunctionType):
 
     # Check that the builder used the environment variables
     mock_builder.build_reddit_client_from_args.assert_called_once_with(
-        "env_id", "env_secret", "env_user", "env_password", "env_user_agent"
+        "env_id",
+        "env_secret",
+        "env_user",
+        "env_password",
+        "env_user_agent",
+        None,
     )
 
 
@@ -161,6 +168,7 @@ def test_connect_command_with_custom_user_agent(
         "test_user",
         "test_password",
         "custom-agent/1.0",
+        None,
     )
 
 
@@ -225,3 +233,27 @@ def test_connect_command_value_error(mock_builder, cli: FunctionType):
     assert result.exit_code != 0
     assert "Configuration Error: Test ValueError error" in result.output
     assert "Help: Correct the issue above and try again" in result.output
+
+
+def test_connect_timings(cli: FunctionType, monkeypatch):
+    """Test the connect command prints the time spent authenticating."""
+    with FakeRedditServer(FakeReddit()).start() as server:
+        monkeypatch.setenv("REDDIT_BASE_URL", server.url)
+        result = cli(
+            [
+                "connect",
+                "--client-id",
+                "test_id",
+                "--client-secret",
+                "test_secret",
+                "--username",
+                "test_user",
+                "--password",
+                "test_password",
+                "--timings",
+            ]
+        )
+
+    assert result.exit_code == 0, result.output
+    assert "Authenticated as: fake_user" in result.output
+    assert "\nauth " in result.output
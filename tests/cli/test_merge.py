@@ -0,0 +1,82 @@
+import json
+from types import FunctionType
+
+import pytest
+
+from reddit_topics_aggregator.pipeline import render_jsonl
+from reddit_topics_aggregator.records import TopicRecord
+
+
+@pytest.fixture
+def shard_outputs(tmp_path):
+    shards = [
+        [("a", "python", 5), ("b", "python", 50)],
+        [("c", "rust", 20), ("b", "python", 50)],
+    ]
+    paths = []
+    for number, records in enumerate(shards, start=1):
+        path = tmp_path / f"shard{number}.jsonl"
+        path.write_text(
+            "".join(
+                render_jsonl(
+                    TopicRecord(subreddit, "", "hot", 1, id=id, score=score)
+                    for id, subreddit, score in records
+                )
+            )
+        )
+        paths.append(str(path))
+    return paths
+
+
+def merged_ids(output):
+    return [json.loads(line)["id"] for line in output.splitlines()]
+
+
+def test_merge_keeps_every_submission_once(cli: FunctionType, shard_outputs):
+    """Test the merge command concatenating shard outputs without duplicates."""
+    result = cli(["merge", *shard_outputs])
+
+    assert result.exit_code == 0, result.output
+    assert merged_ids(result.output) == ["a", "b", "c"]
+
+
+def test_merge_sort_by(cli: FunctionType, shard_outputs):
+    """Test the merge command ordering every submission globally."""
+    result = cli(["merge", *shard_outputs, "--sort-by", "score"])
+
+    assert result.exit_code == 0, result.output
+    assert merged_ids(result.output) == ["b", "c", "a"]
+
+
+def test_merge_global_top(cli: FunctionType, shard_outputs):
+    """Test the merge command printing only the highest ranking submissions."""
+    result = cli(
+        ["merge", *shard_outputs, "--global-top", "2", "--format", "csv"]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert [line.split(",")[0] for line in result.output.splitlines()] == [
+        "id",
+        "b",
+        "c",
+    ]
+
+
+def test_merge_from_stdin(cli: FunctionType, shard_outputs):
+    """Test the merge command reading a shard output from standard input."""
+    with open(shard_outputs[1]) as output:
+        result = cli(["merge", shard_outputs[0], "-"], input=output.read())
+
+    assert result.exit_code == 0, result.output
+    assert merged_ids(result.output) == ["a", "b", "c"]
+
+
+def test_merge_invalid_output(cli: FunctionType, tmp_path):
+    """Test the merge command reporting an output that is not JSON lines."""
+    path = tmp_path / "shard.txt"
+    path.write_text("=====\n")
+
+    result = cli(["merge", str(path)])
+
+    assert result.exit_code == 1
+    assert "Line 1 of" in result.output
@@ -0,0 +1,54 @@
+import subprocess
+import sys
+
+import pytest
+
+# Packages only imported once a command connects to Reddit
+NETWORK_PACKAGES = ("praw", "prawcore", "asyncpraw", "requests", "aiohttp")
+
+# Most importing the CLI may take, in microseconds. It takes around 20ms
+# without praw, and over 300ms with it.
+IMPORT_BUDGET_US = 150_000
+
+
+def import_times(*args):
+    """Return the cumulative import time, in microseconds, of every module python imports to run ``args``."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def network_imports(times):
+    return sorted(
+        name for name in times if name.partition(".")[0] in NETWORK_PACKAGES
+    )
+
+
+def test_cli_import_within_budget():
+    """Test that importing the CLI skips praw and stays within its budget."""
+    times = import_times("-c", "import reddit_topics_aggregator.cli")
+
+    assert network_imports(times) == []
+    assert times["reddit_topics_aggregator.cli"] < IMPORT_BUDGET_US
+
+
+@pytest.mark.parametrize(
+    "args",
+    [["--help"], ["--version"], ["topics", "--help"], ["watch", "--help"]],
+)
+def test_help_skips_network_packages(args):
+    """Test that printing help or the version never imports praw."""
+    times = import_times("-m", "reddit_topics_aggregator", *args)
+
+    assert network_imports(times) == []
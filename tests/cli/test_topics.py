@@ -1,4 +1,6 @@
+import json
 from collections.abc import Generator
+from pathlib import Path
 from types import FunctionType
 from unittest.mock import MagicMock, patch
 
@@ -6,6 +8,9 @@ import praw.exceptions
 import pytest
 from praw.models import Submission
 
+from reddit_topics_aggregator.fake_reddit import FakeReddit, FakeRedditServer
+from reddit_topics_aggregator.topic_fetcher import SubredditTopics
+
 TEST_SUBREDDIT_NAME = "mysubreddit"
 
 
@@ -98,7 +103,7 @@ def test_topics_with_cli_options(
 
     # Ensure that the builder was called with the correct parameters
     mock_builder.build_reddit_client_from_args.assert_called_once_with(
-        "test_id", "test_secret", "test_user", "test_password", None
+        "test_id", "test_secret", "test_user", "test_password", None, None
     )
 
 
@@ -185,7 +190,12 @@ def test_topics_with_env_vars(mock_builder, cli: FunctionType):
 
     # Ensure that the builder was called with the correct parameters
     mock_builder.build_reddit_client_from_args.assert_called_once_with(
-        "env_id", "env_secret", "env_user", "env_password", "env_user_agent"
+        "env_id",
+        "env_secret",
+        "env_user",
+        "env_password",
+        "env_user_agent",
+        None,
     )
 
 
@@ -316,3 +326,568 @@ def test_topics_with_zero_options(
         mock_subreddit.top.assert_called()
     else:
         mock_subreddit.top.assert_not_called()
+
+
+@patch("reddit_topics_aggregator.cli.topics.RedditClientBuilder")
+def test_topics_with_concurrency_keeps_subreddit_order(
+    mock_builder, cli: FunctionType, topic_cli_options: list[str]
+):
+    """Test the topics command prints subreddits in order when concurrent."""
+    names = [f"sub{i}" for i in range(6)]
+
+    def subreddit(name):
+        mock_subreddit = MagicMock()
+        mock_subreddit.display_name = name
+        mock_subreddit.title = name.upper()
+        mock_subreddit.top.return_value = [TEST_TOPIC_SUBMISSON]
+        return mock_subreddit
+
+    mock_reddit_client = MagicMock()
+    mock_reddit_client.subreddit.side_effect = subreddit
+    mock_builder.build_reddit_client_from_args.return_value = mock_reddit_client
+
+    cli_options = topic_cli_options
+    for name in names:
+        cli_options.extend(["--subreddit", name])
+    cli_options.extend(
+        ["--concurrency", "4", "--requests-per-minute", "100000"]
+    )
+    result = cli(cli_options)
+
+    assert result.exit_code == 0
+    headers = [
+        line for line in result.output.splitlines() if line.startswith("Sub")
+    ]
+    assert headers == [
+        f"Subreddit: r/{name} ({name.upper()})"
+        for name in [TEST_SUBREDDIT_NAME, *names]
+    ]
+
+
+def test_topics_with_invalid_concurrency(
+    cli: FunctionType, topic_cli_options: list[str]
+):
+    """Test the topics command rejects a concurrency below 1."""
+    result = cli([*topic_cli_options, "--concurrency", "0"])
+
+    assert result.exit_code != 0
+    assert "Invalid value for '--concurrency'" in result.output
+
+
+@patch("reddit_topics_aggregator.cli.topics.AsyncTopicFetcher")
+@patch("reddit_topics_aggregator.cli.topics.RedditClientBuilder")
+def test_topics_with_async_engine(
+    mock_builder,
+    mock_fetcher,
+    cli: FunctionType,
+    topic_cli_options: list[str],
+):
+    """Test the topics command renders results from the async engine."""
+    mock_stream_topics_async = mock_fetcher.return_value.stream_topics_async
+    mock_stream_topics_async.return_value = SubredditTopics(
+        TEST_SUBREDDIT_NAME,
+        "My Subreddit",
+        {"top": [TEST_TOPIC_SUBMISSON]},
+    ).entries()
+
+    result = cli([*topic_cli_options, "--engine", "async"])
+
+    assert result.exit_code == 0
+    assert "Subreddit: r/mysubreddit (My Subreddit)" in result.output
+    assert "Topic: topic title" in result.output
+    mock_builder.build_reddit_client_from_args.assert_not_called()
+    mock_builder.from_args.assert_called_once_with(
+        "test_id", "test_secret", "test_user", "test_password", None, None
+    )
+    args = mock_stream_topics_async.call_args.args
+    assert args[1] == (TEST_SUBREDDIT_NAME,)
+    # The client is built, and watched by the rate limiter, on the event loop
+    args[0]()
+    mock_builder.from_args.return_value.build_async.assert_called_once_with()
+
+
+@pytest.mark.parametrize("dedupe", ["subreddit", "global", "near"])
+@patch("reddit_topics_aggregator.cli.topics.RedditClientBuilder")
+def test_topics_with_dedupe(
+    mock_builder, cli: FunctionType, topic_cli_options: list[str], dedupe
+):
+    """Test the topics command prints a submission once with its listings."""
+    mock_reddit_client = MagicMock()
+    mock_subreddit = MagicMock()
+    mock_subreddit.display_name = TEST_SUBREDDIT_NAME
+    mock_subreddit.title = "My Subreddit"
+    mock_subreddit.hot.return_value = [TEST_TOPIC_SUBMISSON]
+    mock_subreddit.rising.return_value = [TEST_TOPIC_SUBMISSON]
+    mock_subreddit.top.return_value = [TEST_TOPIC_SUBMISSON]
+    mock_builder.build_reddit_client_from_args.return_value = mock_reddit_client
+    mock_reddit_client.subreddit.return_value = mock_subreddit
+
+    result = cli([*topic_cli_options, "--dedupe", dedupe])
+
+    assert result.exit_code == 0
+    assert result.output.count("Topic: topic title") == 1
+    assert "Listings: hot #1, rising #1, top #1" in result.output
+
+
+@patch("reddit_topics_aggregator.cli.topics.RedditClientBuilder")
+def test_topics_with_cache_dir(
+    mock_builder, cli: FunctionType, topic_cli_options: list[str], tmp_path
+):
+    """Test the topics command serves a second run from the cache."""
+    mock_reddit_client = MagicMock()
+    mock_subreddit = MagicMock()
+    mock_subreddit.display_name = TEST_SUBREDDIT_NAME
+    mock_subreddit.title = "My Subreddit"
+    mock_subreddit.top.return_value = [TEST_TOPIC_SUBMISSON]
+    mock_builder.build_reddit_client_from_args.return_value = mock_reddit_client
+    mock_reddit_client.subreddit.return_value = mock_subreddit
+    cli_options = [*topic_cli_options, "--cache-dir", str(tmp_path)]
+
+    first = cli(cli_options)
+    second = cli(cli_options)
+    uncached = cli([*cli_options, "--no-cache"])
+
+    assert first.exit_code == second.exit_code == 0
+    assert second.output == first.output == uncached.output
+    assert mock_subreddit.top.call_count == 2
+
+
+def test_topics_with_invalid_cache_ttl(
+    cli: FunctionType, topic_cli_options: list[str], tmp_path
+):
+    """Test the topics command rejects a malformed cache TTL."""
+    result = cli([*topic_cli_options, "--cache-ttl", "best=10"])
+
+    assert result.exit_code != 0
+    assert "Invalid value for '--cache-ttl'" in result.output
+
+
+@patch("reddit_topics_aggregator.cli.topics.RedditClientBuilder")
+def test_topics_with_rate_limit_report(
+    mock_builder, cli: FunctionType, topic_cli_options: list[str]
+):
+    """Test the topics command reports the rate limit budget it observed."""
+    mock_reddit_client = MagicMock()
+    mock_subreddit = MagicMock()
+    mock_subreddit.display_name = TEST_SUBREDDIT_NAME
+    mock_reddit_client.subreddit.return_value = mock_subreddit
+    mock_reddit_client.info.return_value = [mock_subreddit]
+    mock_builder.build_reddit_client_from_args.return_value = mock_reddit_client
+
+    def top(limit):
+        # Reddit sends its rate limit headers with every response
+        mock_reddit_client._core._rate_limiter.update(
+            response_headers={
+                "x-ratelimit-remaining": "590.0",
+                "x-ratelimit-used": "10",
+                "x-ratelimit-reset": "300",
+            }
+        )
+        return [TEST_TOPIC_SUBMISSON]
+
+    mock_subreddit.top.side_effect = top
+
+    result = cli([*topic_cli_options, "--rate-limit-report"])
+
+    assert result.exit_code == 0
+    assert "Rate limit: 5 requests" in result.output
+    assert (
+        "Reddit reports 590 remaining (lowest 590) and 10 used" in result.output
+    )
+
+
+@patch("reddit_topics_aggregator.cli.topics.RedditClientBuilder")
+def test_topics_with_jsonl_format(
+    mock_builder, cli: FunctionType, topic_cli_options: list[str]
+):
+    """Test the topics command prints one JSON record per submission."""
+    mock_reddit_client = MagicMock()
+    mock_subreddit = MagicMock()
+    mock_subreddit.display_name = TEST_SUBREDDIT_NAME
+    mock_subreddit.title = "My Subreddit"
+    mock_subreddit.hot.return_value = [TEST_TOPIC_SUBMISSON]
+    mock_subreddit.top.return_value = [TEST_TOPIC_SUBMISSON]
+    mock_builder.build_reddit_client_from_args.return_value = mock_reddit_client
+    mock_reddit_client.subreddit.return_value = mock_subreddit
+
+    result = cli([*topic_cli_options, "--format", "jsonl"])
+
+    assert result.exit_code == 0
+    records = [json.loads(line) for line in result.output.splitlines()]
+    assert [(record["listing"], record["rank"]) for record in records] == [
+        ("hot", 1),
+        ("top", 1),
+    ]
+    assert records[0]["id"] == "1fxukkw"
+    assert records[0]["score"] == 20
+
+
+@patch("reddit_topics_aggregator.cli.topics.RedditClientBuilder")
+def test_topics_with_summarize(
+    mock_builder, cli: FunctionType, topic_cli_options: list[str]
+):
+    """Test the topics command prints ranked topics instead of submissions."""
+    pytest.importorskip("scipy")
+    mock_reddit_client = MagicMock()
+    mock_subreddit = MagicMock()
+    mock_subreddit.display_name = TEST_SUBREDDIT_NAME
+    mock_subreddit.hot.return_value = [
+        Submission(reddit="praw.Reddit", _data={"id": id, "title": title})
+        for id, title in [("a", "Topic title"), ("b", "Another topic")]
+    ]
+    mock_builder.build_reddit_client_from_args.return_value = mock_reddit_client
+    mock_reddit_client.subreddit.return_value = mock_subreddit
+
+    result = cli([*topic_cli_options, "--summarize", "--format", "jsonl"])
+
+    assert result.exit_code == 0
+    rows = [json.loads(line) for line in result.output.splitlines()]
+    assert [(row["scope"], row["topic"]) for row in rows] == [
+        (TEST_SUBREDDIT_NAME, "topic"),
+        ("all", "topic"),
+    ]
+    assert sorted(rows[0]["submissions"]) == ["a", "b"]
+
+
+@patch("reddit_topics_aggregator.cli.topics.RedditClientBuilder")
+def test_topics_with_global_top(
+    mock_builder, cli: FunctionType, topic_cli_options: list[str]
+):
+    """Test the topics command prints the highest scoring submissions overall."""
+    mock_reddit_client = MagicMock()
+    mock_subreddit = MagicMock()
+    mock_subreddit.display_name = TEST_SUBREDDIT_NAME
+    mock_subreddit.hot.return_value = [
+        Submission(reddit="praw.Reddit", _data={"id": id, "score": score})
+        for id, score in [("a", 5), ("b", 50), ("c", 20)]
+    ]
+    mock_builder.build_reddit_client_from_args.return_value = mock_reddit_client
+    mock_reddit_client.subreddit.return_value = mock_subreddit
+
+    result = cli(
+        [
+            *topic_cli_options,
+            "--global-top",
+            "2",
+            "--sort-by",
+            "score",
+            "--format",
+            "jsonl",
+        ]
+    )
+
+    assert result.exit_code == 0
+    rows = [json.loads(line) for line in result.output.splitlines()]
+    assert [row["id"] for row in rows] == ["b", "c"]
+
+
+@patch("reddit_topics_aggregator.cli.topics.RedditClientBuilder")
+def test_topics_with_fields(
+    mock_builder, cli: FunctionType, topic_cli_options: list[str]
+):
+    """Test the topics command only keeps the submission fields asked for."""
+    mock_reddit_client = MagicMock()
+    mock_subreddit = MagicMock()
+    mock_subreddit.display_name = TEST_SUBREDDIT_NAME
+    mock_subreddit.hot.return_value = [TEST_TOPIC_SUBMISSON]
+    mock_builder.build_reddit_client_from_args.return_value = mock_reddit_client
+    mock_reddit_client.subreddit.return_value = mock_subreddit
+
+    result = cli(
+        [*topic_cli_options, "--fields", "title, score", "--format", "jsonl"]
+    )
+
+    assert result.exit_code == 0
+    (row,) = [json.loads(line) for line in result.output.splitlines()]
+    assert (row["id"], row["title"], row["score"]) == (
+        "1fxukkw",
+        "topic title",
+        20,
+    )
+    assert row["selftext"] is None
+
+
+def test_topics_with_unknown_fields(
+    cli: FunctionType, topic_cli_options: list[str]
+):
+    """Test the topics command rejects fields submissions do not have."""
+    result = cli([*topic_cli_options, "--fields", "title,body"])
+
+    assert result.exit_code != 0
+    assert "Unknown submission fields: body" in result.output
+
+
+@patch("reddit_topics_aggregator.cli.topics.RedditClientBuilder")
+def test_topics_with_postprocess(
+    mock_builder, cli: FunctionType, topic_cli_options: list[str]
+):
+    """Test the topics command rewrites submission text on worker processes."""
+    mock_reddit_client = MagicMock()
+    mock_subreddit = MagicMock()
+    mock_subreddit.display_name = TEST_SUBREDDIT_NAME
+    mock_subreddit.hot.return_value = [
+        Submission(
+            reddit="praw.Reddit",
+            _data={
+                "id": id,
+                "title": f"**Big**  news {id}",
+                "selftext": "# Heading\n\nsee [the docs](https://example.com)",
+            },
+        )
+        for id in ("a", "b", "c")
+    ]
+    mock_builder.build_reddit_client_from_args.return_value = mock_reddit_client
+    mock_reddit_client.subreddit.return_value = mock_subreddit
+
+    result = cli(
+        [
+            *topic_cli_options,
+            "--postprocess",
+            "strip_markdown, normalize_whitespace",
+            "--workers",
+            "2",
+            "--format",
+            "jsonl",
+        ]
+    )
+
+    assert result.exit_code == 0, result.output
+    rows = [json.loads(line) for line in result.output.splitlines()]
+    assert [(row["id"], row["title"]) for row in rows] == [
+        ("a", "Big news a"),
+        ("b", "Big news b"),
+        ("c", "Big news c"),
+    ]
+    assert rows[0]["selftext"] == "Heading see the docs"
+
+
+def test_topics_with_unknown_postprocess(
+    cli: FunctionType, topic_cli_options: list[str]
+):
+    """Test the topics command rejects post-processors it does not have."""
+    result = cli([*topic_cli_options, "--postprocess", "strip_html,stem"])
+
+    assert result.exit_code != 0
+    assert "Unknown post-processors: stem" in result.output
+
+
+def test_topics_with_summarize_and_csv_format(
+    cli: FunctionType, topic_cli_options: list[str]
+):
+    """Test the topics command rejects summaries in a format they lack."""
+    result = cli([*topic_cli_options, "--summarize", "--format", "csv"])
+
+    assert result.exit_code != 0
+    assert "'--summarize' supports '--format' text or jsonl" in result.output
+
+
+def test_topics_with_batch_size_and_async_engine(
+    cli: FunctionType, topic_cli_options: list[str]
+):
+    """Test the topics command rejects batching with the async engine."""
+    result = cli([*topic_cli_options, "--batch-size", "5", "--engine", "async"])
+
+    assert result.exit_code != 0
+    assert (
+        "'--batch-size' is only supported by the sync engine" in result.output
+    )
+
+
+@patch("reddit_topics_aggregator.cli.topics.RedditClientBuilder")
+def test_topics_since_last_run(
+    mock_builder, cli: FunctionType, topic_cli_options: list[str], tmp_path
+):
+    """Test the topics command only prints submissions new since the last run."""
+    mock_reddit_client = MagicMock()
+    mock_subreddit = MagicMock()
+    mock_subreddit.display_name = TEST_SUBREDDIT_NAME
+    mock_subreddit.title = "My Subreddit"
+    mock_subreddit.hot.return_value = [TEST_TOPIC_SUBMISSON]
+    mock_builder.build_reddit_client_from_args.return_value = mock_reddit_client
+    mock_reddit_client.subreddit.return_value = mock_subreddit
+    cli_options = [
+        *topic_cli_options,
+        "--since-last-run",
+        "--checkpoint-file",
+        str(tmp_path / "checkpoints.json"),
+    ]
+
+    first = cli(cli_options)
+    second = cli(cli_options)
+
+    assert first.exit_code == second.exit_code == 0
+    assert "Topic: topic title" in first.output
+    assert "Topic: topic title" not in second.output
+
+
+def test_topics_timings(
+    cli: FunctionType, topic_cli_options: list[str], tmp_path, monkeypatch
+):
+    """Test the topics command prints timings and writes a trace once done."""
+    trace_file = tmp_path / "trace.json"
+    with FakeRedditServer(FakeReddit()).start() as server:
+        monkeypatch.setenv("REDDIT_BASE_URL", server.url)
+        result = cli(
+            [
+                *topic_cli_options,
+                "--concurrency",
+                "2",
+                "--timings",
+                "--trace-file",
+                str(trace_file),
+            ]
+        )
+
+    assert result.exit_code == 0, result.output
+    assert "Timings:" in result.output
+    for name in ("auth", "listing page", "listing", "subreddit", "output"):
+        assert f"\n{name} " in result.output
+    events = json.loads(trace_file.read_text())["traceEvents"]
+    assert {event["name"] for event in events} >= {"auth", "listing page"}
+
+
+def test_topics_metrics_file(
+    cli: FunctionType, topic_cli_options: list[str], tmp_path, monkeypatch
+):
+    """Test the topics command writes its counters once done."""
+    metrics_file = tmp_path / "reddit_topics.prom"
+    with FakeRedditServer(FakeReddit()).start() as server:
+        monkeypatch.setenv("REDDIT_BASE_URL", server.url)
+        result = cli([*topic_cli_options, "--metrics-file", str(metrics_file)])
+
+    assert result.exit_code == 0, result.output
+    metrics = metrics_file.read_text()
+    assert 'reddit_topics_requests_total{endpoint="listing_page"} 4' in metrics
+    assert metrics.endswith("# EOF\n")
+
+
+def test_topics_credentials_file(cli: FunctionType, tmp_path, monkeypatch):
+    """Test the topics command spreading its requests over several credential sets."""
+    credentials_file = tmp_path / "credentials.json"
+    credentials_file.write_text(
+        json.dumps(
+            [
+                {
+                    "client_id": client_id,
+                    "client_secret": "secret",
+                    "username": "user",
+                    "password": "password",
+                }
+                for client_id in ("first", "revoked", "second")
+            ]
+        )
+    )
+    # A budget large enough that the rate limiters do not slow the test
+    fake = FakeReddit(
+        refused_client_ids={"revoked"}, requests_per_window=100_000
+    )
+    with FakeRedditServer(fake).start() as server:
+        monkeypatch.setenv("REDDIT_BASE_URL", server.url)
+        result = cli(
+            [
+                "topics",
+                "--credentials-file",
+                str(credentials_file),
+                *("--subreddit", "a", "-s", "b", "-s", "c", "-s", "d"),
+                "--rate-limit-report",
+                "--format",
+                "jsonl",
+            ]
+        )
+
+    assert result.exit_code == 0, result.output
+    assert "Dropped Reddit credentials revoked/user" in result.output
+    assert "Rate limit of first/user: " in result.output
+    assert "Rate limit of second/user: " in result.output
+    assert {
+        json.loads(line)["subreddit"]
+        for line in result.output.splitlines()
+        if line.startswith("{")
+    } == {"a", "b", "c", "d"}
+
+
+def test_topics_credentials_file_with_the_async_engine(
+    cli: FunctionType, tmp_path
+):
+    """Test that several credential sets are refused with the async engine."""
+    credentials_file = tmp_path / "credentials.json"
+    credentials_file.write_text(
+        json.dumps(
+            [
+                {
+                    "client_id": "id",
+                    "client_secret": "secret",
+                    "username": "user",
+                    "password": "password",
+                }
+            ]
+        )
+    )
+
+    result = cli(
+        [
+            "topics",
+            "--credentials-file",
+            str(credentials_file),
+            "--subreddit",
+            "a",
+            "--engine",
+            "async",
+        ]
+    )
+
+    assert result.exit_code == 2
+    assert "only supported by the sync engine" in result.output
+
+
+def test_topics_shards_split_the_subreddits(
+    cli: FunctionType, tmp_path, monkeypatch
+):
+    """Test that the shards of the topics command fetch every subreddit once, merged back by merge."""
+    names = [f"sub{index}" for index in range(8)]
+    outputs = []
+    with FakeRedditServer(FakeReddit()).start() as server:
+        monkeypatch.setenv("REDDIT_BASE_URL", server.url)
+        for shard in ("1/3", "2/3", "3/3"):
+            result = cli(
+                [
+                    "topics",
+                    *("--client-id", "id", "--client-secret", "secret"),
+                    *("--username", "user", "--password", "password"),
+                    *(option for name in names for option in ("-s", name)),
+                    *(
+                        "--hot",
+                        "1",
+                        "--new",
+                        "0",
+                        "--top",
+                        "0",
+                        "--rising",
+                        "0",
+                    ),
+                    *("--shard", shard, "--format", "jsonl"),
+                ]
+            )
+            assert result.exit_code == 0, result.output
+            path = tmp_path / f"shard{shard[0]}.jsonl"
+            path.write_text(result.output)
+            outputs.append(str(path))
+    fetched = [
+        {
+            json.loads(line)["subreddit"]
+            for line in path.read_text().splitlines()
+        }
+        for path in map(Path, outputs)
+    ]
+    merged = cli(["merge", *outputs])
+
+    assert sorted(name for shard in fetched for name in shard) == names
+    assert len(merged.output.splitlines()) == len(names)
+
+
+def test_topics_invalid_shard(cli: FunctionType, topic_cli_options: list[str]):
+    """Test that a shard not written i/N is refused."""
+    result = cli([*topic_cli_options, "--shard", "4/3"])
+
+    assert result.exit_code == 2
+    assert "between 1/3 and 3/3" in result.output
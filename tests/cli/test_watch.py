@@ -0,0 +1,153 @@
+from types import FunctionType, SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from reddit_topics_aggregator.fake_reddit import FakeReddit, FakeRedditServer
+
+
+@patch("reddit_topics_aggregator.cli.watch.RedditClientBuilder")
+def test_watch(mock_builder, cli: FunctionType, tmp_path):
+    """Test the watch command appends every new submission to its output."""
+    mock_reddit_client = MagicMock()
+    mock_reddit_client.info.return_value = []
+    mock_subreddit = mock_reddit_client.subreddit.return_value
+    mock_subreddit.display_name = "mysubreddit"
+    mock_subreddit.title = "My Subreddit"
+    mock_subreddit.new.return_value = [
+        SimpleNamespace(id="a", title="topic title", created_utc=1)
+    ]
+    mock_builder.build_reddit_client_from_args.return_value = mock_reddit_client
+    output = tmp_path / "topics.jsonl"
+
+    result = cli(
+        [
+            "watch",
+            "--client-id",
+            "test_id",
+            "--client-secret",
+            "test_secret",
+            "--username",
+            "test_user",
+            "--password",
+            "test_password",
+            "--subreddit",
+            "mysubreddit",
+            "--hot",
+            "0",
+            "--top",
+            "0",
+            "--rising",
+            "0",
+            "--checkpoint-file",
+            str(tmp_path / "checkpoints.json"),
+            "--min-interval",
+            "1",
+            "--max-interval",
+            "1",
+            "--rounds",
+            "2",
+            "--format",
+            "jsonl",
+            "--output",
+            str(output),
+        ]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert output.read_text().count('"id": "a"') == 1
+
+
+def test_watch_with_invalid_intervals(cli: FunctionType):
+    """Test the watch command rejects a minimum interval above the maximum."""
+    result = cli(
+        [
+            "watch",
+            "--client-id",
+            "test_id",
+            "--client-secret",
+            "test_secret",
+            "--username",
+            "test_user",
+            "--password",
+            "test_password",
+            "--subreddit",
+            "mysubreddit",
+            "--min-interval",
+            "60",
+            "--max-interval",
+            "10",
+        ]
+    )
+
+    assert result.exit_code != 0
+    assert (
+        "'--min-interval' must not be above '--max-interval'" in result.output
+    )
+
+
+@patch("reddit_topics_aggregator.cli.watch.Watcher")
+@patch("reddit_topics_aggregator.cli.watch.RedditClientBuilder")
+def test_watch_stops_cleanly_when_interrupted(
+    mock_builder, mock_watcher, cli: FunctionType, tmp_path
+):
+    """Test the watch command exits without a traceback on Ctrl-C."""
+    mock_watcher.return_value.stream.side_effect = KeyboardInterrupt
+
+    result = cli(
+        [
+            "watch",
+            "--client-id",
+            "test_id",
+            "--client-secret",
+            "test_secret",
+            "--username",
+            "test_user",
+            "--password",
+            "test_password",
+            "--subreddit",
+            "mysubreddit",
+            "--checkpoint-file",
+            str(tmp_path / "checkpoints.json"),
+        ]
+    )
+
+    assert result.exit_code == 0
+    assert "Stopped watching" in result.output
+    assert result.exception is None
+
+
+def test_watch_serves_metrics(cli: FunctionType, tmp_path, monkeypatch):
+    """Test the watch command serves metrics while running and writes them once done."""
+    metrics_file = tmp_path / "reddit_topics.prom"
+    with FakeRedditServer(FakeReddit()).start() as server:
+        monkeypatch.setenv("REDDIT_BASE_URL", server.url)
+        result = cli(
+            [
+                "watch",
+                "--client-id",
+                "test_id",
+                "--client-secret",
+                "test_secret",
+                "--username",
+                "test_user",
+                "--password",
+                "test_password",
+                "--subreddit",
+                "mysubreddit",
+                "--checkpoint-file",
+                str(tmp_path / "checkpoints.json"),
+                "--rounds",
+                "1",
+                "--output",
+                str(tmp_path / "topics.txt"),
+                "--metrics-port",
+                "0",
+                "--metrics-file",
+                str(metrics_file),
+            ]
+        )
+
+    assert result.exit_code == 0, result.output
+    assert "Serving metrics on http://127.0.0.1:" in result.output
+    assert 'reddit_topics_requests_total{endpoint="auth"} 1' in (
+        metrics_file.read_text()
+    )
@@ -22,6 +22,7 @@ def clear_env_vars() -> None:
     os.environ.pop("REDDIT_USERNAME", None)
     os.environ.pop("REDDIT_PASSWORD", None)
     os.environ.pop("REDDIT_USER_AGENT", None)
+    os.environ.pop("REDDIT_BASE_URL", None)
 
 
 def pytest_report_header(config: pytest.Config):
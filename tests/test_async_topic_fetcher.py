@@ -0,0 +1,294 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from reddit_topics_aggregator.async_topic_fetcher import AsyncTopicFetcher
+from reddit_topics_aggregator.checkpoints import (
+    CheckpointStore,
+    ListingCheckpoints,
+)
+from reddit_topics_aggregator.pipeline import FLUSH
+from reddit_topics_aggregator.response_cache import ResponseCache
+from reddit_topics_aggregator.topic_fetcher import LISTINGS, TopicFetcher
+
+LIMITS = {"hot": 2, "new": 2, "rising": 0, "top": 3}
+
+
+class FakeListing:
+    def __init__(self, items, delay):
+        self.items = items
+        self.delay = delay
+
+    async def __aiter__(self):
+        await asyncio.sleep(self.delay)
+        for item in self.items:
+            yield item
+
+
+class FakeAsyncSubreddit:
+    def __init__(self, name, delay=0):
+        self.display_name = name
+        self.delay = delay
+        self.loaded = False
+
+    async def load(self):
+        self.loaded = True
+        self.title = f"{self.display_name} title"
+
+    def __getattr__(self, listing):
+        if listing not in LISTINGS:
+            raise AttributeError(listing)
+
+        def fetch(limit):
+            items = [
+                SimpleNamespace(id=f"{self.display_name}-{listing}-{i}")
+                for i in range(limit)
+            ]
+            return FakeListing(items, self.delay)
+
+        return fetch
+
+
+class FakeAsyncReddit:
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.closed = False
+        self.in_flight = 0
+        self.peak = 0
+        self.info_requests = []
+
+    async def subreddit(self, name):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delays.get(name, 0))
+        self.in_flight -= 1
+        return FakeAsyncSubreddit(name)
+
+    async def info(self, subreddits):
+        self.info_requests.append(subreddits)
+        for name in subreddits:
+            subreddit = FakeAsyncSubreddit(name)
+            await subreddit.load()
+            yield subreddit
+
+    async def close(self):
+        self.closed = True
+
+
+def sync_reddit_client():
+    def subreddit(name):
+        mock_subreddit = MagicMock()
+        mock_subreddit.display_name = name
+        mock_subreddit.title = f"{name} title"
+        for listing in LISTINGS:
+            getattr(mock_subreddit, listing).side_effect = (
+                lambda limit, name=name, listing=listing: [
+                    SimpleNamespace(id=f"{name}-{listing}-{i}")
+                    for i in range(limit)
+                ]
+            )
+        return mock_subreddit
+
+    mock_reddit_client = MagicMock()
+    mock_reddit_client.subreddit.side_effect = subreddit
+    return mock_reddit_client
+
+
+def test_fetch_topics_async_matches_sync():
+    """Test that the async engine produces the same results as the sync one."""
+    names = [f"sub{i}" for i in range(8)]
+    delays = {name: 0.001 * (8 - i) for i, name in enumerate(names)}
+    reddit_client = FakeAsyncReddit(delays)
+
+    results = list(
+        AsyncTopicFetcher(LIMITS).fetch_topics_async(
+            lambda: reddit_client, names, concurrency=4
+        )
+    )
+
+    assert [
+        (*entry[:4], entry.submission.id)
+        for result in results
+        for entry in result.entries()
+    ] == [
+        (*entry[:4], entry.submission.id)
+        for entry in TopicFetcher(LIMITS).stream_topics(
+            sync_reddit_client(), names
+        )
+        if entry is not FLUSH
+    ]
+    assert reddit_client.closed
+
+
+def test_fetch_topics_async_bounds_concurrency():
+    """Test that no more than ``concurrency`` subreddits are in flight."""
+    names = [f"sub{i}" for i in range(10)]
+    reddit_client = FakeAsyncReddit({name: 0.001 for name in names})
+
+    list(
+        AsyncTopicFetcher(LIMITS).fetch_topics_async(
+            lambda: reddit_client, names, concurrency=3
+        )
+    )
+
+    assert reddit_client.peak == 3
+
+
+def test_fetch_topics_async_closes_client_when_abandoned():
+    """Test that the client is closed when iteration stops early."""
+    reddit_client = FakeAsyncReddit()
+    results = AsyncTopicFetcher(LIMITS).fetch_topics_async(
+        lambda: reddit_client, ["a", "b"]
+    )
+
+    next(results)
+    results.close()
+
+    assert reddit_client.closed
+
+
+def test_fetch_topics_async_uses_rate_limiter():
+    """Test that every async request is paid for through the rate limiter."""
+    paid = []
+
+    class FakeRateLimiter:
+        async def acquire_async(self, tokens=1):
+            paid.append(tokens)
+            return 0.0
+
+    list(
+        AsyncTopicFetcher(LIMITS, FakeRateLimiter()).fetch_topics_async(
+            FakeAsyncReddit, ["a"]
+        )
+    )
+
+    assert sorted(paid) == [1, 1, 1, 1]
+
+
+def test_fetch_listing_async_pays_for_fetched_pages_only():
+    """Test that pages are paid for as they are requested, not up front."""
+    paid = []
+
+    class FakeRateLimiter:
+        async def acquire_async(self, tokens=1):
+            paid.append(tokens)
+            return 0.0
+
+    class Subreddit:
+        display_name = "a"
+
+        def new(self, limit):
+            items = [SimpleNamespace(id=f"a-new-{i}") for i in range(150)]
+            return FakeListing(items, 0)
+
+    topics = asyncio.run(
+        AsyncTopicFetcher(LIMITS, FakeRateLimiter()).fetch_listing_async(
+            Subreddit(), "new", 1000
+        )
+    )
+
+    assert len(topics) == 150
+    assert paid == [1, 1]
+
+
+def test_fetch_topics_async_propagates_errors():
+    """Test that an error raised on the event loop reaches the caller."""
+
+    class BrokenReddit(FakeAsyncReddit):
+        async def subreddit(self, name):
+            raise ValueError("boom")
+
+    reddit_client = BrokenReddit()
+
+    with pytest.raises(ValueError, match="boom"):
+        list(
+            AsyncTopicFetcher(LIMITS).fetch_topics_async(
+                lambda: reddit_client, ["a"]
+            )
+        )
+    assert reddit_client.closed
+
+
+def test_fetch_topics_async_serves_cache_hits(tmp_path):
+    """Test that the async engine reads and writes the response cache."""
+    with ResponseCache(tmp_path) as cache:
+        first = list(
+            AsyncTopicFetcher(LIMITS, cache=cache).fetch_topics_async(
+                FakeAsyncReddit, ["a"]
+            )
+        )
+
+        class OfflineReddit(FakeAsyncReddit):
+            async def subreddit(self, name):
+                subreddit = await super().subreddit(name)
+                subreddit.load = None
+                subreddit.__dict__["hot"] = None
+                return subreddit
+
+            def info(self, subreddits):
+                raise AssertionError("metadata should come from the cache")
+
+        second = list(
+            AsyncTopicFetcher(LIMITS, cache=cache).fetch_topics_async(
+                OfflineReddit, ["a"]
+            )
+        )
+
+    assert second[0].title == first[0].title
+    assert [entry.submission.id for entry in second[0].entries()] == [
+        entry.submission.id for entry in first[0].entries()
+    ]
+
+
+def test_fetch_topics_async_prefetches_metadata():
+    """Test that subreddit metadata is looked up in one request, not per subreddit."""
+    names = [f"sub{i}" for i in range(5)]
+    reddit_client = FakeAsyncReddit()
+
+    results = list(
+        AsyncTopicFetcher(LIMITS).fetch_topics_async(
+            lambda: reddit_client, names
+        )
+    )
+
+    assert reddit_client.info_requests == [names]
+    assert [result.title for result in results] == [
+        f"{name} title" for name in names
+    ]
+
+
+def test_fetch_listing_async_refetches_when_checkpoint_was_deleted(tmp_path):
+    """Test that an empty page before a deleted checkpoint falls back to ``new``."""
+    store = CheckpointStore(tmp_path / "checkpoints.json")
+    store.save(
+        {
+            "a/new": {
+                "fullname": "t3_gone",
+                "created_utc": 0,
+                "seen": ["a-new-1"],
+            }
+        }
+    )
+    requests = []
+
+    class Subreddit:
+        display_name = "a"
+
+        def new(self, limit, params=None):
+            requests.append(params)
+            items = [
+                SimpleNamespace(id="a-new-new", created_utc=1),
+                SimpleNamespace(id="a-new-1", created_utc=0),
+            ]
+            return FakeListing([] if params else items, 0)
+
+    topics = asyncio.run(
+        AsyncTopicFetcher(
+            LIMITS, checkpoints=ListingCheckpoints(store)
+        ).fetch_listing_async(Subreddit(), "new", 2)
+    )
+
+    assert requests == [{"before": "t3_gone"}, None]
+    assert [topic.id for topic in topics] == ["a-new-new"]
@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+
+from reddit_topics_aggregator.checkpoints import (
+    CheckpointStore,
+    ListingCheckpoints,
+    checkpoint_key,
+)
+
+
+def submission(id, created_utc):
+    return SimpleNamespace(id=id, created_utc=created_utc)
+
+
+def ids(topics):
+    return [topic.id for topic in topics]
+
+
+def test_store_keeps_listings_not_saved_again(tmp_path):
+    """Test that saving merges with the checkpoints already stored."""
+    store = CheckpointStore(tmp_path / "checkpoints.json")
+    store.save({"a/new": {"fullname": "t3_a"}})
+    store.save({"b/new": {"fullname": "t3_b"}})
+
+    assert set(store.load()) == {"a/new", "b/new"}
+
+
+def test_first_run_yields_everything(tmp_path):
+    """Test that a listing without a checkpoint is not filtered."""
+    checkpoints = ListingCheckpoints(CheckpointStore(tmp_path / "c.json"))
+    topics = [submission("b", 20), submission("a", 10)]
+
+    assert ids(checkpoints.unseen("Sub", "new", topics)) == ["b", "a"]
+    assert checkpoints.current[checkpoint_key("sub", "new")] == {
+        "fullname": "t3_b",
+        "created_utc": 20,
+        "seen": ["b", "a"],
+    }
+    assert checkpoints.before("sub", "new") is None
+
+
+def test_chronological_listing_stops_at_checkpoint(tmp_path):
+    """Test that ``new`` stops at the first submission seen by the last run."""
+    store = CheckpointStore(tmp_path / "c.json")
+    first = ListingCheckpoints(store)
+    list(first.unseen("sub", "new", [submission("b", 20), submission("a", 10)]))
+    first.save()
+
+    second = ListingCheckpoints(store)
+    consumed = []
+
+    def listing():
+        for topic in [submission("c", 30), submission("b", 20)]:
+            consumed.append(topic.id)
+            yield topic
+        raise AssertionError("read past the checkpoint")
+
+    assert second.before("sub", "new") == "t3_b"
+    assert ids(second.unseen("sub", "new", listing())) == ["c"]
+    assert consumed == ["c", "b"]
+    assert second.current["sub/new"]["fullname"] == "t3_c"
+
+
+def test_other_listings_skip_seen_ids(tmp_path):
+    """Test that ``hot`` only yields ids the last run did not fetch."""
+    store = CheckpointStore(tmp_path / "c.json")
+    first = ListingCheckpoints(store)
+    list(first.unseen("sub", "hot", [submission("a", 10)]))
+    first.save()
+
+    second = ListingCheckpoints(store)
+    topics = [submission("a", 10), submission("b", 5)]
+
+    assert second.before("sub", "hot") is None
+    assert ids(second.unseen("sub", "hot", topics)) == ["b"]
+    assert second.current["sub/hot"]["seen"] == ["a", "b"]
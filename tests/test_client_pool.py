@@ -0,0 +1,146 @@
+import json
+
+import pytest
+
+from reddit_topics_aggregator.fake_reddit import FakeReddit, FakeRedditServer
+from reddit_topics_aggregator.rate_limiter import RateLimiter
+from reddit_topics_aggregator.reddit_client_builder import (
+    RedditClientBuilder,
+    credential_sets,
+    credentials_from_env,
+    load_credentials,
+)
+from reddit_topics_aggregator.topic_fetcher import TopicFetcher
+
+
+def credentials(client_id):
+    return {
+        "client_id": client_id,
+        "client_secret": "secret",
+        "username": "user",
+        "password": "password",
+    }
+
+
+def build_pool(server, client_ids, **pool_options):
+    return RedditClientBuilder.from_args(base_url=server.url).build_pool(
+        [credentials(client_id) for client_id in client_ids], **pool_options
+    )
+
+
+def test_load_credentials(tmp_path):
+    """Test that credential sets are read from a JSON list."""
+    path = tmp_path / "credentials.json"
+    path.write_text(json.dumps([credentials("a"), credentials("b")]))
+
+    assert load_credentials(str(path)) == [credentials("a"), credentials("b")]
+    assert credential_sets(str(path)) == load_credentials(str(path))
+
+
+@pytest.mark.parametrize(
+    ("content", "error"),
+    [
+        ("[", "Cannot read credentials file"),
+        ("{}", "must hold a list"),
+        (
+            '[{"client_id": "a"}]',
+            "Credential set 1 .* is missing: client_secret",
+        ),
+    ],
+)
+def test_load_invalid_credentials(tmp_path, content, error):
+    """Test that unreadable or incomplete credential sets are reported."""
+    path = tmp_path / "credentials.json"
+    path.write_text(content)
+
+    with pytest.raises(ValueError, match=error):
+        load_credentials(str(path))
+
+
+def test_credentials_from_env():
+    """Test that numbered variables list credential sets until one is missing."""
+    environ = {
+        "REDDIT_CLIENT_ID_1": "a",
+        "REDDIT_CLIENT_SECRET_1": "secret",
+        "REDDIT_USERNAME_1": "user",
+        "REDDIT_PASSWORD_1": "password",
+        "REDDIT_CLIENT_ID_2": "b",
+        "REDDIT_CLIENT_ID_4": "d",
+    }
+
+    with pytest.raises(ValueError, match="Credential set 2 .* is missing"):
+        credentials_from_env(environ)
+    environ.update(
+        REDDIT_CLIENT_SECRET_2="secret",
+        REDDIT_USERNAME_2="user",
+        REDDIT_PASSWORD_2="password",
+    )
+    assert credentials_from_env(environ) == [credentials("a"), credentials("b")]
+    assert credentials_from_env({}) == []
+
+
+def test_select_prefers_the_least_loaded_credentials():
+    """Test that a spent budget steers requests to the other credentials."""
+    builder = RedditClientBuilder()
+    pool = builder.build_pool([credentials("a"), credentials("b")])
+    first, second = pool.members
+
+    assert [pool.select(), pool.select()] == [first, second]
+    first.rate_limiter.observe(
+        {
+            "x-ratelimit-remaining": "1",
+            "x-ratelimit-used": "999",
+            "x-ratelimit-reset": "60",
+        }
+    )
+    assert [pool.select(), pool.select()] == [second, second]
+
+
+def test_requests_spread_over_every_credential_set():
+    """Test that fetching through a pool spends the budget of every credential set."""
+    # A budget large enough that the rate limiters do not slow the test
+    fake = FakeReddit(requests_per_window=100_000)
+    limits = {"hot": 5, "new": 5, "rising": 0, "top": 5}
+    names = [f"sub{index}" for index in range(12)]
+
+    with FakeRedditServer(fake).start() as server:
+        pool = build_pool(server, ["a", "b", "c"], requests_per_minute=6000)
+        fetched = [
+            entry
+            for entry in TopicFetcher(limits, RateLimiter(18000)).stream_topics(
+                pool, names, concurrency=4
+            )
+            if isinstance(entry, tuple)
+        ]
+
+    assert len(fetched) == 12 * 15
+    assert all(
+        member.rate_limiter.state().requests > 0 for member in pool.members
+    )
+
+
+def test_refused_credentials_are_dropped():
+    """Test that credentials Reddit refuses are dropped, and the others kept."""
+    dropped = []
+
+    with FakeRedditServer(
+        FakeReddit(refused_client_ids={"b"})
+    ).start() as server:
+        pool = build_pool(server, ["a", "b"], on_drop=dropped.append).check()
+        title = pool.subreddit("python").title
+
+    assert [member.name for member in pool.members] == ["a/user"]
+    assert [member.name for member in dropped] == ["b/user"]
+    assert "401" in dropped[0].error
+    assert title == "python title"
+
+
+def test_every_refused_credential_set_fails():
+    """Test that a pool left without credentials raises a configuration error."""
+    fake = FakeReddit(refused_client_ids={"a", "b"})
+
+    with (
+        FakeRedditServer(fake).start() as server,
+        pytest.raises(ValueError, match="refused every credential set"),
+    ):
+        build_pool(server, ["a", "b"]).check()
@@ -0,0 +1,100 @@
+import pytest
+
+from reddit_topics_aggregator.clustering import (
+    NearDuplicateClusterer,
+    normalized_url,
+    shingles,
+)
+from reddit_topics_aggregator.pipeline import FLUSH
+from reddit_topics_aggregator.records import TopicRecord
+
+
+def record(subreddit, id, title, url=None):
+    return TopicRecord(subreddit, subreddit, "hot", 1, id, title, url)
+
+
+def test_normalized_url_ignores_scheme_and_self_posts():
+    """Test that links differing in scheme or trailing slash are the same."""
+    assert normalized_url("https://www.example.com/story/") == (
+        "example.com/story"
+    )
+    assert normalized_url("http://example.com/story?ref=x") == (
+        "example.com/story"
+    )
+    assert normalized_url("https://www.reddit.com/r/a/comments/1/x/") is None
+    assert normalized_url(None) is None
+
+
+def test_shingles():
+    """Test that a record is described by its title's word pairs and its link."""
+    assert shingles(record("a", "1", "Big News!", "https://x.org/n")) == {
+        "big news",
+        "x.org/n",
+    }
+    assert shingles(record("a", "1", "News")) == {"news"}
+    assert shingles(record("a", "1", "")) == set()
+
+
+def test_clusters_group_similar_titles_only():
+    """Test that similar titles are grouped, and different ones are not."""
+    records = [
+        record("a", "1", "NASA confirms water ice found on the Moon surface"),
+        record("b", "2", "Unrelated post about baking sourdough bread"),
+        record("c", "3", "NASA confirms water ice found on the Moon's surface"),
+        record("d", "4", "NASA confirms water ice found on Moon surface today"),
+    ]
+
+    clusters = NearDuplicateClusterer().clusters(records)
+
+    assert [[member.id for member in cluster] for cluster in clusters] == [
+        ["1", "3", "4"],
+        ["2"],
+    ]
+
+
+def test_clusters_group_shared_links():
+    """Test that posts of the same link under different titles are grouped."""
+    records = [
+        record("a", "1", "Wow", "https://example.com/story"),
+        record("b", "2", "Wow", "http://www.example.com/story/"),
+        record("c", "3", "Wow", "https://example.com/other"),
+    ]
+
+    clusters = NearDuplicateClusterer().clusters(records)
+
+    assert [[member.id for member in cluster] for cluster in clusters] == [
+        ["1", "2"],
+        ["3"],
+    ]
+
+
+def test_deduplicate_lists_every_member_subreddit():
+    """Test that a cluster is yielded once, with the appearances of its members."""
+    records = [
+        record("a", "1", "Rust 1.80 released with lazy statics"),
+        FLUSH,
+        record("b", "2", "Rust 1.80 released with lazy statics!"),
+        record("b", "3", "Something else entirely"),
+    ]
+
+    merged = list(NearDuplicateClusterer().deduplicate(records))
+
+    assert [record.id for record in merged] == ["1", "3"]
+    assert merged[0].subreddits == ["a", "b"]
+    assert merged[1].appearances == (("b", "hot", 1),)
+
+
+def test_signatures_match_with_and_without_numpy():
+    """Test that the vectorized signatures are those computed one by one."""
+    pytest.importorskip("numpy")
+    records = [
+        record("a", "1", "Rust 1.80 released"),
+        record("a", "2", ""),
+        record("b", "3", "Another story", "https://example.com/x"),
+    ]
+    clusterer = NearDuplicateClusterer()
+
+    assert clusterer.signatures(records) == [
+        clusterer.signature(record) for record in records
+    ]
+    assert clusterer.signatures(records)[1] is None
@@ -0,0 +1,133 @@
+from praw.models import Submission
+
+from reddit_topics_aggregator.deduplication import (
+    TopicDeduplicator,
+    record_key,
+)
+from reddit_topics_aggregator.pipeline import FLUSH, format_appearances
+from reddit_topics_aggregator.records import TopicRecord, submission_fields
+
+
+def record(id, subreddit="sub", listing="hot", rank=1, **data):
+    return TopicRecord(subreddit, "", listing, rank, id=id, **data)
+
+
+def test_merge_within_subreddit():
+    """Test that a submission in several listings is merged into one record."""
+    deduplicator = TopicDeduplicator()
+
+    merged = deduplicator.merge(
+        [
+            record("a", listing="hot", rank=1),
+            record("b", listing="hot", rank=2),
+            record("c", listing="rising", rank=1),
+            record("a", listing="rising", rank=2),
+            record("b", listing="top", rank=1),
+            record("a", listing="top", rank=2),
+        ]
+    )
+
+    assert [merged_record.id for merged_record in merged] == ["a", "b", "c"]
+    assert merged[0].ranks == {"hot": 1, "rising": 2, "top": 2}
+    assert merged[0].listings == ["hot", "rising", "top"]
+    assert merged[1].ranks == {"hot": 2, "top": 1}
+    assert format_appearances(merged[0]) == "hot #1, rising #2, top #2"
+
+
+def test_merge_per_subreddit_keeps_subreddits_apart():
+    """Test that the same id is not merged across subreddits by default."""
+    deduplicator = TopicDeduplicator()
+
+    first = deduplicator.merge([record("a", subreddit="one")])
+    second = deduplicator.merge([record("a", subreddit="two")])
+
+    assert len(first) == len(second) == 1
+
+
+def test_merge_across_subreddits_merges_crossposts():
+    """Test that crossposts are merged with their original when global."""
+    deduplicator = TopicDeduplicator(across_subreddits=True)
+
+    merged = deduplicator.merge(
+        [
+            record("a", subreddit="one"),
+            record(
+                "x", subreddit="two", listing="new", crosspost_parent="t3_a"
+            ),
+        ]
+    )
+
+    assert len(merged) == 1
+    assert merged[0].subreddits == ["one", "two"]
+    assert merged[0].ranks == {"hot": 1}
+    assert format_appearances(merged[0]) == "hot #1, new #1 (r/two)"
+
+
+def test_add_reports_first_appearance():
+    """Test that add() returns the record merged so far for every appearance."""
+    deduplicator = TopicDeduplicator()
+
+    merged, is_new = deduplicator.add(record("a", listing="hot", rank=1))
+    again, is_new_again = deduplicator.add(record("a", listing="top", rank=4))
+
+    assert is_new and not is_new_again
+    # Records are immutable, so the first one is left as it was
+    assert merged.ranks == {"hot": 1}
+    assert again.ranks == {"hot": 1, "top": 4}
+
+
+def test_deduplicate_emits_each_subreddit_once_complete():
+    """Test that a subreddit's records are held back until all its listings are in."""
+    deduplicator = TopicDeduplicator()
+    stream = [
+        record("a", subreddit="one", listing="hot"),
+        FLUSH,
+        record("a", subreddit="one", listing="top"),
+        record("b", subreddit="two"),
+    ]
+
+    output = list(deduplicator.deduplicate(stream))
+
+    assert [item if item is FLUSH else item.id for item in output] == [
+        "a",
+        FLUSH,
+        "b",
+    ]
+    assert output[0].listings == ["hot", "top"]
+
+
+def test_record_key_does_not_fetch_praw_submission():
+    """Test that reading the crosspost parent never triggers a lazy fetch."""
+    praw_submission = Submission(reddit="praw.Reddit", _data={"id": "abc"})
+    normalized = TopicRecord(
+        "sub", "", "hot", 1, **submission_fields(praw_submission)
+    )
+
+    assert record_key(normalized, across_subreddits=True) == "abc"
+
+
+def test_deduplicate_across_subreddits_waits_for_crossposts():
+    """Test that a crosspost in a later subreddit is part of the streamed record."""
+    deduplicator = TopicDeduplicator(across_subreddits=True)
+    stream = [
+        record("x", subreddit="a"),
+        FLUSH,
+        record("y", subreddit="b", listing="new", crosspost_parent="t3_x"),
+    ]
+
+    (merged,) = deduplicator.deduplicate(stream)
+
+    assert merged.subreddits == ["a", "b"]
+    assert format_appearances(merged) == "hot #1, new #1 (r/b)"
+
+
+def test_deduplicate_per_subreddit_forgets_finished_subreddits():
+    """Test that only the records of the current subreddit are kept in memory."""
+    deduplicator = TopicDeduplicator()
+    stream = deduplicator.deduplicate(
+        [record("a", subreddit="one"), record("b", subreddit="two")]
+    )
+
+    assert next(stream).id == "a"
+    assert next(stream) is FLUSH
+    assert len(deduplicator._merged) == 0
@@ -0,0 +1,222 @@
+import pytest
+from click.testing import CliRunner
+
+from reddit_topics_aggregator.cli import reddit_topics_aggregator
+from reddit_topics_aggregator.fake_reddit import (
+    MAX_LISTING_SIZE,
+    FakeReddit,
+    FakeRedditServer,
+)
+from reddit_topics_aggregator.rate_limiter import RateLimiter
+from reddit_topics_aggregator.reddit_client_builder import (
+    RedditClientBuilder,
+    ThreadLocalReddit,
+)
+from reddit_topics_aggregator.topic_fetcher import TopicFetcher
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def server():
+    with FakeRedditServer(FakeReddit()).start() as server:
+        yield server
+
+
+def authorized(fake):
+    """Return the headers of a request with a fresh access token."""
+    _, _, token = fake.respond("POST", "/api/v1/access_token", {})
+    return {"Authorization": f"bearer {token['access_token']}"}
+
+
+def listing_ids(fake, url, headers):
+    status, _, payload = fake.respond("GET", url, headers)
+    assert status == 200
+    return [child["data"]["id"] for child in payload["data"]["children"]]
+
+
+def test_praw_pages_through_listings(server):
+    """Test that a praw client built with a base URL pages through listings."""
+    reddit_client = RedditClientBuilder.from_args(
+        "id", "secret", "user", "password", base_url=server.url
+    ).build()
+
+    submissions = list(reddit_client.subreddit("python").hot(limit=250))
+
+    assert len({submission.id for submission in submissions}) == 250
+    assert {str(submission.subreddit) for submission in submissions} == {
+        "python"
+    }
+    # A token request, then three pages of at most 100
+    assert server.fake.requests == 4
+
+
+def test_fetcher_runs_against_the_server():
+    """Test fetching many subreddits concurrently through the fake server."""
+    # A budget large enough that the rate limiter does not slow the test
+    fake = FakeReddit(requests_per_window=100_000)
+    builder = RedditClientBuilder.from_args("id", "secret", "user", "password")
+    limits = {"hot": 5, "new": 5, "rising": 0, "top": 5}
+    names = [f"sub{index}" for index in range(20)]
+
+    with FakeRedditServer(fake).start() as server:
+        builder.set_base_url(server.url)
+        fetched = [
+            entry
+            for entry in TopicFetcher(limits, RateLimiter(6000)).stream_topics(
+                ThreadLocalReddit(builder.build), names, concurrency=4
+            )
+            if isinstance(entry, tuple)
+        ]
+
+    assert len(fetched) == 20 * 15
+    assert {entry[1] for entry in fetched} == {
+        f"{name} title" for name in names
+    }
+
+
+def test_after_and_before_page_like_reddit():
+    """Test that ``after`` continues past a submission and ``before`` up to it."""
+    fake = FakeReddit()
+    headers = authorized(fake)
+    first = listing_ids(fake, "/r/python/new?limit=10", headers)
+
+    after = listing_ids(
+        fake, f"/r/python/new?limit=3&after=t3_{first[4]}", headers
+    )
+    before = listing_ids(
+        fake, f"/r/python/new?limit=3&before=t3_{first[4]}", headers
+    )
+
+    assert after == first[5:8]
+    assert before == first[1:4]
+
+
+def test_combined_listings_take_turns():
+    """Test that a combined listing interleaves its subreddits and pages on."""
+    fake = FakeReddit()
+    headers = authorized(fake)
+    first = listing_ids(fake, "/r/a+b/hot?limit=4", headers)
+    _, _, page = fake.respond("GET", "/r/a+b/hot?limit=4", headers)
+
+    following = listing_ids(
+        fake, f"/r/a+b/hot?limit=4&after=t3_{first[-1]}", headers
+    )
+
+    assert [
+        child["data"]["subreddit"] for child in page["data"]["children"]
+    ] == ["a", "b", "a", "b"]
+    assert not set(first) & set(following)
+    assert listing_ids(fake, "/r/a/hot?limit=2", headers) == first[::2]
+
+
+def test_listings_end_after_the_maximum_size():
+    """Test that the last page of a listing has no ``after``."""
+    fake = FakeReddit()
+    headers = authorized(fake)
+    last = listing_ids(fake, "/r/python/top?limit=100", headers)[-1]
+    for _ in range(MAX_LISTING_SIZE // 100 - 2):
+        last = listing_ids(
+            fake, f"/r/python/top?limit=100&after=t3_{last}", headers
+        )[-1]
+
+    _, _, payload = fake.respond(
+        "GET", f"/r/python/top?limit=100&after=t3_{last}", headers
+    )
+
+    assert payload["data"]["dist"] == 100
+    assert payload["data"]["after"] is None
+
+
+def test_new_listings_grow_over_time():
+    """Test that submissions posted since a checkpoint are listed before it."""
+    clock = FakeClock()
+    fake = FakeReddit(posts_per_minute=2, clock=clock, sleep=clock.sleep)
+    headers = authorized(fake)
+    newest = listing_ids(fake, "/r/python/new?limit=1", headers)[0]
+
+    clock.now += 90
+
+    listed = listing_ids(fake, "/r/python/new?limit=5", headers)
+    since = listing_ids(
+        fake, f"/r/python/new?limit=5&before=t3_{newest}", headers
+    )
+
+    assert listed[3] == newest
+    assert since == listed[:3]
+
+
+def test_rate_limit_headers_and_refusals():
+    """Test that every token gets a budget per window, refused once spent."""
+    clock = FakeClock()
+    fake = FakeReddit(requests_per_window=2, clock=clock, sleep=clock.sleep)
+    headers = authorized(fake)
+
+    statuses = [
+        fake.respond("GET", "/api/v1/me", headers)[:2] for _ in range(3)
+    ]
+    clock.now += 600
+
+    assert [status for status, _ in statuses] == [200, 200, 429]
+    assert statuses[0][1]["x-ratelimit-remaining"] == "1.0"
+    assert statuses[0][1]["x-ratelimit-reset"] == "600"
+    assert statuses[2][1]["x-ratelimit-used"] == "2"
+    assert fake.respond("GET", "/api/v1/me", headers)[0] == 200
+
+
+def test_injected_errors_and_latency():
+    """Test that requests are delayed and fail at the configured rate."""
+    clock = FakeClock()
+    fake = FakeReddit(
+        latency=0.5, error_rate=1.0, clock=clock, sleep=clock.sleep
+    )
+    headers = authorized(fake)
+    started = clock.now
+
+    status, _, payload = fake.respond("GET", "/r/python/hot", headers)
+
+    assert status == 503
+    assert payload["error"] == 503
+    assert fake.errors == 1
+    assert clock.now - started == 0.5
+
+
+def test_unknown_tokens_and_paths():
+    """Test that unauthorized requests and unknown endpoints are refused."""
+    fake = FakeReddit()
+    headers = authorized(fake)
+
+    assert fake.respond("GET", "/api/v1/me", {})[0] == 401
+    assert fake.respond("GET", "/r/python/gilded", headers)[0] == 404
+
+
+def test_cli_against_the_server(server, monkeypatch):
+    """Test that the CLI reaches the server through REDDIT_BASE_URL."""
+    monkeypatch.setenv("REDDIT_BASE_URL", server.url)
+
+    result = CliRunner().invoke(
+        reddit_topics_aggregator,
+        [
+            "connect",
+            "--client-id",
+            "id",
+            "--client-secret",
+            "secret",
+            "--username",
+            "user",
+            "--password",
+            "password",
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Authenticated as: fake_user" in result.output
@@ -0,0 +1,96 @@
+import socket
+
+import pytest
+import requests
+
+from reddit_topics_aggregator.fake_reddit import FakeReddit, FakeRedditServer
+from reddit_topics_aggregator.http_session import (
+    PooledSession,
+    shared_session,
+)
+from reddit_topics_aggregator.rate_limiter import RateLimiter
+from reddit_topics_aggregator.reddit_client_builder import (
+    RedditClientBuilder,
+    ThreadLocalReddit,
+)
+from reddit_topics_aggregator.topic_fetcher import TopicFetcher
+
+
+class CountingServer(FakeRedditServer):
+    connections = 0
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+
+def test_shared_session_per_options_and_user_agent():
+    """Test that a session is created once per options and user agent."""
+    session = shared_session("agent", pool_size=2)
+
+    assert shared_session("agent", pool_size=2) is session
+    assert shared_session("other agent", pool_size=2) is not session
+    assert shared_session("agent", pool_size=3) is not session
+
+
+def test_pool_blocks_for_a_free_connection():
+    """Test that the pool is sized as asked and never opens extra connections."""
+    adapter = PooledSession(pool_size=5).get_adapter("https://oauth.reddit.com")
+    pool = adapter.poolmanager.connection_from_url("https://oauth.reddit.com")
+
+    assert pool.pool.maxsize == 5
+    assert pool.block
+    assert (
+        socket.SOL_SOCKET,
+        socket.SO_KEEPALIVE,
+        1,
+    ) in adapter.poolmanager.connection_pool_kw["socket_options"]
+
+
+def test_headers_without_keep_alive_or_gzip():
+    """Test that connections can be closed after every response, uncompressed."""
+    session = PooledSession(keep_alive=None, gzip=False)
+
+    assert session.headers["Connection"] == "close"
+    assert session.headers["Accept-Encoding"] == "identity"
+
+
+def test_requests_time_out_whatever_the_caller_asks():
+    """Test that the read timeout of the session applies to every request."""
+    with FakeRedditServer(FakeReddit(latency=0.5)).start() as server:
+        session = PooledSession(read_timeout=0.1)
+
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            session.request(
+                "POST", f"{server.url}/api/v1/access_token", timeout=16
+            )
+
+
+def test_workers_reuse_pooled_connections():
+    """Test that concurrent workers keep reusing the connections of the pool."""
+    # A budget large enough that the rate limiter does not slow the test
+    fake = FakeReddit(requests_per_window=100_000)
+    limits = {"hot": 5, "new": 5, "rising": 0, "top": 5}
+    names = [f"sub{index}" for index in range(20)]
+
+    built = []
+
+    with CountingServer(fake).start() as server:
+        builder = RedditClientBuilder.from_args(
+            "id", "secret", "user", "password", base_url=server.url
+        ).set_session(PooledSession(pool_size=4))
+
+        def build_client():
+            built.append(None)
+            return builder.build()
+
+        fetched = list(
+            TopicFetcher(limits, RateLimiter(6000)).stream_topics(
+                ThreadLocalReddit(build_client), names, concurrency=4
+            )
+        )
+
+    assert len(fetched) > 20 * 3
+    assert fake.requests > 20 * 3
+    # prawcore closes the connection of every token request
+    assert server.connections <= 4 + len(built)
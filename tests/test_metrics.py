@@ -0,0 +1,173 @@
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+
+import pytest
+
+from reddit_topics_aggregator.fake_reddit import FakeReddit, FakeRedditServer
+from reddit_topics_aggregator.metrics import (
+    CONTENT_TYPE,
+    NO_METRICS,
+    Metrics,
+    MetricsServer,
+    format_labels,
+)
+from reddit_topics_aggregator.reddit_client_builder import RedditClientBuilder
+from reddit_topics_aggregator.response_cache import ResponseCache
+from reddit_topics_aggregator.topic_fetcher import TopicFetcher
+
+
+def response(status_code=200, content=b"{}", headers=None):
+    return SimpleNamespace(
+        status_code=status_code, content=content, headers=headers or {}
+    )
+
+
+def test_render_counters_gauges_and_histograms():
+    """Test the OpenMetrics text of every kind of metric."""
+    metrics = Metrics()
+    metrics.observe_response(
+        "listing_page",
+        response(
+            content=b"x" * 10,
+            headers={
+                "x-ratelimit-remaining": "99.0",
+                "x-ratelimit-reset": "30",
+            },
+        ),
+        0.2,
+    )
+    metrics.observe_wait(1.5)
+
+    lines = metrics.render().splitlines()
+
+    assert "# TYPE reddit_topics_requests counter" in lines
+    assert 'reddit_topics_requests_total{endpoint="listing_page"} 1' in lines
+    assert (
+        'reddit_topics_response_bytes_total{endpoint="listing_page"} 10'
+        in lines
+    )
+    assert "# TYPE reddit_topics_request_duration_seconds histogram" in lines
+    assert (
+        'reddit_topics_request_duration_seconds_bucket{endpoint="listing_page",le="0.1"} 0'
+        in lines
+    )
+    assert (
+        'reddit_topics_request_duration_seconds_bucket{endpoint="listing_page",le="0.25"} 1'
+        in lines
+    )
+    assert (
+        'reddit_topics_request_duration_seconds_bucket{endpoint="listing_page",le="+Inf"} 1'
+        in lines
+    )
+    assert (
+        'reddit_topics_request_duration_seconds_sum{endpoint="listing_page"} 0.2'
+        in lines
+    )
+    assert "reddit_topics_rate_limit_remaining 99" in lines
+    assert "reddit_topics_rate_limit_reset_seconds 30" in lines
+    assert "reddit_topics_rate_limit_wait_seconds_total 1.5" in lines
+    assert lines[-1] == "# EOF"
+
+
+def test_errors_are_counted_by_status():
+    """Test error responses, and requests that got no response at all."""
+    metrics = Metrics()
+
+    metrics.observe_response("about", response(status_code=429), 0.1)
+    metrics.observe_response("about", None, 0.1)
+
+    assert metrics.requests.value(endpoint="about") == 2
+    assert metrics.errors.value(endpoint="about", status=429) == 1
+    assert metrics.errors.value(endpoint="about", status="none") == 1
+
+
+def test_label_values_are_escaped():
+    """Test that quotes, backslashes and newlines cannot break a sample."""
+    assert format_labels([("path", 'a"b\\c\nd')]) == '{path="a\\"b\\\\c\\nd"}'
+
+
+def test_write_textfile(tmp_path):
+    """Test that metrics are written whole, leaving no temporary file behind."""
+    metrics = Metrics()
+    metrics.observe_cache("hot", hit=True)
+    path = tmp_path / "reddit_topics.prom"
+
+    metrics.write_textfile(path)
+
+    assert 'reddit_topics_cache_hits_total{kind="hot"} 1' in path.read_text()
+    assert [file.name for file in tmp_path.iterdir()] == ["reddit_topics.prom"]
+
+
+def test_metrics_server():
+    """Test that metrics are served on /metrics, and nothing else."""
+    metrics = Metrics()
+    metrics.observe_wait(2)
+    server = MetricsServer(metrics).start()
+    try:
+        with urllib.request.urlopen(server.url) as scraped:
+            body = scraped.read().decode()
+            content_type = scraped.headers["Content-Type"]
+        with pytest.raises(urllib.error.HTTPError, match="404"):
+            urllib.request.urlopen(server.url.replace("/metrics", "/other"))
+    finally:
+        server.stop()
+
+    assert content_type == CONTENT_TYPE
+    assert "reddit_topics_rate_limit_wait_seconds_total 2" in body
+
+
+def test_attach_counts_requests_of_a_client():
+    """Test requests, bytes and rate limit headroom counted through praw."""
+    metrics = Metrics()
+    with FakeRedditServer(FakeReddit()).start() as server:
+        reddit_client = metrics.attach(
+            RedditClientBuilder.from_args(
+                "id", "secret", "user", "password", base_url=server.url
+            ).build()
+        )
+        list(reddit_client.subreddit("python").hot(limit=150))
+
+    assert metrics.requests.value(endpoint="auth") == 1
+    assert metrics.requests.value(endpoint="listing_page") == 2
+    assert metrics.bytes.value(endpoint="listing_page") > 0
+    assert metrics.rate_limit_remaining.value() == 998
+
+
+def test_fetcher_counts_cache_lookups(tmp_path):
+    """Test that listing and metadata cache hits and misses are counted."""
+    metrics = Metrics()
+    subreddit = SimpleNamespace(
+        display_name="python",
+        title="Python",
+        subscribers=1,
+        over18=False,
+        created_utc=0,
+        hot=lambda limit: [SimpleNamespace(id="a", title="a")],
+    )
+    reddit_client = SimpleNamespace(
+        info=lambda subreddits: [subreddit], subreddit=lambda name: subreddit
+    )
+    limits = {"hot": 5}
+    with ResponseCache(tmp_path) as cache:
+        for _ in range(2):
+            list(
+                TopicFetcher(
+                    limits, cache=cache, metrics=metrics
+                ).stream_topics(reddit_client, ["python"])
+            )
+
+    assert metrics.cache_misses.value(kind="hot") == 1
+    assert metrics.cache_hits.value(kind="hot") == 1
+    assert metrics.cache_misses.value(kind="about") == 1
+    assert metrics.cache_hits.value(kind="about") == 1
+
+
+def test_no_metrics_passes_clients_through():
+    """Test that the stand-in counts nothing and leaves clients untouched."""
+    client = object()
+
+    NO_METRICS.observe_cache("hot", hit=True)
+    NO_METRICS.observe_wait(1)
+
+    assert NO_METRICS.attach(client) is client
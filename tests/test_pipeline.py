@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from reddit_topics_aggregator.pipeline import (
+    FLUSH,
+    OUTPUT_FIELDS,
+    BufferedOutput,
+    normalize,
+    render_csv,
+    render_jsonl,
+    render_msgpack,
+    render_text,
+    write_output,
+)
+from reddit_topics_aggregator.topic_fetcher import ListedSubmission
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def entry(id, listing="hot", rank=1):
+    submission = SimpleNamespace(
+        id=id, title=f"{id} title", url=f"https://{id}", selftext=f"{id} text"
+    )
+    return ListedSubmission("sub", "Sub", listing, rank, submission)
+
+
+def test_normalize_keeps_submission_fields_and_flushes():
+    """Test that entries become records and FLUSH markers pass through."""
+    records = list(normalize([entry("a", "top", 3), FLUSH]))
+
+    assert records[1] is FLUSH
+    assert (records[0].subreddit, records[0].listing, records[0].rank) == (
+        "sub",
+        "top",
+        3,
+    )
+    assert records[0].title == "a title"
+    assert records[0].score is None
+
+
+def test_render_text():
+    """Test that a record is rendered as the human readable block."""
+    (text,) = render_text(normalize([entry("a")]))
+
+    assert text == (
+        f"{'=' * 50}\n"
+        "Subreddit: r/sub (Sub)\n"
+        "Topic: a title\n"
+        "Topic URL: https://a\n"
+        "Content: a text\n\n"
+    )
+
+
+def test_buffered_output_writes_once_full():
+    """Test that chunks are held back until the buffer fills up."""
+    stream = CountingStream()
+    output = BufferedOutput(stream, buffer_size=10)
+
+    output.write("12345")
+    assert stream.writes == 0
+    output.write("67890")
+
+    assert stream.writes == 1
+    assert stream.getvalue() == "1234567890"
+
+
+def test_write_output_flushes_on_marker_and_at_end():
+    """Test that buffered chunks are written out on FLUSH and once done."""
+    stream = CountingStream()
+
+    write_output(["a", "b", FLUSH, "c"], BufferedOutput(stream))
+
+    assert stream.writes == 2
+    assert stream.getvalue() == "abc"
+
+
+def test_render_jsonl():
+    """Test that every record is a line of JSON with the output fields."""
+    lines = list(render_jsonl(normalize([entry("a"), FLUSH, entry("b")])))
+
+    assert lines[1] is FLUSH
+    first = json.loads(lines[0])
+    assert list(first) == list(OUTPUT_FIELDS)
+    assert (first["id"], first["listing"], first["rank"]) == ("a", "hot", 1)
+    assert first["appearances"] == []
+
+
+def test_render_csv():
+    """Test that a header is followed by one row per record."""
+    text = "".join(render_csv(normalize([entry("a"), entry("b", "top", 2)])))
+
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert [(row["id"], row["listing"], row["rank"]) for row in rows] == [
+        ("a", "hot", "1"),
+        ("b", "top", "2"),
+    ]
+    assert rows[0]["selftext"] == "a text"
+
+
+def test_render_msgpack():
+    """Test that records can be unpacked one after the other."""
+    msgpack = pytest.importorskip("msgpack")
+    data = b"".join(render_msgpack(normalize([entry("a"), entry("b")])))
+
+    records = list(msgpack.Unpacker(io.BytesIO(data)))
+    assert [record["id"] for record in records] == ["a", "b"]
+    assert list(records[0]) == list(OUTPUT_FIELDS)
+
+
+def test_buffered_output_writes_bytes():
+    """Test that binary chunks are joined into bytes."""
+    stream = io.BytesIO()
+
+    write_output([b"a", b"b"], BufferedOutput(stream))
+
+    assert stream.getvalue() == b"ab"
@@ -0,0 +1,79 @@
+import pytest
+
+from reddit_topics_aggregator.pipeline import FLUSH
+from reddit_topics_aggregator.postprocessing import (
+    PostProcessor,
+    check_postprocessors,
+    normalize_whitespace,
+    strip_html,
+    strip_markdown,
+)
+from reddit_topics_aggregator.records import TopicRecord
+
+
+def record(id, title, selftext=None):
+    return TopicRecord(
+        "python", "Python", "hot", 1, id=id, title=title, selftext=selftext
+    )
+
+
+def test_strip_markdown():
+    """Test that markdown markup is removed and its text kept."""
+    assert strip_markdown(
+        "# Release\n> **Bold** and *italic* `code` ~~gone~~ >!spoiler!<\n"
+        "- see [the docs](https://example.com) &amp; more"
+    ) == ("Release\nBold and italic code gone spoiler\nsee the docs & more")
+
+
+def test_strip_html():
+    """Test that HTML tags are removed and entities decoded."""
+    assert strip_html("<p>Fish &amp; <b>chips</b></p>") == " Fish &  chips  "
+
+
+def test_normalize_whitespace():
+    """Test that runs of whitespace become single spaces."""
+    assert normalize_whitespace("  a\n\n b\t c ") == "a b c"
+
+
+def test_check_postprocessors_rejects_unknown_names():
+    """Test that post-processors must be registered."""
+    with pytest.raises(ValueError, match="Unknown post-processors: stem"):
+        check_postprocessors(["strip_html", "stem"])
+
+
+def test_without_postprocessors_records_are_unchanged():
+    """Test that no post-processor leaves the records as they are."""
+    records = [record("a", "**a**")]
+
+    assert PostProcessor([]).process(records) is records
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_process_keeps_order_and_flushes(workers):
+    """Test that records come out processed, in order, with FLUSH markers in place."""
+    records = [
+        record(str(index), f"**title  {index}**", f"body\n{index}")
+        for index in range(7)
+    ]
+    records[3:3] = [FLUSH]
+    records.append(FLUSH)
+    processor = PostProcessor(
+        ["strip_markdown", "normalize_whitespace"], workers, batch_size=2
+    )
+
+    processed = list(processor.process(records))
+
+    assert [item is FLUSH for item in processed] == [
+        item is FLUSH for item in records
+    ]
+    processed = [item for item in processed if item is not FLUSH]
+    assert [item.id for item in processed] == [str(index) for index in range(7)]
+    assert processed[4].title == "title 4"
+    assert processed[4].selftext == "body 4"
+
+
+def test_process_skips_missing_text():
+    """Test that fields left out of the records are not processed."""
+    (processed,) = PostProcessor(["strip_html"], 1).process([record("a", None)])
+
+    assert (processed.title, processed.selftext) == (None, None)
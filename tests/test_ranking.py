@@ -0,0 +1,84 @@
+import pytest
+
+from reddit_topics_aggregator.pipeline import FLUSH
+from reddit_topics_aggregator.ranking import GlobalTop, ranked, sort_key
+from reddit_topics_aggregator.records import TopicRecord
+
+NOW = 1_000_000.0
+
+
+def record(id, score=None, num_comments=None, age=None):
+    return TopicRecord(
+        "sub",
+        "",
+        "hot",
+        1,
+        id=id,
+        score=score,
+        num_comments=num_comments,
+        created_utc=None if age is None else NOW - age,
+    )
+
+
+def test_sort_key_velocity_is_score_per_hour():
+    """Test that velocity divides the score by the hours since posting."""
+    velocity = sort_key("velocity", NOW)
+
+    assert velocity(record("a", score=100, age=2 * 3600)) == 50
+    # Brand new posts are ranked as if they were a quarter of an hour old
+    assert velocity(record("b", score=10, age=0)) == 40
+    assert velocity(record("c")) == 0
+
+
+def test_sort_key_rejects_unknown_keys():
+    """Test that an unknown sort key is an error."""
+    with pytest.raises(ValueError, match="Unknown sort key"):
+        sort_key("best", NOW)
+
+
+@pytest.mark.parametrize(
+    "sort_by, expected",
+    [
+        ("score", ["b", "d", "a"]),
+        ("comments", ["a", "c", "d"]),
+        ("velocity", ["d", "a", "b"]),
+    ],
+)
+def test_global_top_keeps_highest_ranking(sort_by, expected):
+    """Test that only the highest ranking records come out, highest first."""
+    records = [
+        record("a", score=10, num_comments=9, age=3600),
+        record("b", score=50, num_comments=1, age=10 * 3600),
+        FLUSH,
+        record("c", score=None, num_comments=5, age=3600),
+        record("d", score=20, num_comments=5, age=900),
+    ]
+
+    top = GlobalTop(3, sort_by, clock=lambda: NOW).top(records)
+
+    assert [record.id for record in top] == expected
+
+
+def test_global_top_keeps_stream_order_of_ties():
+    """Test that records ranking the same keep the order they came in."""
+    records = [record(str(i), score=i % 2) for i in range(10)]
+
+    top = GlobalTop(4).top(iter(records))
+
+    assert [record.id for record in top] == ["1", "3", "5", "7"]
+
+
+def test_ranked_orders_every_record():
+    """Test that ranked keeps every record, highest first, ties in order."""
+    records = [
+        record("a", score=1),
+        FLUSH,
+        record("b", score=3),
+        record("c", score=1),
+    ]
+
+    assert [entry.id for entry in ranked(records, "score", lambda: NOW)] == [
+        "b",
+        "a",
+        "c",
+    ]
@@ -0,0 +1,236 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from reddit_topics_aggregator.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_acquire_within_burst_does_not_sleep():
+    """Test that requests within the burst budget are not delayed."""
+    clock = FakeClock()
+    limiter = RateLimiter(60, burst=20, clock=clock, sleep=clock.sleep)
+
+    for _ in range(20):
+        assert limiter.acquire() == 0.0
+    assert clock.sleeps == []
+
+
+def test_acquire_waits_once_budget_is_spent():
+    """Test that requests beyond the budget wait for the bucket to refill."""
+    clock = FakeClock()
+    limiter = RateLimiter(60, burst=1, clock=clock, sleep=clock.sleep)
+
+    limiter.acquire()
+    assert limiter.acquire() == pytest.approx(1.0)
+    assert limiter.acquire(2) == pytest.approx(2.0)
+
+
+def test_acquire_refills_over_time():
+    """Test that the bucket refills at the configured rate."""
+    clock = FakeClock()
+    limiter = RateLimiter(120, burst=2, clock=clock, sleep=clock.sleep)
+
+    limiter.acquire(2)
+    clock.now += 1.0
+    assert limiter.acquire(2) == 0.0
+
+
+def test_acquire_is_shared_between_threads():
+    """Test that concurrent callers draw from one shared budget."""
+    clock = FakeClock()
+    limiter = RateLimiter(60, burst=10, clock=clock, sleep=lambda _: None)
+    waits = []
+
+    def worker():
+        waits.append(limiter.acquire())
+
+    threads = [threading.Thread(target=worker) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(waits) == [0.0] * 10 + [float(i) for i in range(1, 11)]
+
+
+def test_invalid_rate():
+    """Test that a non-positive rate is rejected."""
+    with pytest.raises(ValueError, match="requests_per_minute"):
+        RateLimiter(0)
+
+
+def test_observe_spreads_remaining_budget_until_reset():
+    """Test that the pace follows the budget Reddit reports."""
+    clock = FakeClock()
+    limiter = RateLimiter(600, burst=1, clock=clock, sleep=clock.sleep)
+
+    limiter.observe(
+        {
+            "x-ratelimit-remaining": "30.0",
+            "x-ratelimit-used": "570",
+            "x-ratelimit-reset": "60",
+        }
+    )
+    limiter.acquire()
+
+    # 30 requests left over 60 seconds is one request every 2 seconds
+    assert limiter.acquire() == pytest.approx(2.0)
+
+
+def test_observe_never_exceeds_configured_rate():
+    """Test that a generous reported budget does not speed up the pace."""
+    clock = FakeClock()
+    limiter = RateLimiter(60, burst=1, clock=clock, sleep=clock.sleep)
+
+    limiter.observe(
+        {
+            "x-ratelimit-remaining": "1000",
+            "x-ratelimit-used": "0",
+            "x-ratelimit-reset": "10",
+        }
+    )
+    limiter.acquire()
+
+    assert limiter.acquire() == pytest.approx(1.0)
+
+
+def test_observe_blocks_until_reset_when_exhausted():
+    """Test that no request goes out once the budget is spent."""
+    clock = FakeClock()
+    limiter = RateLimiter(6000, clock=clock, sleep=clock.sleep)
+
+    limiter.observe(
+        {
+            "x-ratelimit-remaining": "0",
+            "x-ratelimit-used": "600",
+            "x-ratelimit-reset": "42",
+        }
+    )
+
+    assert limiter.acquire() == pytest.approx(42.0)
+
+
+def test_observe_ignores_responses_without_headers():
+    """Test that responses without rate limit headers change nothing."""
+    limiter = RateLimiter(60)
+
+    limiter.observe({})
+
+    assert limiter.state().remaining is None
+
+
+def test_state():
+    """Test that the state reports requests, waits and Reddit's budget."""
+    clock = FakeClock()
+    limiter = RateLimiter(60, burst=1, clock=clock, sleep=clock.sleep)
+    limiter.acquire(2)
+    limiter.observe(
+        {
+            "x-ratelimit-remaining": "10",
+            "x-ratelimit-used": "5",
+            "x-ratelimit-reset": "100",
+        }
+    )
+    limiter.observe(
+        {
+            "x-ratelimit-remaining": "20",
+            "x-ratelimit-used": "6",
+            "x-ratelimit-reset": "90",
+        }
+    )
+
+    state = limiter.state()
+
+    assert state.requests == 2
+    assert state.waited == pytest.approx(1.0)
+    assert state.remaining == 20
+    assert state.lowest_remaining == 10
+    assert state.used == 6
+    assert state.reset_in == pytest.approx(90)
+    assert "20 remaining (lowest 10)" in state.describe()
+
+
+def test_attach_observes_client_responses():
+    """Test that attach() feeds every response of a client to the limiter."""
+    limiter = RateLimiter(60)
+    core_rate_limiter = MagicMock()
+    reddit_client = MagicMock()
+    reddit_client._core._rate_limiter = core_rate_limiter
+    update = core_rate_limiter.update
+
+    limiter.attach(reddit_client)
+    headers = {
+        "x-ratelimit-remaining": "7",
+        "x-ratelimit-used": "3",
+        "x-ratelimit-reset": "5",
+    }
+    core_rate_limiter.update(response_headers=headers)
+
+    update.assert_called_once_with(response_headers=headers)
+    assert limiter.state().remaining == 7
+
+
+def test_attach_rejects_clients_without_a_core_rate_limiter():
+    """Test that a praw client missing the expected internals fails clearly."""
+    with pytest.raises(ValueError, match="Unsupported praw version"):
+        RateLimiter(60).attach(object())
+
+
+def test_pace_pays_before_every_request_but_token_ones():
+    """Test that pace() acquires before API requests, not token requests."""
+    clock = FakeClock()
+    limiter = RateLimiter(60, burst=1, clock=clock, sleep=clock.sleep)
+    reddit_client = MagicMock()
+    request = reddit_client._core.requestor.request
+
+    limiter.pace(reddit_client)
+    reddit_client._core.requestor.request(
+        "POST", "https://www.reddit.com/api/v1/access_token"
+    )
+    for _ in range(2):
+        reddit_client._core.requestor.request(
+            "GET", "https://oauth.reddit.com/r/python/hot"
+        )
+
+    assert request.call_count == 3
+    assert limiter.state().requests == 2
+    assert clock.sleeps == [1.0]
+
+
+def test_headroom():
+    """Test that headroom is capped by Reddit's budget and empty while blocked."""
+    clock = FakeClock()
+    limiter = RateLimiter(600, burst=10, clock=clock, sleep=clock.sleep)
+    assert limiter.headroom() == 10
+
+    limiter.observe(
+        {
+            "x-ratelimit-remaining": "4",
+            "x-ratelimit-used": "6",
+            "x-ratelimit-reset": "60",
+        }
+    )
+    assert limiter.headroom() == 4
+
+    limiter.observe(
+        {
+            "x-ratelimit-remaining": "0",
+            "x-ratelimit-used": "10",
+            "x-ratelimit-reset": "60",
+        }
+    )
+    assert limiter.headroom() == float("-inf")
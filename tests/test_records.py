@@ -0,0 +1,41 @@
+import dataclasses
+
+import pytest
+
+from reddit_topics_aggregator.records import (
+    SUBMISSION_FIELDS,
+    TopicRecord,
+    project_fields,
+)
+
+
+def test_topic_record_is_immutable_and_slotted():
+    """Test that records hold no per-instance dict and cannot be changed."""
+    record = TopicRecord("sub", "Sub", "hot", 1, id="a")
+
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        record.title = "changed"
+
+
+def test_with_appearances_returns_a_copy():
+    """Test that appearances are added to a copy, leaving the record as it was."""
+    record = TopicRecord("sub", "Sub", "hot", 1, id="a")
+
+    merged = record.with_appearances(("sub", "hot", 1), ("b", "top", 2))
+
+    assert record.appearances == ()
+    assert merged.appearances == (("sub", "hot", 1), ("b", "top", 2))
+    assert merged.subreddits == ["sub", "b"]
+
+
+def test_project_fields_keeps_order_and_id():
+    """Test that projected fields are kept in field order, always with the id."""
+    assert project_fields(["url", "title"]) == ("id", "title", "url")
+    assert project_fields(SUBMISSION_FIELDS) == SUBMISSION_FIELDS
+
+
+def test_project_fields_rejects_unknown_fields():
+    """Test that only submission fields can be kept."""
+    with pytest.raises(ValueError, match="Unknown submission fields: body"):
+        project_fields(["title", "body"])
@@ -1,9 +1,16 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch
 
 import pytest
 from praw import Reddit
 
-from reddit_topics_aggregator.reddit_client_builder import RedditClientBuilder
+from reddit_topics_aggregator.http_session import PooledSession
+from reddit_topics_aggregator.reddit_client_builder import (
+    RedditClientBuilder,
+    ThreadLocalReddit,
+)
 
 package_version = "0.2.1"
 
@@ -126,3 +133,120 @@ def test_build_reddit_client_from_no_args():
         ValueError, match="client_id, client_secret, username, password"
     ):
         RedditClientBuilder.build_reddit_client_from_args()
+
+
+def test_from_args():
+    """Test creating a configured builder from arguments."""
+    builder = RedditClientBuilder.from_args(
+        "test_id", "test_secret", "test_user", "test_password", "agent"
+    )
+
+    assert builder.client_kwargs() == {
+        "client_id": "test_id",
+        "client_secret": "test_secret",
+        "username": "test_user",
+        "password": "test_password",
+        "user_agent": "agent",
+    }
+
+
+@patch.dict("os.environ", {"REDDIT_BASE_URL": "http://localhost:8080/"})
+def test_base_url_override():
+    """Test that a base URL sends OAuth and token requests to another server."""
+    reddit_client = RedditClientBuilder.from_args(
+        "test_id", "test_secret", "test_user", "test_password"
+    ).build()
+
+    assert reddit_client.config.oauth_url == "http://localhost:8080"
+    assert reddit_client.config.reddit_url == "http://localhost:8080"
+
+
+def test_clients_share_the_pooled_session():
+    """Test that built clients share one session, unless given their own."""
+    builder = RedditClientBuilder.from_args(
+        "test_id", "test_secret", "test_user", "test_password"
+    ).set_session_options(pool_size=4)
+    session = PooledSession()
+
+    first, second = builder.build(), builder.build()
+    own = builder.set_session(session).build()
+
+    assert first._core.requestor._http is second._core.requestor._http
+    assert (
+        first._core.requestor._http.get_adapter(
+            "https://oauth.reddit.com"
+        )._pool_maxsize
+        == 4
+    )
+    assert own._core.requestor._http is session
+
+
+@patch.dict(
+    "os.environ", {"REDDIT_HTTP_POOL_SIZE": "8", "REDDIT_HTTP_TIMEOUT": "2.5"}
+)
+def test_session_options_from_env_vars():
+    """Test that the pool size and read timeout come from the environment."""
+    builder = RedditClientBuilder()
+
+    assert builder.session_options == {"pool_size": 8, "read_timeout": 2.5}
+    assert builder.http_session().timeout == (5.0, 2.5)
+
+
+def test_build_async():
+    """Test building an asyncpraw client on a running event loop."""
+    asyncpraw = pytest.importorskip("asyncpraw")
+    builder = RedditClientBuilder.from_args(
+        "test_id", "test_secret", "test_user", "test_password"
+    )
+
+    async def build_and_close():
+        reddit_client = builder.build_async()
+        await reddit_client.close()
+        return reddit_client
+
+    reddit_client = asyncio.run(build_and_close())
+
+    assert isinstance(reddit_client, asyncpraw.Reddit)
+    assert reddit_client.config.client_id == "test_id"
+
+
+def test_build_async_without_asyncpraw():
+    """Test that a missing asyncpraw is reported as a configuration error."""
+    builder = RedditClientBuilder.from_args(
+        "test_id", "test_secret", "test_user", "test_password"
+    )
+
+    with (
+        patch.dict("sys.modules", {"asyncpraw": None}),
+        pytest.raises(ValueError, match="requires asyncpraw"),
+    ):
+        builder.build_async()
+
+
+def test_build_async_missing_required_fields():
+    """Test that the async client validates the required fields too."""
+    with pytest.raises(ValueError, match="client_id"):
+        RedditClientBuilder().build_async()
+
+
+def test_thread_local_reddit_builds_a_client_per_thread():
+    """Test that every thread gets its own client, reused across calls."""
+    built = []
+
+    def build_client():
+        built.append(threading.get_ident())
+        return threading.get_ident()
+
+    reddit_client = ThreadLocalReddit(build_client)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        barrier = threading.Barrier(3)
+
+        def use_client(_):
+            barrier.wait()
+            return reddit_client.client(), reddit_client.client()
+
+        results = list(executor.map(use_client, range(3)))
+
+    assert all(first == second for first, second in results)
+    assert sorted(built) == sorted(first for first, _ in results)
+    assert len(set(built)) == 3
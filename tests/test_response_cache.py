@@ -0,0 +1,135 @@
+import multiprocessing
+from types import SimpleNamespace
+
+import pytest
+
+from reddit_topics_aggregator.records import (
+    SUBMISSION_FIELDS,
+    submission_fields,
+)
+from reddit_topics_aggregator.response_cache import (
+    CachedSubmission,
+    ResponseCache,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_get_missing(tmp_path):
+    """Test that an unknown key is a cache miss."""
+    with ResponseCache(tmp_path) as cache:
+        assert cache.get("sub", "hot", 10) is None
+
+
+def test_put_and_get(tmp_path, clock):
+    """Test that a stored response is returned until its TTL expires."""
+    with ResponseCache(tmp_path, ttls={"hot": 60}, clock=clock) as cache:
+        cache.put("Sub", "hot", 10, [{"id": "a"}])
+
+        clock.now += 60
+        assert cache.get("sub", "hot", 10) == [{"id": "a"}]
+        clock.now += 1
+        assert cache.get("sub", "hot", 10) is None
+
+
+def test_key_includes_limit_and_time_filter(tmp_path):
+    """Test that responses are keyed by limit and time filter too."""
+    with ResponseCache(tmp_path) as cache:
+        cache.put("sub", "top", 10, ["all"], "all")
+
+        assert cache.get("sub", "top", 10, "all") == ["all"]
+        assert cache.get("sub", "top", 10, "day") is None
+        assert cache.get("sub", "top", 5, "all") is None
+
+
+def test_get_many(tmp_path, clock):
+    """Test that fresh responses of many subreddits are read in one call."""
+    with ResponseCache(tmp_path, ttls={"about": 60}, clock=clock) as cache:
+        cache.put("One", "about", 0, {"title": "one"})
+        clock.now += 30
+        cache.put("two", "about", 0, {"title": "two"})
+        cache.put("three", "hot", 0, ["hot"])
+        clock.now += 31
+
+        assert cache.get_many(["one", "Two", "three"], "about") == {
+            "two": {"title": "two"}
+        }
+
+
+def test_ttl_per_listing(tmp_path, clock):
+    """Test that every listing expires after its own TTL."""
+    with ResponseCache(
+        tmp_path, ttls={"new": 10, "top": 100}, clock=clock
+    ) as cache:
+        cache.put("sub", "new", 10, ["new"])
+        cache.put("sub", "top", 10, ["top"])
+        clock.now += 50
+
+        assert cache.get("sub", "new", 10) is None
+        assert cache.get("sub", "top", 10) == ["top"]
+
+
+def test_evicts_least_recently_used(tmp_path, clock):
+    """Test that the least recently used responses are evicted first."""
+    with ResponseCache(tmp_path, max_bytes=25, clock=clock) as cache:
+        cache.put("a", "hot", 1, "x" * 8)
+        clock.now += 1
+        cache.put("b", "hot", 1, "x" * 8)
+        clock.now += 1
+        assert cache.get("a", "hot", 1) is not None
+        clock.now += 1
+        cache.put("c", "hot", 1, "x" * 8)
+
+        assert cache.size() <= 25
+        assert cache.get("a", "hot", 1) is not None
+        assert cache.get("b", "hot", 1) is None
+        assert cache.get("c", "hot", 1) is not None
+
+
+def _put_many(cache_dir, worker):
+    with ResponseCache(cache_dir) as cache:
+        for i in range(50):
+            cache.put(f"sub{worker}", "hot", i, [i])
+
+
+def test_shared_between_processes(tmp_path):
+    """Test that several processes can write to one cache at once."""
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_put_many, args=(tmp_path, worker))
+        for worker in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert [process.exitcode for process in processes] == [0] * 4
+    with ResponseCache(tmp_path) as cache:
+        assert all(
+            cache.get(f"sub{worker}", "hot", 49) == [49] for worker in range(4)
+        )
+
+
+def test_submission_round_trip():
+    """Test that a submission survives the trip through the cache."""
+    submission = SimpleNamespace(id="a", title="title", extra="dropped")
+
+    restored = CachedSubmission(**submission_fields(submission))
+
+    assert restored.id == "a"
+    assert restored.title == "title"
+    assert restored.url is None
+    assert not hasattr(restored, "extra")
+    assert set(vars(restored)) == set(SUBMISSION_FIELDS)
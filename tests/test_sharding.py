@@ -0,0 +1,109 @@
+import io
+import json
+
+import pytest
+
+from reddit_topics_aggregator.pipeline import render_jsonl
+from reddit_topics_aggregator.records import TopicRecord
+from reddit_topics_aggregator.sharding import (
+    jump_hash,
+    merge_shards,
+    parse_shard,
+    read_records,
+    shard_key,
+    shard_subreddits,
+)
+
+NAMES = [f"subreddit{index}" for index in range(2000)]
+
+
+def record(id, subreddit="python", listing="hot", rank=1, score=1):
+    return TopicRecord(
+        subreddit, f"{subreddit} title", listing, rank, id=id, score=score
+    )
+
+
+def jsonl(*records):
+    return io.StringIO("".join(render_jsonl(records)))
+
+
+def test_every_subreddit_in_exactly_one_shard():
+    """Test that shards split the subreddits between them, about evenly."""
+    shards = [shard_subreddits(NAMES, index, 4) for index in range(1, 5)]
+
+    assert sorted(name for shard in shards for name in shard) == sorted(NAMES)
+    assert all(400 < len(shard) < 600 for shard in shards)
+    # Subreddit names are case insensitive
+    assert shard_key("Python") == shard_key("python")
+
+
+def test_adding_a_shard_only_moves_subreddits_to_it():
+    """Test that going from 4 to 5 shards moves about a fifth of the subreddits, all to the new shard."""
+    before = {name: jump_hash(shard_key(name), 4) for name in NAMES}
+    after = {name: jump_hash(shard_key(name), 5) for name in NAMES}
+
+    moved = [name for name in NAMES if before[name] != after[name]]
+
+    assert {after[name] for name in moved} == {4}
+    assert 300 < len(moved) < 500
+
+
+def test_jump_hash_is_stable():
+    """Test that keys land in the buckets of the reference implementation."""
+    assert jump_hash(1, 1) == 0
+    assert jump_hash(42, 57) == 43
+    assert jump_hash(0xDEAD10CC, 666) == 361
+    assert jump_hash(256, 1024) == 520
+
+
+@pytest.mark.parametrize(
+    ("value", "error"),
+    [
+        ("2", "not a shard"),
+        ("a/b", "not a shard"),
+        ("0/3", "between"),
+        ("4/3", "between"),
+    ],
+)
+def test_parse_invalid_shard(value, error):
+    """Test that shards out of range or not written i/N are refused."""
+    with pytest.raises(ValueError, match=error):
+        parse_shard(value)
+
+
+def test_parse_shard():
+    assert parse_shard("2/3") == (2, 3)
+
+
+def test_read_records_round_trips_jsonl():
+    """Test that records read back from JSON lines equal those rendered."""
+    written = record("a").with_appearances(("python", "hot", 1))
+
+    assert list(read_records(jsonl(written), "shard")) == [written]
+
+
+def test_read_records_reports_bad_lines():
+    with pytest.raises(
+        ValueError, match="Line 2 of shard is not a topics record"
+    ):
+        list(
+            read_records(
+                io.StringIO('{"id": "a", "subreddit": "x"}\n[1]\n'), "shard"
+            )
+        )
+
+
+def test_merge_shards_drops_repeated_listings():
+    """Test that a submission listed twice in a subreddit listing is kept once."""
+    first = jsonl(record("a"), record("b"), record("a", listing="top"))
+    second = jsonl(record("b", subreddit="Python"), record("c"))
+
+    merged = list(merge_shards([(first, "first"), (second, "second")]))
+
+    assert [(entry.id, entry.listing) for entry in merged] == [
+        ("a", "hot"),
+        ("b", "hot"),
+        ("a", "top"),
+        ("c", "hot"),
+    ]
+    assert json.loads(jsonl(merged[0]).getvalue())["id"] == "a"
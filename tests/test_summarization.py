@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from reddit_topics_aggregator.pipeline import FLUSH
+from reddit_topics_aggregator.records import TopicRecord
+from reddit_topics_aggregator.summarization import (
+    ALL_SUBREDDITS,
+    TopicSummarizer,
+    render_summary_jsonl,
+    render_summary_text,
+    terms,
+)
+
+
+def record(subreddit, id, title, listing="hot"):
+    return TopicRecord(subreddit, subreddit.title(), listing, 1, id, title)
+
+
+RECORDS = [
+    record("python", "a", "Python 3.13 released with free threading"),
+    record("python", "b", "Free threading benchmarks"),
+    FLUSH,
+    record("python", "b", "Free threading benchmarks", listing="top"),
+    record("rust", "c", "Rust 2024 edition released"),
+    record("rust", "d", "Edition migration guide"),
+]
+
+
+def test_terms_drops_stop_words_and_keeps_phrases():
+    """Test that words and two-word phrases are kept, but not across stop words."""
+    assert terms("The free threading of Python 3.13") == [
+        "free",
+        "threading",
+        "python",
+        "free threading",
+    ]
+
+
+def test_summarize_ranks_topics_per_subreddit_and_overall():
+    """Test that topics shared by submissions rank first, with their evidence."""
+    pytest.importorskip("scipy")
+
+    topics = list(TopicSummarizer(size=2).summarize(RECORDS))
+
+    assert [topic.scope for topic in topics] == [
+        "python",
+        "python",
+        "rust",
+        "rust",
+        ALL_SUBREDDITS,
+        ALL_SUBREDDITS,
+    ]
+    assert {topic.topic for topic in topics[:2]} <= {
+        "free",
+        "threading",
+        "free threading",
+    }
+    assert topics[2].topic == "edition"
+    assert sorted(topics[2].submissions) == ["c", "d"]
+    # Terms found in a single submission are not a topic
+    assert "migration" not in {topic.topic for topic in topics}
+
+
+def test_summarize_counts_a_listed_submission_once():
+    """Test that a submission in several listings is a single document."""
+    pytest.importorskip("scipy")
+
+    topics = list(TopicSummarizer().summarize(RECORDS[:4]))
+
+    assert all(topic.submissions.count("b") <= 1 for topic in topics)
+
+
+def test_summarize_without_records():
+    """Test that nothing is summarized from an empty stream."""
+    pytest.importorskip("scipy")
+
+    assert list(TopicSummarizer().summarize([FLUSH])) == []
+
+
+def test_render_summary():
+    """Test that topics are rendered under a heading per scope, or as JSON."""
+    pytest.importorskip("scipy")
+    topics = list(TopicSummarizer(size=1).summarize(RECORDS))
+
+    text = "".join(render_summary_text(topics))
+    rows = [json.loads(line) for line in render_summary_jsonl(topics)]
+
+    assert "Topics: r/python\n" in text
+    assert "Topics: All subreddits\n" in text
+    assert [row["scope"] for row in rows] == ["python", "rust", "all"]
+    assert rows[1] == {
+        "scope": "rust",
+        "rank": 1,
+        "topic": "edition",
+        "score": topics[1].score,
+        "submissions": list(topics[1].submissions),
+    }
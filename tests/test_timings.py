@@ -0,0 +1,141 @@
+import json
+
+from reddit_topics_aggregator.fake_reddit import FakeReddit, FakeRedditServer
+from reddit_topics_aggregator.pipeline import BufferedOutput
+from reddit_topics_aggregator.rate_limiter import RateLimiter
+from reddit_topics_aggregator.reddit_client_builder import RedditClientBuilder
+from reddit_topics_aggregator.timings import (
+    NO_TIMINGS,
+    Timings,
+    percentile,
+    request_span,
+)
+from reddit_topics_aggregator.topic_fetcher import TopicFetcher
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_percentile_is_nearest_rank():
+    """Test percentiles over sorted durations."""
+    durations = [float(value) for value in range(1, 101)]
+
+    assert percentile(durations, 50) == 50.0
+    assert percentile(durations, 99) == 99.0
+    assert percentile([3.0], 95) == 3.0
+
+
+def test_spans_are_summarized_by_name():
+    """Test counts, totals and percentiles per span name, in recorded order."""
+    clock = FakeClock()
+    timings = Timings(clock)
+    for seconds in (1.0, 3.0, 2.0):
+        with timings.span("listing page", listing="hot"):
+            clock.now += seconds
+    with timings.span("auth"):
+        clock.now += 0.5
+
+    listing, auth = timings.summary()
+
+    assert listing == ("listing page", 3, 6.0, 2.0, 3.0, 3.0)
+    assert auth == ("auth", 1, 0.5, 0.5, 0.5, 0.5)
+    assert timings.describe().splitlines()[1].startswith("listing page")
+
+
+def test_iterate_leaves_out_the_consumer():
+    """Test that only the time spent producing items is recorded."""
+    clock = FakeClock()
+    timings = Timings(clock)
+
+    def produce():
+        for item in range(3):
+            clock.now += 1.0
+            yield item
+
+    for _ in timings.iterate("listing", produce(), subreddit="python"):
+        clock.now += 10.0
+
+    assert timings.summary()[0].total == 4.0 - 1.0
+    assert timings.chrome_trace()["traceEvents"][0]["args"] == {
+        "subreddit": "python"
+    }
+
+
+def test_request_spans_are_named_by_phase():
+    """Test that Reddit requests are grouped by what they fetch."""
+    names = [
+        request_span("POST", "https://www.reddit.com/api/v1/access_token")[0],
+        request_span("GET", "https://oauth.reddit.com/r/python/about/")[0],
+        request_span("GET", "https://oauth.reddit.com/api/info/")[0],
+        request_span("GET", "https://oauth.reddit.com/api/v1/me")[0],
+    ]
+
+    assert names == ["auth", "about", "about", "request"]
+    assert request_span(
+        "GET", "https://oauth.reddit.com/r/python/new?after=t3_x"
+    ) == (
+        "listing page",
+        {"subreddit": "python", "listing": "new", "after": "t3_x"},
+    )
+
+
+def test_chrome_trace(tmp_path):
+    """Test that spans are written as complete events in microseconds."""
+    clock = FakeClock()
+    timings = Timings(clock)
+    clock.now = 2.0
+    with timings.span("output"):
+        clock.now += 0.25
+    path = tmp_path / "trace.json"
+
+    timings.write_trace(path)
+
+    (event,) = json.loads(path.read_text())["traceEvents"]
+    assert event["name"] == "output"
+    assert event["ph"] == "X"
+    assert (event["ts"], event["dur"]) == (2_000_000, 250_000)
+
+
+def test_no_timings_records_nothing():
+    """Test that the stand-in passes everything through untouched."""
+    items = [1, 2]
+    client = object()
+
+    with NO_TIMINGS.span("output"):
+        pass
+
+    assert NO_TIMINGS.iterate("listing", items) is items
+    assert NO_TIMINGS.attach(client) is client
+    assert BufferedOutput(None).timings is NO_TIMINGS
+
+
+def test_fetch_phases_are_timed():
+    """Test spans recorded fetching through a praw client."""
+    timings = Timings()
+    limits = {"hot": 150, "new": 0, "rising": 0, "top": 5}
+    with FakeRedditServer(FakeReddit()).start() as server:
+        reddit_client = timings.attach(
+            RedditClientBuilder.from_args(
+                "id", "secret", "user", "password", base_url=server.url
+            ).build()
+        )
+        list(
+            TopicFetcher(
+                limits, RateLimiter(6000), timings=timings
+            ).stream_topics(reddit_client, ["python", "rust"])
+        )
+
+    counts = {summary.name: summary.count for summary in timings.summary()}
+    assert counts == {
+        "auth": 1,
+        "metadata": 1,
+        "about": 1,
+        "subreddit": 2,
+        "listing": 4,
+        "listing page": 6,
+    }
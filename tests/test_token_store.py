@@ -0,0 +1,165 @@
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from reddit_topics_aggregator.reddit_client_builder import RedditClientBuilder
+from reddit_topics_aggregator.token_store import (
+    TokenStore,
+    script_authorizer,
+    token_key,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeAuthorizer:
+    def __init__(self, expires_in=3600):
+        self.access_token = None
+        self.scopes = None
+        self.expires_in = expires_in
+        self.refreshes = 0
+
+    def refresh(self):
+        self.refreshes += 1
+        self.access_token = f"token{self.refreshes}"
+        self.scopes = {"read"}
+        self._expiration_timestamp_ns = (
+            time.monotonic_ns() + self.expires_in * 1_000_000_000
+        )
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_save_and_load(tmp_path, clock):
+    """Test that a token is reused until it is close to expiring."""
+    store = TokenStore(tmp_path / "tokens.json", refresh_margin=60, clock=clock)
+    store.save("key", "token", clock.now + 100, {"read"})
+
+    assert store.load("key")["access_token"] == "token"
+    clock.now += 40
+    assert store.load("key") is None
+    assert store.load("other") is None
+
+
+def test_save_is_private_and_prunes_expired(tmp_path, clock):
+    """Test that the store is only readable by its owner and stays small."""
+    path = tmp_path / "tokens.json"
+    store = TokenStore(path, clock=clock)
+    store.save("old", "token", clock.now + 10, [])
+    clock.now += 20
+    store.save("new", "token", clock.now + 10, [])
+
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    assert set(store._read()) == {"new"}
+
+
+def test_attach_saves_refreshed_token(tmp_path):
+    """Test that a refreshed token is saved and restored by the next run."""
+    path = tmp_path / "tokens.json"
+    first = TokenStore(path).attach(FakeAuthorizer(), "key")
+    first.refresh()
+
+    second = TokenStore(path).attach(FakeAuthorizer(), "key")
+
+    assert second.access_token == "token1"
+    assert second.scopes == {"read"}
+    assert second.refreshes == 0
+    remaining = (second._expiration_timestamp_ns - time.monotonic_ns()) / 1e9
+    assert 3600 - 300 - 5 < remaining <= 3600 - 300
+
+
+def test_attach_ignores_tokens_close_to_expiring(tmp_path):
+    """Test that a token about to expire is not handed out."""
+    path = tmp_path / "tokens.json"
+    TokenStore(path).attach(FakeAuthorizer(expires_in=60), "key").refresh()
+
+    authorizer = TokenStore(path).attach(FakeAuthorizer(), "key")
+
+    assert authorizer.access_token is None
+
+
+def test_attach_async_authorizer(tmp_path):
+    """Test that async authorizers are wrapped with an async refresh."""
+
+    class FakeAsyncAuthorizer(FakeAuthorizer):
+        async def refresh(self):
+            FakeAuthorizer.refresh(self)
+
+    path = tmp_path / "tokens.json"
+    authorizer = TokenStore(path).attach(FakeAsyncAuthorizer(), "key")
+    asyncio.run(authorizer.refresh())
+
+    assert TokenStore(path).load("key")["access_token"] == "token1"
+
+
+def test_token_key_hides_credentials():
+    """Test that the store key does not contain the credentials."""
+    key = token_key("client", "user")
+
+    assert "client" not in key and "user" not in key
+    assert key != token_key("client", "other")
+    assert key != token_key("client", "user", "http://localhost:8080")
+
+
+def test_builder_reuses_cached_token(tmp_path):
+    """Test that a built client needs no token exchange with a cached token."""
+    path = tmp_path / "tokens.json"
+    TokenStore(path).save(
+        token_key("test_id", "test_user"), "cached", time.time() + 3600, ["*"]
+    )
+
+    reddit_client = RedditClientBuilder.build_reddit_client_from_args(
+        "test_id", "test_secret", "test_user", "test_password", None, path
+    )
+
+    authorizer = script_authorizer(reddit_client)
+    assert authorizer.is_valid()
+    assert authorizer.access_token == "cached"
+
+
+def test_builder_without_token_cache():
+    """Test that no token is restored unless a token cache is set."""
+    reddit_client = RedditClientBuilder.build_reddit_client_from_args(
+        "test_id", "test_secret", "test_user", "test_password"
+    )
+
+    authorizer = script_authorizer(reddit_client)
+    assert not authorizer.is_valid()
+    assert "refresh" not in vars(authorizer)
+
+
+def test_script_authorizer_rejects_clients_without_an_authorizer():
+    """Test that a praw client missing the expected internals fails clearly."""
+    reddit_client = SimpleNamespace(_authorized_core=SimpleNamespace())
+
+    with pytest.raises(ValueError, match="has no attribute '_authorizer'"):
+        script_authorizer(reddit_client)
+
+
+def test_script_authorizer_rejects_unsupported_prawcore():
+    """Test that a prawcore major other than the supported one fails clearly."""
+    reddit_client = RedditClientBuilder.build_reddit_client_from_args(
+        "test_id", "test_secret", "test_user", "test_password"
+    )
+
+    with (
+        patch(
+            "reddit_topics_aggregator.praw_internals.version",
+            return_value="2.4.0",
+        ),
+        pytest.raises(ValueError, match="prawcore 2.4.0"),
+    ):
+        script_authorizer(reddit_client)
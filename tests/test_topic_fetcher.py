@@ -0,0 +1,471 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from reddit_topics_aggregator.checkpoints import (
+    CheckpointStore,
+    ListingCheckpoints,
+)
+from reddit_topics_aggregator.pipeline import FLUSH
+from reddit_topics_aggregator.reddit_client_builder import ThreadLocalReddit
+from reddit_topics_aggregator.response_cache import ResponseCache
+from reddit_topics_aggregator.topic_fetcher import (
+    LISTINGS,
+    TopicFetcher,
+    requests_for_limit,
+)
+
+LIMITS = {"hot": 2, "new": 2, "rising": 2, "top": 2}
+
+
+def make_reddit_client(delays=None):
+    """Return a mock client whose listings yield ``<subreddit>-<listing>-<n>``."""
+    delays = delays or {}
+    created = {}
+
+    def subreddit(name):
+        mock_subreddit = created[name] = MagicMock()
+        mock_subreddit.display_name = name
+        mock_subreddit.title = f"{name} title"
+        for listing in LISTINGS:
+
+            def fetch(limit, listing=listing):
+                time.sleep(delays.get(name, 0))
+                return [
+                    SimpleNamespace(id=f"{name}-{listing}-{i}", title=name)
+                    for i in range(limit)
+                ]
+
+            getattr(mock_subreddit, listing).side_effect = fetch
+        return mock_subreddit
+
+    mock_reddit_client = MagicMock()
+    mock_reddit_client.subreddit.side_effect = subreddit
+    mock_reddit_client.info.side_effect = lambda subreddits: [
+        SimpleNamespace(display_name=name, title=f"{name} title")
+        for name in subreddits
+    ]
+    mock_reddit_client.created = created
+    return mock_reddit_client
+
+
+def streamed(fetcher, reddit_client, subreddits, concurrency=1):
+    """Return the ``(subreddit, title, listing, rank, id)`` of every streamed submission."""
+    return [
+        (*entry[:4], entry.submission.id)
+        for entry in fetcher.stream_topics(
+            reddit_client, subreddits, concurrency
+        )
+        if entry is not FLUSH
+    ]
+
+
+@pytest.mark.parametrize(
+    "limit, expected", [(0, 1), (1, 1), (100, 1), (101, 2), (1000, 10)]
+)
+def test_requests_for_limit(limit, expected):
+    assert requests_for_limit(limit) == expected
+
+
+def test_stream_topics_sequential():
+    """Test that listings are fetched in display order for every subreddit."""
+    entries = streamed(TopicFetcher(LIMITS), make_reddit_client(), ["a", "b"])
+
+    assert entries[:2] == [
+        ("a", "a title", "hot", 1, "a-hot-0"),
+        ("a", "a title", "hot", 2, "a-hot-1"),
+    ]
+    assert [entry[4] for entry in entries] == [
+        f"{name}-{listing}-{i}"
+        for name in ["a", "b"]
+        for listing in LISTINGS
+        for i in range(2)
+    ]
+
+
+def test_stream_topics_skips_disabled_listings():
+    """Test that listings with a limit below 1 are not requested."""
+    limits = {"hot": 1, "new": 0, "rising": 0, "top": 0}
+
+    entries = streamed(TopicFetcher(limits), make_reddit_client(), ["a"])
+
+    assert [entry[4] for entry in entries] == ["a-hot-0"]
+
+
+@pytest.mark.parametrize("concurrency", [2, 4, 16])
+def test_stream_topics_concurrent_keeps_order(concurrency):
+    """Test that concurrent results come out in the order given."""
+    names = [f"sub{i}" for i in range(10)]
+    # Earlier subreddits are slower so that they finish last
+    delays = {name: 0.001 * (10 - i) for i, name in enumerate(names)}
+
+    sequential = streamed(TopicFetcher(LIMITS), make_reddit_client(), names)
+    concurrent = streamed(
+        TopicFetcher(LIMITS), make_reddit_client(delays), names, concurrency
+    )
+
+    assert concurrent == sequential
+
+
+def test_stream_topics_concurrent_keeps_clients_to_their_threads():
+    """Test that a thread-local client is only ever used by the thread owning it."""
+    owners = {}
+
+    def build_client():
+        mock_reddit_client = make_reddit_client()
+        owner = threading.get_ident()
+        subreddit = mock_reddit_client.subreddit.side_effect
+
+        def owned_subreddit(name):
+            owners.setdefault(id(mock_reddit_client), set()).add(
+                threading.get_ident()
+            )
+            assert threading.get_ident() == owner
+            return subreddit(name)
+
+        mock_reddit_client.subreddit.side_effect = owned_subreddit
+        return mock_reddit_client
+
+    names = [f"sub{i}" for i in range(6)]
+    entries = streamed(
+        TopicFetcher(LIMITS), ThreadLocalReddit(build_client), names, 3
+    )
+
+    assert entries == streamed(
+        TopicFetcher(LIMITS), make_reddit_client(), names
+    )
+    assert len(owners) > 1
+    assert all(len(threads) == 1 for threads in owners.values())
+
+
+def test_stream_topics_concurrent_runs_in_parallel():
+    """Test that concurrent fetching overlaps the listing requests."""
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def listing(limit):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return []
+
+    mock_reddit_client = MagicMock()
+    for name in LISTINGS:
+        getattr(
+            mock_reddit_client.subreddit.return_value, name
+        ).side_effect = listing
+
+    list(
+        TopicFetcher(LIMITS).stream_topics(
+            mock_reddit_client, ["a", "b"], concurrency=4
+        )
+    )
+
+    assert peak > 1
+
+
+def test_stream_topics_shares_rate_limiter():
+    """Test that every request is paid for through the rate limiter."""
+    rate_limiter = MagicMock()
+    limits = {"hot": 150, "new": 1, "rising": 0, "top": 0}
+
+    list(
+        TopicFetcher(limits, rate_limiter).stream_topics(
+            make_reddit_client(), ["a", "b"], concurrency=2
+        )
+    )
+
+    paid = sum(
+        call.args[0] if call.args else 1
+        for call in rate_limiter.acquire.call_args_list
+    )
+    # 2 pages of hot and 1 page of new per subreddit, and 1 info request
+    assert paid == 7
+
+
+def test_stream_topics_concurrent_propagates_errors_from_fetch():
+    """Test that an error raised by a worker reaches the caller."""
+    mock_reddit_client = make_reddit_client()
+    mock_reddit_client.subreddit.side_effect = None
+    mock_reddit_client.subreddit.return_value.hot.side_effect = ValueError(
+        "boom"
+    )
+
+    with pytest.raises(ValueError, match="boom"):
+        list(
+            TopicFetcher(LIMITS).stream_topics(
+                mock_reddit_client, ["a"], concurrency=2
+            )
+        )
+
+
+def test_stream_topics_serves_cache_hits_without_requests(tmp_path):
+    """Test that a cached subreddit is not requested from Reddit again."""
+    limits = {"hot": 2, "new": 0, "rising": 0, "top": 1}
+    rate_limiter = MagicMock()
+    with ResponseCache(tmp_path) as cache:
+        fetcher = TopicFetcher(limits, rate_limiter, cache)
+        first = streamed(fetcher, make_reddit_client(), ["a"])
+        mock_reddit_client = make_reddit_client()
+        second = streamed(fetcher, mock_reddit_client, ["a"])
+
+    assert rate_limiter.acquire.call_count == 3
+    assert second == first
+    mock_reddit_client.created["a"].hot.assert_not_called()
+    mock_reddit_client.created["a"].top.assert_not_called()
+
+
+def test_stream_topics_flushes_after_every_page():
+    """Test that FLUSH is yielded after each page and at the end of each listing."""
+    limits = {"hot": 150, "new": 0, "rising": 0, "top": 0}
+
+    entries = list(
+        TopicFetcher(limits).stream_topics(make_reddit_client(), ["a"])
+    )
+
+    flushes = [i for i, entry in enumerate(entries) if entry is FLUSH]
+    assert flushes == [100, 151]
+
+
+def test_stream_topics_concurrent_propagates_errors():
+    """Test that an error raised while streaming on a worker reaches the caller."""
+    mock_reddit_client = make_reddit_client()
+    mock_reddit_client.subreddit.side_effect = None
+    mock_reddit_client.subreddit.return_value.hot.side_effect = ValueError(
+        "boom"
+    )
+
+    with pytest.raises(ValueError, match="boom"):
+        list(
+            TopicFetcher(LIMITS).stream_topics(
+                mock_reddit_client, ["a"], concurrency=2
+            )
+        )
+
+
+def make_combined_client(posts):
+    """Return a mock client whose ``r/a+b`` listings yield ``posts`` of a and b."""
+    mock_reddit_client = MagicMock()
+
+    def subreddit(path):
+        names = path.lower().split("+")
+        matching = [name for name in posts if name.lower() in names]
+        mock_subreddit = MagicMock()
+        mock_subreddit.display_name = path
+        mock_subreddit.title = f"{path} title"
+        for listing in LISTINGS:
+            getattr(mock_subreddit, listing).side_effect = lambda limit: [
+                SimpleNamespace(id=f"{name}-{i}", subreddit=name)
+                for i, name in enumerate(matching[:limit])
+            ]
+        mock_reddit_client.combined = mock_subreddit
+        return mock_subreddit
+
+    mock_reddit_client.subreddit.side_effect = subreddit
+    mock_reddit_client.info.side_effect = lambda subreddits: [
+        SimpleNamespace(display_name=name, title=f"{name} title")
+        for name in subreddits
+    ]
+    return mock_reddit_client
+
+
+def test_fetch_batch_splits_combined_listings():
+    """Test that a combined listing is split per subreddit, up to each limit."""
+    limits = {"hot": 2, "new": 0, "rising": 0, "top": 0}
+    rate_limiter = MagicMock()
+    mock_reddit_client = make_combined_client(
+        ["a", "A", "a", "b", "a", "a", "c"]
+    )
+
+    results = TopicFetcher(limits, rate_limiter).fetch_batch(
+        mock_reddit_client, ["a", "b", "c"]
+    )
+
+    mock_reddit_client.subreddit.assert_called_once_with("a+b+c")
+    mock_reddit_client.combined.hot.assert_called_once_with(limit=6)
+    assert [result.title for result in results] == [
+        "a title",
+        "b title",
+        "c title",
+    ]
+    assert [
+        [entry.submission.id for entry in result.entries()]
+        for result in results
+    ] == [
+        ["a-0", "A-1"],
+        ["b-3"],
+        [],
+    ]
+    # One listing page and one info request for the whole batch
+    assert rate_limiter.acquire.call_count == 2
+
+
+def test_fetch_batch_falls_back_to_about_page():
+    """Test that a subreddit missing from the bulk lookup gets its own title."""
+    limits = {"hot": 1, "new": 0, "rising": 0, "top": 0}
+    mock_reddit_client = make_combined_client(["a", "b"])
+    mock_reddit_client.info.side_effect = lambda subreddits: [
+        SimpleNamespace(display_name="a", title="a title")
+    ]
+
+    results = TopicFetcher(limits).fetch_batch(mock_reddit_client, ["a", "b"])
+
+    assert [result.title for result in results] == ["a title", "b title"]
+    mock_reddit_client.subreddit.assert_called_with("b")
+
+
+def test_stream_batches_keeps_order_and_flushes(tmp_path):
+    """Test that batched subreddits come out in the order given, from cache on reruns."""
+    limits = {"hot": 1, "new": 0, "rising": 0, "top": 1}
+    names = ["a", "b", "c"]
+
+    with ResponseCache(tmp_path) as cache:
+        fetcher = TopicFetcher(limits, cache=cache)
+        first = list(
+            fetcher.stream_batches(
+                make_combined_client(names), names, 2, concurrency=2
+            )
+        )
+        mock_reddit_client = make_combined_client(names)
+        second = list(fetcher.stream_batches(mock_reddit_client, names, 2))
+
+    assert [entry if entry is FLUSH else entry[:4] for entry in first] == [
+        ("a", "a title", "hot", 1),
+        ("a", "a title", "top", 1),
+        FLUSH,
+        ("b", "b title", "hot", 1),
+        ("b", "b title", "top", 1),
+        FLUSH,
+        ("c", "c title", "hot", 1),
+        ("c", "c title", "top", 1),
+        FLUSH,
+    ]
+    assert [entry[:4] for entry in second if entry is not FLUSH] == [
+        entry[:4] for entry in first if entry is not FLUSH
+    ]
+    mock_reddit_client.info.assert_not_called()
+    mock_reddit_client.combined.hot.assert_not_called()
+
+
+def test_prefetch_metadata_loads_in_bulk(tmp_path):
+    """Test that metadata is fetched once per 100 subreddits and then cached."""
+    names = [f"sub{i}" for i in range(150)]
+    rate_limiter = MagicMock()
+
+    with ResponseCache(tmp_path) as cache:
+        mock_reddit_client = make_reddit_client()
+        TopicFetcher(LIMITS, rate_limiter, cache).prefetch_metadata(
+            mock_reddit_client, names
+        )
+        cached_client = make_reddit_client()
+        fetcher = TopicFetcher(LIMITS, cache=cache)
+        fetcher.prefetch_metadata(cached_client, names)
+
+    assert [
+        len(call.kwargs["subreddits"])
+        for call in mock_reddit_client.info.call_args_list
+    ] == [100, 50]
+    assert rate_limiter.acquire.call_count == 2
+    cached_client.info.assert_not_called()
+    assert fetcher.metadata["sub149"]["title"] == "sub149 title"
+
+
+def test_fetch_title_falls_back_to_about_page():
+    """Test that a subreddit missing from the bulk lookup is fetched on its own."""
+    mock_reddit_client = make_reddit_client()
+    mock_reddit_client.info.side_effect = lambda subreddits: []
+
+    entries = streamed(TopicFetcher(LIMITS), mock_reddit_client, ["a"])
+
+    assert entries[0][1] == "a title"
+
+
+def test_since_last_run_requests_newer_submissions_only(tmp_path):
+    """Test that a checkpointed ``new`` listing is requested before its cursor."""
+    store = CheckpointStore(tmp_path / "checkpoints.json")
+    limits = {"hot": 0, "new": 2, "rising": 0, "top": 0}
+    checkpoints = ListingCheckpoints(store)
+    list(
+        TopicFetcher(limits, checkpoints=checkpoints).stream_topics(
+            make_reddit_client(), ["a"]
+        )
+    )
+    checkpoints.save()
+
+    rate_limiter = MagicMock()
+    mock_reddit_client = make_reddit_client()
+    mock_reddit_client.subreddit.side_effect = None
+    mock_subreddit = mock_reddit_client.subreddit.return_value
+    mock_subreddit.display_name = "a"
+    mock_subreddit.new.return_value = [
+        SimpleNamespace(id="a-new-new", created_utc=1)
+    ]
+    entries = streamed(
+        TopicFetcher(
+            limits, rate_limiter, checkpoints=ListingCheckpoints(store)
+        ),
+        mock_reddit_client,
+        ["a"],
+    )
+
+    mock_subreddit.new.assert_called_once_with(
+        limit=2, params={"before": "t3_a-new-0"}
+    )
+    assert [entry[4] for entry in entries] == ["a-new-new"]
+
+
+def test_since_last_run_refetches_when_checkpoint_was_deleted(tmp_path):
+    """Test that an empty page before a deleted checkpoint falls back to ``new``."""
+    store = CheckpointStore(tmp_path / "checkpoints.json")
+    limits = {"hot": 0, "new": 2, "rising": 0, "top": 0}
+    checkpoints = ListingCheckpoints(store)
+    list(
+        TopicFetcher(limits, checkpoints=checkpoints).stream_topics(
+            make_reddit_client(), ["a"]
+        )
+    )
+    checkpoints.save()
+
+    mock_reddit_client = make_reddit_client()
+    mock_reddit_client.subreddit.side_effect = None
+    mock_subreddit = mock_reddit_client.subreddit.return_value
+    mock_subreddit.display_name = "a"
+    mock_subreddit.new.side_effect = lambda limit, params=None: (
+        []
+        if params
+        else [
+            SimpleNamespace(id="a-new-new", created_utc=1),
+            SimpleNamespace(id="a-new-1", created_utc=0),
+        ]
+    )
+    entries = streamed(
+        TopicFetcher(limits, checkpoints=ListingCheckpoints(store)),
+        mock_reddit_client,
+        ["a"],
+    )
+
+    assert mock_subreddit.new.call_count == 2
+    mock_subreddit.new.assert_called_with(limit=2)
+    assert [entry[4] for entry in entries] == ["a-new-new"]
+
+
+def test_listing_abandoned_early_pays_for_fetched_pages_only():
+    """Test that pages are paid for as they are requested, not up front."""
+    rate_limiter = MagicMock()
+    fetcher = TopicFetcher(LIMITS, rate_limiter)
+    topics = fetcher.iter_listing(
+        make_reddit_client().subreddit("a"), "hot", 250
+    )
+
+    for _ in zip(range(150), topics, strict=False):
+        pass
+
+    assert rate_limiter.acquire.call_count == 2
@@ -0,0 +1,132 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import praw.exceptions
+
+from reddit_topics_aggregator.checkpoints import (
+    CheckpointStore,
+    ListingCheckpoints,
+)
+from reddit_topics_aggregator.pipeline import FLUSH
+from reddit_topics_aggregator.topic_fetcher import TopicFetcher
+from reddit_topics_aggregator.watcher import AdaptiveInterval, Watcher
+
+LIMITS = {"hot": 0, "new": 5, "rising": 0, "top": 0}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def make_reddit_client(posts):
+    """Return a mock client whose ``new`` listings yield the ``posts`` so far."""
+    mock_reddit_client = MagicMock()
+    mock_reddit_client.info.side_effect = lambda subreddits: [
+        SimpleNamespace(display_name=name, title=f"{name} title")
+        for name in subreddits
+    ]
+
+    def subreddit(name):
+        mock_subreddit = MagicMock()
+        mock_subreddit.display_name = name
+        mock_subreddit.new.side_effect = lambda limit, params=None: [
+            SimpleNamespace(id=f"{name}-{i}", created_utc=i)
+            for i in reversed(range(posts[name]))
+        ][:limit]
+        return mock_subreddit
+
+    mock_reddit_client.subreddit.side_effect = subreddit
+    return mock_reddit_client
+
+
+def make_watcher(tmp_path, mock_reddit_client, clock, **kwargs):
+    fetcher = TopicFetcher(
+        LIMITS,
+        checkpoints=ListingCheckpoints(CheckpointStore(tmp_path / "c.json")),
+    )
+    return Watcher(
+        fetcher,
+        mock_reddit_client,
+        ["busy", "quiet"],
+        min_interval=10,
+        max_interval=80,
+        clock=clock,
+        sleep=clock.sleep,
+        **kwargs,
+    )
+
+
+def test_adaptive_interval():
+    """Test that the interval shrinks on new items and backs off otherwise."""
+    interval = AdaptiveInterval(10, 40)
+
+    assert [interval.update(0) for _ in range(3)] == [20, 40, 40]
+    assert [interval.update(1) for _ in range(3)] == [20, 10, 10]
+
+
+def test_watch_only_yields_new_submissions(tmp_path):
+    """Test that every round only yields what is new since the previous one."""
+    posts = {"busy": 1, "quiet": 1}
+    clock = FakeClock()
+    watcher = make_watcher(tmp_path, make_reddit_client(posts), clock)
+
+    def next_round():
+        return [
+            entry.submission.id
+            for entry in watcher.stream(rounds=1)
+            if entry is not FLUSH
+        ]
+
+    assert next_round() == ["busy-0", "quiet-0"]
+    posts["busy"] = 3
+    clock.now += 10
+    assert next_round() == ["busy-2", "busy-1"]
+
+
+def test_watch_polls_busy_subreddits_more_often(tmp_path):
+    """Test that a subreddit with new submissions is polled sooner."""
+    posts = {"busy": 1, "quiet": 1}
+    clock = FakeClock()
+    mock_reddit_client = make_reddit_client(posts)
+    watcher = make_watcher(tmp_path, mock_reddit_client, clock)
+    for entry in watcher.stream(rounds=6):
+        if entry is FLUSH:
+            posts["busy"] += 1
+
+    polled = [
+        call.args[0]
+        for call in mock_reddit_client.subreddit.call_args_list
+        if call.args[0] != "busy+quiet"
+    ]
+    assert polled.count("busy") > polled.count("quiet")
+    assert watcher.intervals["busy"].seconds == 10
+    assert watcher.intervals["quiet"].seconds > 10
+
+
+def test_watch_keeps_going_after_reddit_errors(tmp_path):
+    """Test that a failed round is reported and the next one still runs."""
+    posts = {"busy": 1, "quiet": 1}
+    clock = FakeClock()
+    mock_reddit_client = make_reddit_client(posts)
+    mock_reddit_client.info.side_effect = [
+        praw.exceptions.PRAWException("boom"),
+        [],
+    ]
+    errors = []
+    watcher = make_watcher(
+        tmp_path, mock_reddit_client, clock, on_error=errors.append
+    )
+
+    entries = [
+        entry for entry in watcher.stream(rounds=2) if entry is not FLUSH
+    ]
+
+    assert [str(error) for error in errors] == ["boom"]
+    assert len(entries) == 2